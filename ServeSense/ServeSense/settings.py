@@ -87,6 +87,30 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # take the write lock when a transaction starts, so booking checks
+            # and inserts from concurrent requests run one after the other
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # an on-disk test database locks like the real one; the in-memory
+        # default fails concurrent writers immediately instead of waiting
+        "TEST": {
+            "NAME": BASE_DIR / "test_db.sqlite3",
+        },
+    }
+}
+
+
+# Cache
+# The staff roster is cached here (see staff.roster). The local memory cache
+# is per process; point this at a shared cache such as Redis or Memcached
+# when running several workers, so a clock-in clears every copy.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "servesense",
     }
 }
 
@@ -134,3 +158,50 @@ STATICFILES_DIRS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Payroll
+# Pay periods are PAYROLL_PERIOD_DAYS long, counted from the first one,
+# which started on PAYROLL_PERIOD_START.
+
+PAYROLL_PERIOD_START = "2025-01-06"
+
+PAYROLL_PERIOD_DAYS = 14
+
+
+# Attendance archive
+# Closed shifts that ended more than this many days ago are moved to
+# staff.AttendanceArchive by the archive_attendance command.
+
+ATTENDANCE_ARCHIVE_AFTER_DAYS = 180
+
+
+# Shift scheduling
+# How many covers (guests seated during an hour) one person of each role
+# can look after, and the shape of the shifts the planner hands out.
+
+STAFFING_COVERS_PER_STAFF = {
+    "Waiter": 16,
+    "Chef": 30,
+    "Manager": 150,
+}
+
+SCHEDULE_SHIFT_HOURS = 8
+
+SCHEDULE_MAX_WEEKLY_HOURS = 40
+
+
+# Live floor view
+# Floor screens follow the tables over a Server-Sent Events stream. An idle
+# stream sends a comment every TABLE_STREAM_HEARTBEAT seconds, browsers wait
+# TABLE_STREAM_RETRY milliseconds before reconnecting, the last
+# TABLE_STREAM_HISTORY changes are kept for screens that reconnect, and a
+# screen with more than TABLE_STREAM_QUEUE_SIZE unread changes is dropped.
+
+TABLE_STREAM_HEARTBEAT = 15
+
+TABLE_STREAM_RETRY = 3000
+
+TABLE_STREAM_HISTORY = 256
+
+TABLE_STREAM_QUEUE_SIZE = 256
@@ -0,0 +1,66 @@
+"""
+Helpers shared by the apps for streaming large downloads.
+
+Exports are written row by row into a ``StreamingHttpResponse`` instead of
+being rendered in one piece, so memory use stays flat however many rows a
+query returns.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = (
+    ('csv', 'CSV'),
+    ('jsonl', 'JSON Lines'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """A file-like object that hands back what is written to it, so that
+    ``csv.writer`` can format one row at a time for a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _jsonl_lines(header, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def streaming_export(filename, header, rows, file_format='csv'):
+    """Builds a download response that is produced while it is sent.
+
+    Args:
+        filename (str): Name of the download, without the extension.
+        header (list): Column names.
+        rows (iterable): Tuples in the same order as ``header``. Pass a lazy
+            iterable such as ``queryset.values_list(...).iterator()``: the
+            query then only runs once the header has gone out, and rows are
+            read from the database as the response is sent.
+        file_format (str): ``'csv'`` or ``'jsonl'``.
+
+    Returns:
+        StreamingHttpResponse: The download.
+    """
+    lines = _csv_lines if file_format == 'csv' else _jsonl_lines
+    response = StreamingHttpResponse(lines(header, rows), content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
@@ -0,0 +1,162 @@
+"""
+Changes many menu items at once.
+
+Every operation here runs in one transaction, writes with a single
+``UPDATE`` or one ``bulk_update``/``bulk_create``, and moves the menu to a
+new version exactly once, stamping every changed item with it, instead of
+saving (and invalidating the cached menu) item by item.
+"""
+import csv
+import io
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.db.models.functions import Round
+
+from .caching import bump_menu_version
+from .forms import MenuItemForm
+from .models import MenuItem
+
+MAX_PRICE = Decimal('9999.99')
+CENT = Decimal('0.01')
+CSV_COLUMNS = ('name', 'price', 'available', 'best_seller')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+class MenuImportError(ValueError):
+    """Raised when an uploaded menu file cannot be applied. ``errors``
+    lists the problems found, by line."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _items(item_ids):
+    items = MenuItem.objects.all()
+    return items if item_ids is None else items.filter(pk__in=item_ids)
+
+
+def adjust_prices(percent, item_ids=None):
+    """Raises (or, with a negative percentage, lowers) prices in one
+    ``UPDATE ... SET price = ROUND(price * factor, 2)``.
+
+    Args:
+        percent (Decimal): The change in percent, e.g. 5 for 5% more.
+        item_ids (list): The items to change; all items by default.
+
+    Returns:
+        int: The number of items changed.
+
+    Raises:
+        ValueError: If a price would drop to zero or below, or go past the
+            largest price a menu item can hold.
+    """
+    factor = 1 + Decimal(percent) / 100
+    if factor <= 0:
+        raise ValueError("Prices cannot be lowered by 100% or more.")
+    with transaction.atomic():
+        items = _items(item_ids)
+        prices = items.aggregate(lowest=Min('price'), highest=Max('price'))
+        if prices['lowest'] is not None and (prices['lowest'] * factor).quantize(CENT) <= 0:
+            raise ValueError("That would bring the cheapest item down to nothing.")
+        if prices['highest'] is not None and (prices['highest'] * factor).quantize(CENT) > MAX_PRICE:
+            raise ValueError(f"That would take the dearest item past {MAX_PRICE}.")
+        return items.update(price=Round(F('price') * factor, 2), updated_version=bump_menu_version())
+
+
+def set_availability(available, item_ids=None):
+    """Marks items available or unavailable with one ``UPDATE``.
+
+    Args:
+        available (bool): The new availability.
+        item_ids (list): The items to change; all items by default.
+
+    Returns:
+        int: The number of items changed.
+    """
+    with transaction.atomic():
+        return _items(item_ids).exclude(available=available).update(
+            available=available, updated_version=bump_menu_version(),
+        )
+
+
+def save_items(items, fields):
+    """Writes edited items back with one ``bulk_update``.
+
+    Args:
+        items (list): The changed MenuItem instances.
+        fields (list): The fields that were edited.
+
+    Returns:
+        int: The number of items saved.
+    """
+    if not items:
+        return 0
+    with transaction.atomic():
+        version = bump_menu_version()
+        for item in items:
+            item.updated_version = version
+        MenuItem.objects.bulk_update(items, [*fields, 'updated_version'], batch_size=500)
+    return len(items)
+
+
+def import_csv(upload):
+    """Adds and updates menu items from a CSV file.
+
+    The file needs a header with ``name`` and ``price`` columns, and may
+    have ``available`` and ``best_seller`` (yes/no, true/false or 1/0,
+    available by default). Items are matched to the menu by name: known
+    ones are updated with one ``bulk_update``, new ones added with one
+    ``bulk_create``. Every row is checked with :class:`MenuItemForm` first,
+    and nothing is written if any row is invalid.
+
+    Args:
+        upload (File): The uploaded CSV file.
+
+    Returns:
+        tuple: ``(added, updated)`` item counts.
+
+    Raises:
+        MenuImportError: If the file or any of its rows is invalid.
+    """
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise MenuImportError(["The file must be UTF-8 encoded CSV."])
+    reader = csv.DictReader(io.StringIO(text))
+    header = {column.strip().lower() for column in reader.fieldnames or ()}
+    if not {'name', 'price'} <= header:
+        raise MenuImportError(["The file needs a header with name and price columns."])
+
+    rows = {}
+    errors = []
+    for line, raw in enumerate(reader, start=2):
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in raw.items()}
+        data = {'name': row.get('name', ''), 'price': row.get('price', '')}
+        for flag, default in (('available', 'yes'), ('best_seller', 'no')):
+            if (row.get(flag) or default).lower() in TRUE_VALUES:
+                data[flag] = 'on'
+        form = MenuItemForm(data)
+        if not form.is_valid():
+            problems = ", ".join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+            errors.append(f"Line {line}: {problems}")
+            continue
+        rows[form.cleaned_data['name']] = form.cleaned_data
+    if errors:
+        raise MenuImportError(errors)
+
+    with transaction.atomic():
+        existing = {item.name: item for item in MenuItem.objects.select_for_update().filter(name__in=rows)}
+        version = bump_menu_version()
+        changed, added = [], []
+        for name, values in rows.items():
+            item = existing.get(name) or MenuItem(name=name)
+            for field in CSV_COLUMNS[1:]:
+                setattr(item, field, values[field])
+            item.updated_version = version
+            (changed if item.pk else added).append(item)
+        MenuItem.objects.bulk_update(changed, [*CSV_COLUMNS[1:], 'updated_version'], batch_size=500)
+        MenuItem.objects.bulk_create(added, batch_size=500)
+    return len(added), len(changed)
@@ -0,0 +1,126 @@
+"""
+Keeps the rendered menu and its JSON form in the cache between edits.
+
+Everything cached for the menu is stored under a key that includes the menu
+version, a counter kept in the database (:class:`menu.models.MenuVersion`)
+so that every server process sees the same one. Saving or deleting a menu
+item bumps the version, so the next request looks for keys nobody has
+filled yet and renders the fresh menu; the stale entries are never read
+again and simply age out. Readers therefore never need to find and delete
+old entries, even in the caches of other processes, and an unchanged menu
+is served with one primary-key lookup of the counter.
+
+Items are stamped with the version of their last change (see
+:attr:`menu.models.MenuItem.updated_version`), which lets clients fetch
+only what changed since the version they hold.
+"""
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import MenuItem, MenuVersion
+
+MENU_FIELDS = ('id', 'name', 'price', 'available', 'best_seller', 'updated_version')
+
+
+def _counter():
+    return MenuVersion.objects.filter(pk=MenuVersion.COUNTER_ID)
+
+
+def _start_counter():
+    # The row is created by the menu migrations; this only runs if it was
+    # deleted since. Starting at the newest stamp keeps old versions valid.
+    newest = MenuItem.objects.aggregate(newest=Max('updated_version'))['newest'] or 0
+    MenuVersion.objects.get_or_create(pk=MenuVersion.COUNTER_ID, defaults={'version': newest})
+
+
+def get_menu_state():
+    """Returns the current menu version and when the menu last changed, as
+    ``(version, modified)``, with one query."""
+    state = _counter().values_list('version', 'modified').first()
+    if state is None:
+        _start_counter()
+        state = _counter().values_list('version', 'modified').get()
+    return state
+
+
+def get_menu_version():
+    """Returns the current menu version."""
+    return get_menu_state()[0]
+
+
+def bump_menu_version():
+    """Moves the menu to a new version after items were added, changed or
+    removed.
+
+    The counter is moved on with one ``UPDATE``, which locks its row until
+    the surrounding transaction ends. Call this in the transaction that
+    writes the change: other processes then see the new version only once
+    the changed items are committed, and concurrent changes get one version
+    each, in the order they commit.
+
+    Returns:
+        int: The new version, to stamp the changed items with.
+    """
+    with transaction.atomic():
+        if not _counter().update(version=F('version') + 1, modified=timezone.now()):
+            _start_counter()
+            _counter().update(version=F('version') + 1, modified=timezone.now())
+        return _counter().values_list('version', flat=True).get()
+
+
+def _serialize(item_id, name, price, available, best_seller, updated_version):
+    return {
+        'id': item_id,
+        'name': name,
+        'price': str(price),  # a string, to keep the exact amount
+        'available': available,
+        'best_seller': best_seller,
+        'updated_version': updated_version,
+    }
+
+
+def menu_document(since=None, version=None):
+    """Returns the menu as a JSON document, ready to send.
+
+    The full menu is serialized once per version and kept in the cache, so
+    an unchanged menu is served without a query or any encoding. With
+    ``since``, only the items changed at or after that version are listed
+    (one indexed query), together with the ids of all items, so clients can
+    drop the ones that were removed.
+
+    Args:
+        since (int): Optionally, the menu version the client already holds.
+        version (int): The current menu version, if already read for this
+            request. It must be read before the items, so that any change
+            the document misses carries a later version than it names.
+
+    Returns:
+        bytes: A JSON object with ``version``, ``items`` (one object per
+        item, ordered by name, with ``id``, ``name``, ``price`` as a
+        string, ``available``, ``best_seller`` and ``updated_version``) and,
+        with ``since``, ``ids``.
+    """
+    if version is None:
+        version = get_menu_version()
+    if since is not None:
+        changed = MenuItem.objects.filter(updated_version__gte=since).order_by('name', 'id').values_list(*MENU_FIELDS)
+        return json.dumps({
+            'version': version,
+            'since': since,
+            'items': [_serialize(*row) for row in changed],
+            'ids': list(MenuItem.objects.order_by('id').values_list('id', flat=True)),
+        }).encode()
+
+    key = f'menu:json:{version}'
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps({
+            'version': version,
+            'items': [_serialize(*row) for row in MenuItem.objects.order_by('name', 'id').values_list(*MENU_FIELDS)],
+        }).encode()
+        cache.set(key, body, None)
+    return body
@@ -17,3 +17,45 @@ class MenuItemForm(forms.ModelForm):
     class Meta:
         model = MenuItem
         fields = ['name', 'price', 'available', 'best_seller']
+
+
+MenuItemFormSet = forms.modelformset_factory(MenuItem, form=MenuItemForm, extra=0)
+
+
+class MenuBulkActionForm(forms.Form):
+    """
+    Form for changing many menu items at once.
+
+    Fields:
+        action (str): What to do with the chosen items.
+        percent (Decimal): How much to change prices by, in percent
+            (negative to lower them). Only used to adjust prices.
+        items (QuerySet): The items to change; all items if none are chosen.
+    """
+    ACTION_CHOICES = (
+        ('adjust_prices', 'Change prices by percent'),
+        ('mark_unavailable', 'Mark unavailable'),
+        ('mark_available', 'Mark available'),
+    )
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    percent = forms.DecimalField(required=False, max_digits=5, decimal_places=2, min_value=-99, max_value=500)
+    items = forms.ModelMultipleChoiceField(
+        queryset=MenuItem.objects.order_by('name'), required=False, widget=forms.CheckboxSelectMultiple,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') == 'adjust_prices' and cleaned_data.get('percent') is None:
+            raise forms.ValidationError("Please enter the percentage to change prices by.")
+        return cleaned_data
+
+
+class MenuImportForm(forms.Form):
+    """
+    Form for uploading menu items as CSV.
+
+    Fields:
+        file (File): A CSV file with name, price and optionally available
+            and best_seller columns.
+    """
+    file = forms.FileField(label="CSV file")
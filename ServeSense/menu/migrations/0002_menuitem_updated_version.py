@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menuitem",
+            name="updated_version",
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
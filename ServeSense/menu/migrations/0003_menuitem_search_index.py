@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:20
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # an external-content FTS5 table: it indexes menu_menuitem.name without
+    # keeping a second copy of it
+    """
+    CREATE VIRTUAL TABLE menu_menuitem_fts USING fts5(
+        name, content='menu_menuitem', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    # kept in step by triggers, so bulk_create/bulk_update/update() are
+    # covered too
+    """
+    CREATE TRIGGER menu_menuitem_fts_insert AFTER INSERT ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER menu_menuitem_fts_delete AFTER DELETE ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_fts(menu_menuitem_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER menu_menuitem_fts_update AFTER UPDATE OF name ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_fts(menu_menuitem_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO menu_menuitem_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    "INSERT INTO menu_menuitem_fts(menu_menuitem_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS menu_menuitem_fts_update",
+    "DROP TRIGGER IF EXISTS menu_menuitem_fts_delete",
+    "DROP TRIGGER IF EXISTS menu_menuitem_fts_insert",
+    "DROP TABLE IF EXISTS menu_menuitem_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS menu_item_name_trgm_idx ON menu_menuitem USING gin (name gin_trgm_ops)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS menu_item_name_trgm_idx",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0002_menuitem_updated_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD}),
+            _run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:57
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def start_counter(apps, schema_editor):
+    """Starts the counter at the newest version items were stamped with,
+    so versions handed out before keep meaning what they meant."""
+    MenuItem = apps.get_model("menu", "MenuItem")
+    MenuVersion = apps.get_model("menu", "MenuVersion")
+    newest = MenuItem.objects.aggregate(newest=Max("updated_version"))["newest"] or 0
+    MenuVersion.objects.create(pk=1, version=newest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0003_menuitem_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MenuVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("modified", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(start_counter, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 class MenuItem(models.Model):
     """
@@ -9,14 +10,56 @@ class MenuItem(models.Model):
         price (Decimal): The price of the item, up to 9999.99.
         available (bool): True if the item is currently available for order.
         best_seller (bool): True if the item is a popular or recommended choice.
+        updated_version (int): The menu version at the item's last change,
+            so clients can fetch only the items changed since the version
+            they hold.
     """
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     available = models.BooleanField(default=True)
     best_seller = models.BooleanField(default=False)
+    updated_version = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        """
+        Moves the menu to a new version and stamps the item with it, in one
+        transaction, so the new version is never seen without the item.
+        """
+        from .caching import bump_menu_version
+
+        with transaction.atomic():
+            self.updated_version = bump_menu_version()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_version'}
+            super().save(*args, **kwargs)
 
     def __str__(self):
         """
         Returns a human-readable representation of the menu item.
         """
         return self.name
+
+
+class MenuVersion(models.Model):
+    """
+    The version counter of the menu: a single row, shared by every server
+    process.
+
+    Every change to the menu moves the counter on by one in the transaction
+    that makes the change, so the new version becomes visible together with
+    the items stamped with it (see menu.caching).
+
+    Attributes:
+        version (int): The current menu version.
+        modified (datetime): When the menu last changed.
+    """
+    COUNTER_ID = 1
+
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """
+        Returns a human-readable representation of the counter.
+        """
+        return f"Menu version {self.version}"
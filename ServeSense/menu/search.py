@@ -0,0 +1,194 @@
+"""
+Finds menu items by a partial or misspelt name.
+
+On SQLite the names are indexed by an FTS5 table with the trigram tokenizer
+(``menu_menuitem_fts``, created and kept in step by triggers in migration
+0003), so a search looks up the three-letter pieces of what was typed
+instead of scanning every name. Every word typed must be found in a name
+for a match, which covers prefixes and any other part of a name. When
+nothing matches, the names sharing the most pieces with the query are
+fetched from the index, closest first by bm25, and the ones similar enough
+to the query are kept, which forgives typos. Triggers rather than signals
+keep the index in step, so bulk writes, which send no signals, are covered
+too. On PostgreSQL the same is done with a ``pg_trgm`` index, filtered with
+the operators it serves (``~*`` and ``%``), and other databases fall back
+to ``icontains``.
+
+Results are ranked so available items come first, best sellers first among
+them, then names starting with the query (or, for typos, the closest
+matches), then shorter names.
+"""
+import re
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import MenuItem
+
+MAX_RESULTS = 50
+# how many of the names closest to the query are looked at for typo matches
+FUZZY_CANDIDATES = 200
+# the share of trigrams a typo match must have in common with the query; on
+# PostgreSQL the % operator applies pg_trgm.similarity_threshold (0.3 unless
+# changed) to pg_trgm's own whole-name similarity instead
+FUZZY_THRESHOLD = 0.3
+
+RESULT_FIELDS = ('id', 'name', 'price', 'available', 'best_seller')
+CENTS = Decimal('0.01')
+
+
+def normalize_query(query):
+    """Lower-cases a query and collapses its whitespace."""
+    return re.sub(r'\s+', ' ', query or '').strip().lower()
+
+
+def _word_trigrams(word):
+    # padded like pg_trgm, so the start and end of a word weigh in too
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query, name):
+    """How alike a query and a name are, from 0 to 1.
+
+    Each word of the query is compared with the closest word of the name
+    by the share of trigrams they have in common (counted from both sides,
+    as the Dice coefficient, so two swapped letters still leave "ceasar"
+    close to "caesar"), and the scores are averaged, so a misspelt word
+    still scores well against the dish it names.
+    """
+    query_words = [_word_trigrams(word) for word in query.lower().split()]
+    name_words = [_word_trigrams(word) for word in name.lower().split()]
+    if not query_words or not name_words:
+        return 0.0
+    return sum(
+        max(2 * len(word & other) / (len(word) + len(other)) for other in name_words) for word in query_words
+    ) / len(query_words)
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts_phrase(text):
+    # FTS5 strings are double-quoted, with inner quotes doubled
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _rank(rows):
+    """Orders rows of ``RESULT_FIELDS`` plus a closeness score, where lower
+    is closer."""
+    return sorted(rows, key=lambda row: (not row[3], not row[4], row[5], len(row[1]), row[0]))
+
+
+def _fuzzy_match(query):
+    """Builds an FTS5 query for names close to ``query``: any three-letter
+    piece of what was typed, the same pieces the trigram index is built
+    from. A dropped or swapped letter only spoils the pieces around it, so
+    a misspelt word still shares some with the dish it names."""
+    pieces = {word[i:i + 3] for word in query.split() for i in range(len(word) - 2)}
+    return ' OR '.join(_fts_phrase(piece) for piece in sorted(pieces))
+
+
+def _search_sqlite(query, limit):
+    words = [word for word in query.split() if len(word) >= 3]
+    if not words:
+        # too short for a trigram; left to the fallback
+        return None
+    # words too short for a trigram only narrow down what the index found
+    short_words = [word for word in query.split() if len(word) < 3]
+
+    matching = """
+        SELECT m.id, m.name, m.price, m.available, m.best_seller
+        FROM menu_menuitem_fts JOIN menu_menuitem AS m ON m.id = menu_menuitem_fts.rowid
+        WHERE menu_menuitem_fts MATCH %s {short_words}
+        ORDER BY {order}
+        LIMIT %s
+    """
+    short_words_sql = "AND lower(m.name) LIKE %s ESCAPE '\\' " * len(short_words)
+    ranked = matching.format(
+        short_words=short_words_sql,
+        order="m.available DESC, m.best_seller DESC, lower(m.name) LIKE %s ESCAPE '\\' DESC, length(m.name), m.id",
+    )
+    # bm25 puts the names sharing the most (and the rarest) pieces first, so
+    # the closest names are among the candidates however popular the rest are
+    closest = matching.format(short_words=short_words_sql, order="menu_menuitem_fts.rank")
+    short_params = [f"%{_escape_like(word)}%" for word in short_words]
+    prefix = _escape_like(query) + '%'
+    with connection.cursor() as cursor:
+        cursor.execute(ranked, [' '.join(_fts_phrase(word) for word in words), *short_params, prefix, limit])
+        rows = cursor.fetchall()
+        if rows:
+            return rows
+        # nothing contains what was typed: look for names that nearly do
+        cursor.execute(closest, [_fuzzy_match(' '.join(words)), *short_params, FUZZY_CANDIDATES])
+        candidates = cursor.fetchall()
+
+    close = []
+    for row in candidates:
+        score = similarity(query, row[1])
+        if score >= FUZZY_THRESHOLD:
+            close.append((*row, -score))
+    return _rank(close)[:limit]
+
+
+def _search_postgresql(query, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    # both operators are served by the gin_trgm_ops index; icontains
+    # (UPPER(name) LIKE) and a similarity comparison would scan every row,
+    # so the similarity is only worked out for the rows found
+    items = (
+        MenuItem.objects.filter(Q(name__iregex=re.escape(query)) | Q(name__trigram_similar=query))
+        .annotate(closeness=TrigramSimilarity('name', query))
+        .annotate(prefix=Case(When(name__istartswith=query, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        .order_by('-available', '-best_seller', '-prefix', '-closeness', 'id')
+    )
+    return [(*row[:-1], -row[-1]) for row in items.values_list(*RESULT_FIELDS, 'closeness')[:limit]]
+
+
+def _search_fallback(query, limit):
+    if len(query) < 3:
+        # the start of any word
+        matches = Q(name__istartswith=query) | Q(name__icontains=f' {query}')
+    else:
+        matches = Q(name__icontains=query)
+    rows = MenuItem.objects.filter(matches).order_by('-available', '-best_seller', 'name', 'id')
+    return list(rows.values_list(*RESULT_FIELDS)[:limit])
+
+
+def search_menu(query, limit=20):
+    """Searches the menu by name.
+
+    Args:
+        query (str): What was typed; any part of a name, possibly misspelt.
+        limit (int): The most results to return, up to ``MAX_RESULTS``.
+
+    Returns:
+        list: Up to ``limit`` dicts with ``id``, ``name``, ``price`` (a
+        string), ``available`` and ``best_seller``, best match first.
+    """
+    query = normalize_query(query)
+    limit = max(1, min(limit, MAX_RESULTS))
+    if not query:
+        return []
+
+    rows = None
+    if connection.vendor == 'sqlite':
+        rows = _search_sqlite(query, limit)
+    elif connection.vendor == 'postgresql':
+        rows = _search_postgresql(query, limit)
+    if rows is None:
+        rows = _search_fallback(query, limit)
+    return [
+        {
+            'id': item_id,
+            'name': name,
+            # raw SQLite rows hold the price as a float
+            'price': str(Decimal(str(price)).quantize(CENTS)),
+            'available': bool(available),
+            'best_seller': bool(best_seller),
+        }
+        for item_id, name, price, available, best_seller, *_ in rows
+    ]
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .caching import bump_menu_version
+from .models import MenuItem
+
+# Saving an item bumps the version itself (see MenuItem.save), since it
+# stamps the item with the new version.
+
+
+@receiver(post_delete, sender=MenuItem)
+def menu_item_deleted(sender, instance, **kwargs):
+    """Moves the menu to a new version when an item is removed."""
+    bump_menu_version()
@@ -1,7 +1,17 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from .models import MenuItem
+from .bulk import adjust_prices
+from .caching import get_menu_version
+from .models import MenuItem, MenuVersion
+from .search import search_menu
 from decimal import Decimal
+import itertools
+import statistics
+import time
 
 class MenuItemModelTest(TestCase):
     """
@@ -54,3 +64,405 @@ class MenuViewsTest(TestCase):
         response = self.client.get(reverse('menu_list'))  # corrected name to match typical URL
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Burger")
+
+
+class MenuCacheTest(TestCase):
+    """
+    Test suite for the cached menu.
+
+    Ensures that an unchanged menu is served with only the version lookup
+    and that every edit shows up on the next request, in every process.
+    """
+
+    def setUp(self):
+        """
+        Empty the cache, which outlives the rolled-back test transactions,
+        and create two menu items.
+        """
+        cache.clear()
+        self.burger = MenuItem.objects.create(name="Burger", price=5.99)
+        self.soup = MenuItem.objects.create(name="Soup", price=3.50)
+
+    def test_unchanged_menu_only_reads_the_version(self):
+        """
+        Test that once rendered, the menu list and the JSON menu are served
+        from the cache, with no query but the lookup of the version.
+        """
+        self.client.get(reverse('menu_list'))
+        self.client.get(reverse('menu_json'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('menu_list'))
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('menu_json')).json()
+        self.assertEqual([item['name'] for item in data['items']], ["Burger", "Soup"])
+        self.assertEqual(data['items'][1]['price'], "3.50")
+
+    def test_edits_show_up_immediately(self):
+        """
+        Test that adding, editing and deleting items shows up on the next
+        request for both forms of the menu.
+        """
+        self.client.get(reverse('menu_list'))
+        self.client.get(reverse('menu_json'))
+
+        self.client.post(reverse('menu_edit', args=[self.burger.pk]), {
+            'name': "Cheeseburger", 'price': "6.49", 'available': "on",
+        })
+        self.assertContains(self.client.get(reverse('menu_list')), "Cheeseburger")
+        self.assertEqual(self.client.get(reverse('menu_json')).json()['items'][0]['price'], "6.49")
+
+        self.client.post(reverse('menu_list'), {'name': "Fries", 'price': "2.00"})
+        self.assertContains(self.client.get(reverse('menu_list')), "Fries")
+
+        self.client.get(reverse('menu_delete', args=[self.soup.pk]))
+        self.assertNotContains(self.client.get(reverse('menu_list')), "Soup")
+        self.assertNotIn("Soup", [item['name'] for item in self.client.get(reverse('menu_json')).json()['items']])
+
+    def test_version_is_shared_between_processes(self):
+        """
+        Test that the version does not live in the cache: a process with an
+        empty cache sees the same version, and an edit made by another
+        process, which only bumps the shared counter, shows up in the menu
+        this one has cached.
+        """
+        self.client.get(reverse('menu_list'))
+        version = get_menu_version()
+        cache.clear()
+        self.assertEqual(get_menu_version(), version)
+
+        self.client.get(reverse('menu_list'))
+        # saving writes nothing to the cache, as if another process saved
+        self.soup.name = "Stew"
+        self.soup.save()
+        self.assertGreater(get_menu_version(), version)
+        self.assertContains(self.client.get(reverse('menu_list')), "Stew")
+
+    def test_lost_counter_restarts_past_the_stamps(self):
+        """
+        Test that if the counter row goes missing, it starts again from the
+        newest version items were stamped with, not from zero.
+        """
+        MenuVersion.objects.all().delete()
+        self.assertEqual(get_menu_version(), self.soup.updated_version)
+        self.burger.save()
+        self.assertEqual(self.burger.updated_version, self.soup.updated_version + 1)
+
+
+class MenuApiTest(TestCase):
+    """
+    Test suite for the JSON menu API.
+
+    Ensures that unchanged polls get 304 Not Modified from the version alone and
+    that clients can fetch only the items changed since their version.
+    """
+
+    def setUp(self):
+        """
+        Empty the cache and create two menu items.
+        """
+        cache.clear()
+        self.burger = MenuItem.objects.create(name="Burger", price=5.99)
+        self.soup = MenuItem.objects.create(name="Soup", price=3.50, best_seller=True)
+
+    def test_unchanged_poll_gets_304_without_queries(self):
+        """
+        Test that the response carries a strong ETag and a Last-Modified
+        time, and that sending either back gets 304 without serializing.
+        """
+        response = self.client.get(reverse('menu_json'))
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response.json()['items'][1], {
+            'id': self.soup.pk, 'name': "Soup", 'price': "3.50", 'available': True,
+            'best_seller': True, 'updated_version': self.soup.updated_version,
+        })
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('menu_json'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(reverse('menu_json'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        """
+        Test that after an edit the old ETag no longer matches and the new
+        menu is sent.
+        """
+        etag = self.client.get(reverse('menu_json'))['ETag']
+        self.burger.price = Decimal('6.49')
+        self.burger.save(update_fields=['price'])
+        response = self.client.get(reverse('menu_json'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['items'][0]['price'], "6.49")
+
+    def test_changes_since_a_version(self):
+        """
+        Test that ?since= lists only the items changed at or after that
+        version, and the ids of all items so removed ones can be dropped.
+        """
+        version = self.client.get(reverse('menu_json')).json()['version']
+        self.burger.price = Decimal('6.49')
+        self.burger.save(update_fields=['price'])
+        fries = MenuItem.objects.create(name="Fries", price=2)
+        self.soup.delete()
+
+        data = self.client.get(reverse('menu_json'), {'since': version}).json()
+        self.assertGreater(data['version'], version)
+        self.assertEqual([item['name'] for item in data['items']], ["Burger", "Fries"])
+        self.assertEqual(data['ids'], [self.burger.pk, fries.pk])
+
+        self.assertEqual(self.client.get(reverse('menu_json'), {'since': 'yesterday'}).status_code, 400)
+
+    def test_every_process_hands_out_the_same_versions(self):
+        """
+        Test that the ETag and version do not depend on which process
+        answers, and that a version from any of them, used with ?since=,
+        never skips a change made through another.
+        """
+        first = self.client.get(reverse('menu_json'))
+        cache.clear()  # a process started later, with an empty cache
+        second = self.client.get(reverse('menu_json'))
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(first.json()['version'], second.json()['version'])
+
+        version = second.json()['version']
+        cache.clear()
+        self.soup.price = Decimal('3.75')
+        self.soup.save()
+        data = self.client.get(reverse('menu_json'), {'since': version + 1}).json()
+        self.assertEqual([item['name'] for item in data['items']], ["Soup"])
+        self.assertEqual(data['version'], version + 1)
+
+
+class MenuBulkEditTest(TestCase):
+    """
+    Test suite for bulk menu editing.
+
+    Ensures that grid edits, bulk price and availability changes and CSV
+    uploads each write in one statement and move the menu version once.
+    """
+
+    def setUp(self):
+        """
+        Empty the cache and create three menu items.
+        """
+        cache.clear()
+        self.burger = MenuItem.objects.create(name="Burger", price=Decimal('5.99'))
+        self.fries = MenuItem.objects.create(name="Fries", price=Decimal('2.00'))
+        self.soup = MenuItem.objects.create(name="Soup", price=Decimal('3.50'))
+
+    def test_grid_saves_only_changed_items(self):
+        """
+        Test that submitting the grid writes the changed items with one
+        bulk update and stamps them with one new version.
+        """
+        data = {'form-TOTAL_FORMS': '3', 'form-INITIAL_FORMS': '3'}
+        for index, item in enumerate([self.burger, self.fries, self.soup]):
+            data.update({
+                f'form-{index}-id': item.pk, f'form-{index}-name': item.name,
+                f'form-{index}-price': item.price, f'form-{index}-available': 'on',
+            })
+        data['form-1-price'] = '2.25'
+        data['form-2-best_seller'] = 'on'
+        version = get_menu_version()
+
+        response = self.client.post(reverse('menu_bulk_edit'), data)
+        self.assertRedirects(response, reverse('menu_bulk_edit'))
+        self.fries.refresh_from_db()
+        self.soup.refresh_from_db()
+        self.burger.refresh_from_db()
+        self.assertEqual(self.fries.price, Decimal('2.25'))
+        self.assertTrue(self.soup.best_seller)
+        self.assertEqual(self.fries.updated_version, self.soup.updated_version)
+        self.assertGreater(self.fries.updated_version, version)
+        self.assertLessEqual(self.burger.updated_version, version)
+
+    def test_price_change_is_one_update(self):
+        """
+        Test that raising prices by a percentage runs one UPDATE of the
+        items (besides moving the version counter), rounds to cents and refuses prices past the largest one allowed.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('menu_bulk_action'), {'action': 'adjust_prices', 'percent': '5'})
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "menu_menuitem"')]), 1)
+        self.assertEqual(
+            list(MenuItem.objects.order_by('name').values_list('price', flat=True)),
+            [Decimal('6.29'), Decimal('2.10'), Decimal('3.68')],
+        )
+        self.assertContains(self.client.get(reverse('menu_list')), "6.29")
+
+        self.client.post(reverse('menu_bulk_action'), {
+            'action': 'adjust_prices', 'percent': '-10', 'items': [self.fries.pk],
+        })
+        self.fries.refresh_from_db()
+        self.assertEqual(self.fries.price, Decimal('1.89'))
+
+        MenuItem.objects.filter(pk=self.soup.pk).update(price=Decimal('9000'))
+        response = self.client.post(reverse('menu_bulk_action'), {'action': 'adjust_prices', 'percent': '20'}, follow=True)
+        self.assertContains(response, "past 9999.99")
+        self.assertEqual(MenuItem.objects.get(pk=self.soup.pk).price, Decimal('9000'))
+
+    def test_price_cut_cannot_reach_zero(self):
+        """
+        Test that a cut which would round the cheapest price down to 0.00 is
+        refused and changes nothing.
+        """
+        MenuItem.objects.filter(pk=self.fries.pk).update(price=Decimal('0.40'))
+        with self.assertRaisesMessage(ValueError, "down to nothing"):
+            adjust_prices(-99)
+        response = self.client.post(reverse('menu_bulk_action'), {'action': 'adjust_prices', 'percent': '-99'}, follow=True)
+        self.assertContains(response, "down to nothing")
+        self.assertEqual(MenuItem.objects.get(pk=self.fries.pk).price, Decimal('0.40'))
+        self.assertEqual(adjust_prices(-50, [self.fries.pk]), 1)
+        self.assertEqual(MenuItem.objects.get(pk=self.fries.pk).price, Decimal('0.20'))
+
+    def test_mark_selected_items_unavailable_and_reset(self):
+        """
+        Test marking chosen items unavailable, then the whole menu available
+        again, and that the cached menu shows each change.
+        """
+        self.client.get(reverse('menu_json'))
+        self.client.post(reverse('menu_bulk_action'), {
+            'action': 'mark_unavailable', 'items': [self.burger.pk, self.soup.pk],
+        })
+        items = self.client.get(reverse('menu_json')).json()['items']
+        self.assertEqual([item['available'] for item in items], [False, True, False])
+
+        self.client.post(reverse('menu_bulk_action'), {'action': 'mark_available'})
+        self.assertEqual(MenuItem.objects.filter(available=True).count(), 3)
+
+    def test_csv_upload_adds_and_updates_by_name(self):
+        """
+        Test that a CSV upload updates known items, adds new ones, and
+        writes nothing if any row is invalid.
+        """
+        upload = SimpleUploadedFile('menu.csv', (
+            b"name,price,available,best_seller\n"
+            b"Burger,6.50,yes,yes\n"
+            b"Salad,4.25,no,\n"
+        ))
+        response = self.client.post(reverse('menu_import'), {'file': upload}, follow=True)
+        self.assertContains(response, "Added 1 and updated 1 item(s).")
+        self.burger.refresh_from_db()
+        self.assertEqual((self.burger.price, self.burger.best_seller), (Decimal('6.50'), True))
+        salad = MenuItem.objects.get(name="Salad")
+        self.assertFalse(salad.available)
+        self.assertEqual(salad.updated_version, self.burger.updated_version)
+
+        upload = SimpleUploadedFile('menu.csv', b"name,price\nFries,1.00\nSoup,cheap\n")
+        response = self.client.post(reverse('menu_import'), {'file': upload}, follow=True)
+        self.assertContains(response, "Line 3")
+        self.assertEqual(MenuItem.objects.get(pk=self.fries.pk).price, Decimal('2.00'))
+
+
+class MenuSearchTest(TestCase):
+    """
+    Test suite for menu search.
+
+    Ensures that partial and misspelt names are found through the index,
+    ranked with available best sellers first, and that the index follows
+    every kind of write.
+    """
+
+    def setUp(self):
+        """
+        Create a few menu items with overlapping names.
+        """
+        MenuItem.objects.create(name="Margherita Pizza", price=9, best_seller=True)
+        MenuItem.objects.create(name="Pepperoni Pizza", price=11)
+        MenuItem.objects.create(name="Pizza Bianca", price=10, best_seller=True, available=False)
+        MenuItem.objects.create(name="Caesar Salad", price=7)
+
+    def names(self, query, **kwargs):
+        return [item['name'] for item in search_menu(query, **kwargs)]
+
+    def test_partial_names_ranked_with_available_best_sellers_first(self):
+        """
+        Test that any part of a name matches, and that available best
+        sellers come first and unavailable items last.
+        """
+        self.assertEqual(self.names("pizz"), ["Margherita Pizza", "Pepperoni Pizza", "Pizza Bianca"])
+        self.assertEqual(self.names("PEPP"), ["Pepperoni Pizza"])
+        self.assertEqual(self.names("sal"), ["Caesar Salad"])
+        self.assertEqual(self.names("pi"), ["Margherita Pizza", "Pepperoni Pizza", "Pizza Bianca"])
+        self.assertEqual(self.names(""), [])
+
+    def test_typos_are_forgiven(self):
+        """
+        Test that a misspelt name still finds the dish.
+        """
+        self.assertEqual(self.names("margarita")[0], "Margherita Pizza")
+        self.assertEqual(self.names("peperoni")[0], "Pepperoni Pizza")
+        self.assertEqual(self.names("sushi"), [])
+
+    def test_dropped_and_swapped_letters_are_forgiven(self):
+        """
+        Test that a word missing a letter or with two letters swapped still
+        finds the dish, and that many popular names sharing a piece of the
+        query do not crowd out the closest one.
+        """
+        MenuItem.objects.create(name="Chicken Tikka", price=12)
+        self.assertEqual(self.names("chiken"), ["Chicken Tikka"])
+        self.assertEqual(self.names("ceasar"), ["Caesar Salad"])
+
+        MenuItem.objects.bulk_create(
+            MenuItem(name=f"Rita's Special {number}", price=8, best_seller=True) for number in range(250)
+        )
+        self.assertIn("Margherita Pizza", self.names("margarita", limit=50))
+
+    def test_index_follows_bulk_writes(self):
+        """
+        Test that the index follows renames, deletions and bulk writes,
+        which send no signals.
+        """
+        MenuItem.objects.filter(name="Caesar Salad").update(name="Greek Salad")
+        MenuItem.objects.bulk_create([MenuItem(name="Garlic Bread", price=4)])
+        MenuItem.objects.filter(name="Pepperoni Pizza").delete()
+        self.assertEqual(self.names("salad"), ["Greek Salad"])
+        self.assertEqual(self.names("garlic"), ["Garlic Bread"])
+        self.assertNotIn("Pepperoni Pizza", self.names("pizza"))
+
+    def test_search_view(self):
+        """
+        Test the JSON search endpoint and its limit.
+        """
+        response = self.client.get(reverse('menu_search'), {'q': "pizza", 'limit': 1})
+        self.assertEqual(response.json()['items'], [{
+            'id': MenuItem.objects.get(name="Margherita Pizza").pk, 'name': "Margherita Pizza",
+            'price': "9.00", 'available': True, 'best_seller': True,
+        }])
+        self.assertEqual(self.client.get(reverse('menu_search'), {'q': "pizza", 'limit': "x"}).status_code, 400)
+
+    def test_large_catalog_search_is_fast(self):
+        """
+        Test that the median search over 30,000 items stays within a few
+        milliseconds.
+        """
+        dishes = [
+            "Pizza", "Burger", "Salad", "Soup", "Curry", "Noodles", "Risotto", "Taco", "Wrap", "Steak",
+            "Lasagne", "Ramen", "Burrito", "Falafel", "Paella", "Gnocchi", "Dumplings", "Kebab", "Omelette", "Pancakes",
+        ]
+        styles = [
+            "Margherita", "Spicy", "Smoked", "Garden", "Classic", "Thai", "Truffle", "Cajun", "Greek", "Lemon",
+            "Chilli", "Garlic", "Mushroom", "Chicken", "Beef", "Vegan", "Seafood", "Korean", "Mexican", "Tuscan",
+        ]
+        locations = ["Downtown", "Harbour", "Airport", "Riverside", "Mall", "Station", "Campus", "Uptown"]
+        MenuItem.objects.bulk_create(
+            MenuItem(
+                name=f"{style} {dish} ({location} {number})", price=5 + number % 20,
+                best_seller=number % 50 == 0, available=number % 7 != 0,
+            )
+            for number, (location, style, dish) in zip(
+                range(30000), itertools.cycle(itertools.product(locations, styles, dishes)),
+            )
+        )
+        queries = ["pizz", "smoked cu", "truffle risotto", "cajn", "lemon soup", "tha", "burgr", "gnochi", "harbour ramen"]
+        timings = []
+        for query in queries * 5:
+            started = time.perf_counter()
+            results = search_menu(query)
+            timings.append(time.perf_counter() - started)
+            self.assertTrue(results, query)
+        self.assertLess(statistics.median(timings), 0.005)
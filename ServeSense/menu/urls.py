@@ -10,9 +10,19 @@ Routes:
     '' (menu_list): Displays all menu items and handles adding a new item.
     'edit/<int:pk>/' (menu_edit): Edit an existing menu item by its primary key.
     'delete/<int:pk>/' (menu_delete): Delete a menu item by its primary key.
+    'json/' (menu_json): The menu as JSON, with conditional GET support.
+    'bulk/' (menu_bulk_edit): Edit many menu items in one grid.
+    'bulk/action/' (menu_bulk_action): Change prices or availability of many items.
+    'bulk/import/' (menu_import): Add and update items from a CSV file.
+    'search/' (menu_search): Search the menu by name.
 """
 urlpatterns = [
     path('', views.menu_list, name='menu_list'),
     path('edit/<int:pk>/', views.menu_edit, name='menu_edit'),
     path('delete/<int:pk>/', views.menu_delete, name='menu_delete'),
+    path('json/', views.menu_json, name='menu_json'),
+    path('bulk/', views.menu_bulk_edit, name='menu_bulk_edit'),
+    path('bulk/action/', views.menu_bulk_action, name='menu_bulk_action'),
+    path('bulk/import/', views.menu_import, name='menu_import'),
+    path('search/', views.menu_search, name='menu_search'),
 ]
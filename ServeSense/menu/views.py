@@ -1,6 +1,13 @@
+from django.contrib import messages
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from .bulk import MenuImportError, adjust_prices, import_csv, save_items, set_availability
+from .caching import get_menu_state, get_menu_version, menu_document
 from .models import MenuItem
-from .forms import MenuItemForm
+from .search import MAX_RESULTS, search_menu
+from .forms import MenuBulkActionForm, MenuImportForm, MenuItemForm, MenuItemFormSet
 
 def menu_list(request):
     """
@@ -8,6 +15,8 @@ def menu_list(request):
 
     This view fetches all existing MenuItem records and displays them in a list.
     It also processes the form submission for adding a new menu item.
+    The rendered list is cached under the current menu version (see
+    menu.caching), so the items are only queried again after an edit.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -15,7 +24,7 @@ def menu_list(request):
     Returns:
         HttpResponse: Renders 'menu/menu_list.html' with menu items and add form.
     """
-    menu_items = MenuItem.objects.all()
+    menu_items = MenuItem.objects.all()  # lazy: only evaluated if the cached list is stale
 
     # Handle add form submission
     if request.method == 'POST':
@@ -26,7 +35,58 @@ def menu_list(request):
     else:
         form = MenuItemForm()
 
-    return render(request, 'menu_list.html', {'menu_items': menu_items, 'form': form})
+    context = {
+        'menu_items': menu_items,
+        'menu_version': get_menu_version(),
+        'form': form,
+    }
+    return render(request, 'menu_list.html', context)
+
+
+def _menu_state(request):
+    # read once per request, so the ETag, Last-Modified and body agree
+    if not hasattr(request, '_menu_state'):
+        request._menu_state = get_menu_state()
+    return request._menu_state
+
+
+def _menu_etag(request):
+    return f"menu-{_menu_state(request)[0]}"
+
+
+def _menu_last_modified(request):
+    return _menu_state(request)[1]
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=_menu_etag, last_modified_func=_menu_last_modified)
+def menu_json(request):
+    """
+    Return the menu as JSON for POS tablets and online ordering.
+
+    Responses carry a strong ETag made from the menu version and a
+    Last-Modified time, both read from the menu's version counter in the
+    database once per request, so every server process answers with the
+    same ones and they always match the body. A client
+    that sends them back with If-None-Match or If-Modified-Since gets 304
+    Not Modified while the menu is unchanged, without any serializing. The
+    full menu is serialized once per version and cached; with
+    ``?since=<version>`` only the items changed since that version are sent,
+    along with the ids of all items (see menu.caching.menu_document).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The menu as JSON, 304 when unchanged, or 400 if
+        ``since`` is not a version number.
+    """
+    since = request.GET.get('since')
+    if since is not None:
+        if not since.isdigit():
+            return JsonResponse({'error': "since must be a menu version number."}, status=400)
+        since = int(since)
+    return HttpResponse(menu_document(since, _menu_state(request)[0]), content_type='application/json')
 
 
 def menu_edit(request, pk):
@@ -72,3 +132,128 @@ def menu_delete(request, pk):
     item = get_object_or_404(MenuItem, pk=pk)
     item.delete()
     return redirect('menu_list')
+
+
+def menu_bulk_edit(request):
+    """
+    Edit many menu items on one page.
+
+    Shows every item as a row of an editable grid, next to the forms for
+    changing prices or availability in bulk and for uploading a CSV file.
+    When the grid is submitted, only the items that were changed are
+    written, with one bulk update in one transaction (see menu.bulk).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Renders 'menu_bulk_edit.html', or redirects back
+        after saving.
+    """
+    queryset = MenuItem.objects.order_by('name', 'id')
+    if request.method == 'POST':
+        formset = MenuItemFormSet(request.POST, queryset=queryset)
+        if formset.is_valid():
+            changed = [form for form in formset.forms if form.has_changed()]
+            fields = sorted({field for form in changed for field in form.changed_data})
+            saved = save_items([form.save(commit=False) for form in changed], fields)
+            messages.success(request, f"Saved {saved} item(s).")
+            return redirect('menu_bulk_edit')
+    else:
+        formset = MenuItemFormSet(queryset=queryset)
+
+    context = {
+        'formset': formset,
+        'action_form': MenuBulkActionForm(),
+        'import_form': MenuImportForm(),
+    }
+    return render(request, 'menu_bulk_edit.html', context)
+
+
+@require_POST
+def menu_bulk_action(request):
+    """
+    Change the price or availability of many menu items at once.
+
+    Prices are changed by a percentage, and items marked available or
+    unavailable, each with a single UPDATE in one transaction. Without a
+    selection the whole menu is changed, e.g. for the nightly availability
+    reset.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponseRedirect: Redirects back to the 'menu_bulk_edit' view.
+    """
+    form = MenuBulkActionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect('menu_bulk_edit')
+
+    action = form.cleaned_data['action']
+    item_ids = [item.pk for item in form.cleaned_data['items']] or None
+    if action == 'adjust_prices':
+        try:
+            changed = adjust_prices(form.cleaned_data['percent'], item_ids)
+        except ValueError as error:
+            messages.error(request, str(error))
+            return redirect('menu_bulk_edit')
+        messages.success(request, f"Changed the price of {changed} item(s).")
+    else:
+        changed = set_availability(action == 'mark_available', item_ids)
+        messages.success(request, f"Updated the availability of {changed} item(s).")
+    return redirect('menu_bulk_edit')
+
+
+@require_POST
+def menu_import(request):
+    """
+    Add and update menu items from an uploaded CSV file.
+
+    Items are matched by name; nothing is written unless every row is
+    valid (see menu.bulk.import_csv).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponseRedirect: Redirects back to the 'menu_bulk_edit' view.
+    """
+    form = MenuImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        messages.error(request, "Please choose a CSV file to upload.")
+        return redirect('menu_bulk_edit')
+    try:
+        added, updated = import_csv(form.cleaned_data['file'])
+    except MenuImportError as error:
+        for problem in error.errors:
+            messages.error(request, problem)
+    else:
+        messages.success(request, f"Added {added} and updated {updated} item(s).")
+    return redirect('menu_bulk_edit')
+
+
+def menu_search(request):
+    """
+    Search the menu by name for staff taking phone orders.
+
+    ``?q=`` may be any part of a dish name, and may be misspelt; ``?limit=``
+    caps the number of results (20 by default). The search uses an index
+    rather than scanning every item (see menu.search), and available best
+    sellers are listed first.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The query and the matching items, or 400 if ``limit``
+        is not a number.
+    """
+    query = request.GET.get('q', '')
+    limit = request.GET.get('limit', '20')
+    if not limit.isdigit():
+        return JsonResponse({'error': "limit must be a number."}, status=400)
+    return JsonResponse({'query': query, 'items': search_menu(query, min(int(limit), MAX_RESULTS))})
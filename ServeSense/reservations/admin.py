@@ -2,9 +2,10 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import Customer, Table, Reservation 
+from .models import Customer, Table, Reservation, WaitlistEntry
 
 
 admin.site.register(Customer)
 admin.site.register(Table)
-admin.site.register(Reservation)
\ No newline at end of file
+admin.site.register(Reservation)
+admin.site.register(WaitlistEntry)
@@ -0,0 +1,226 @@
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+
+from .combinations import best_combination
+from .intervals import get_day_index, to_minutes
+from .models import Reservation, Table, default_duration
+
+# How often a booking is retried when it loses a race for a table, and how
+# long to wait between retries when the database itself is busy.
+MAX_BOOKING_ATTEMPTS = 5
+BUSY_RETRY_DELAY = 0.05
+
+
+def is_table_free(table, reservation_date, reservation_time, duration, exclude=None, refresh=False):
+    """Checks whether a table is free for a whole booking.
+
+    Args:
+        table (Table): The table to check.
+        reservation_date (date): The requested date.
+        reservation_time (time): The requested start time.
+        duration (int): How long the party keeps the table, in minutes.
+        exclude (int): Optional id of a reservation to ignore, so an edited
+            booking does not clash with itself.
+        refresh (bool): Reload the day's bookings instead of trusting the
+            cached index.
+
+    Returns:
+        bool: True if no other active booking overlaps the requested time.
+    """
+    start = to_minutes(reservation_time)
+    index = get_day_index(reservation_date, refresh=refresh)
+    return index.is_free(table.pk, start, start + duration, exclude)
+
+
+def find_available_table(
+    number_of_guests, reservation_date, reservation_time, duration=None, exclude=None, refresh=False, skip=(),
+):
+    """Picks the best free table for a party.
+
+    Candidate tables are fetched with one query, smallest first, and each one
+    is checked against the day's interval index (see
+    :mod:`reservations.intervals`), which is loaded with one more query the
+    first time the day is looked at. The cost therefore does not grow with the
+    number of tables on the floor. A table is free only if no active booking
+    overlaps the whole stay, not just the start time.
+
+    The smallest table that seats the party is chosen (best fit), so large
+    tables stay free for large parties. Ties are broken by table number to
+    keep the choice stable.
+
+    Args:
+        number_of_guests (int): The size of the party.
+        reservation_date (date): The requested date.
+        reservation_time (time): The requested start time.
+        duration (int): Minutes the party keeps the table. Defaults to the
+            usual time for the party size.
+        exclude (int): Optional id of a reservation to ignore, used when an
+            existing booking is being moved.
+        refresh (bool): Reload the day's bookings instead of trusting the
+            cached index.
+        skip (set): Ids of tables that must not be offered.
+
+    Returns:
+        Table: The chosen table, or None if nothing is free.
+    """
+    duration = duration or default_duration(number_of_guests)
+    start = to_minutes(reservation_time)
+    index = get_day_index(reservation_date, refresh=refresh)
+
+    candidates = (
+        Table.objects.filter(capacity__gte=number_of_guests)
+        .exclude(pk__in=skip)
+        .order_by('capacity', 'tableNumber')
+    )
+    for table in candidates:
+        if index.is_free(table.pk, start, start + duration, exclude):
+            return table
+    return None
+
+
+def find_table_combination(
+    number_of_guests, reservation_date, reservation_time, duration=None, exclude=None, refresh=False, skip=(),
+):
+    """Picks adjacent free tables to push together for a large party.
+
+    The tables that have a section are fetched with one query and checked
+    against the day's interval index; the free ones are handed to
+    :func:`reservations.combinations.best_combination`, which finds the
+    combination within one section that wastes the fewest seats, using as
+    few tables as possible.
+
+    Args:
+        number_of_guests (int): The size of the party.
+        reservation_date (date): The requested date.
+        reservation_time (time): The requested start time.
+        duration (int): Minutes the party keeps the tables. Defaults to the
+            usual time for the party size.
+        exclude (int): Optional id of a reservation to ignore.
+        refresh (bool): Reload the day's bookings instead of trusting the
+            cached index.
+        skip (set): Ids of tables that must not be offered.
+
+    Returns:
+        list: The chosen tables, largest first, or an empty list.
+    """
+    duration = duration or default_duration(number_of_guests)
+    start = to_minutes(reservation_time)
+    index = get_day_index(reservation_date, refresh=refresh)
+
+    tables = {
+        table.pk: table
+        for table in Table.objects.exclude(section='').exclude(pk__in=skip)
+        if index.is_free(table.pk, start, start + duration, exclude)
+    }
+    chosen = best_combination(
+        ((table.pk, table.capacity, table.section) for table in tables.values()),
+        number_of_guests,
+    )
+    return [tables[table_id] for table_id in chosen]
+
+
+def find_tables(
+    number_of_guests, reservation_date, reservation_time, duration=None, exclude=None, refresh=False, skip=(),
+):
+    """Picks the tables for a party: one table if any fits, otherwise the
+    best combination of adjacent tables (see :func:`find_available_table`
+    and :func:`find_table_combination`, which take the same arguments).
+
+    Returns:
+        list: The chosen tables, the one to book the party on first, or an
+        empty list if nothing is free.
+    """
+    arguments = (number_of_guests, reservation_date, reservation_time, duration, exclude, refresh, skip)
+    table = find_available_table(*arguments)
+    if table is not None:
+        return [table]
+    return find_table_combination(*arguments)
+
+
+def book_table(customer, number_of_guests, reservation_date, reservation_time, duration=None):
+    """Allocates a table and creates the reservation without double-booking.
+
+    The check and the insert run in one transaction. The tables are picked
+    with the cached interval index of the day, then the chosen table rows
+    are locked with ``SELECT ... FOR UPDATE`` and the day's bookings are
+    re-read once, after the lock is held, so two hosts booking at the same
+    moment cannot both take it (on SQLite the whole transaction holds the write lock instead,
+    see ``transaction_mode`` in the settings). A unique constraint on table,
+    date and time for active bookings backs this up in the database.
+
+    The cache is only cleared by changes made in this process, so when it
+    shows nothing free the search is repeated on a fresh read of the day
+    before giving up; a booking cancelled through another server process
+    then frees its table here too.
+
+    If the chosen table turns out to be taken, the booking is retried on the
+    next best table, up to ``MAX_BOOKING_ATTEMPTS`` times. If the database
+    is too busy to take the lock, the attempt is retried after a short wait.
+
+    Args:
+        customer (Customer): Who the booking is for.
+        number_of_guests (int): The size of the party.
+        reservation_date (date): The requested date.
+        reservation_time (time): The requested start time.
+        duration (int): Minutes the party keeps the table. Defaults to the
+            usual time for the party size.
+
+    Returns:
+        Reservation: The new booking, or None if no table could be booked.
+
+    Raises:
+        OperationalError: If the database was still busy on the last
+            attempt, so it is unknown whether a table was free.
+    """
+    duration = duration or default_duration(number_of_guests)
+    lost_tables = set()
+    busy = None
+    for attempt in range(MAX_BOOKING_ATTEMPTS):
+        tables = []
+        busy = None
+        try:
+            with transaction.atomic():
+                tables = find_tables(
+                    number_of_guests, reservation_date, reservation_time, duration, skip=lost_tables,
+                )
+                if not tables:
+                    # the cache only hears about changes made in this process,
+                    # so check the database before turning the party away
+                    tables = find_tables(
+                        number_of_guests, reservation_date, reservation_time, duration,
+                        refresh=True, skip=lost_tables,
+                    )
+                if not tables:
+                    return None
+                # lock in id order so two combined bookings cannot deadlock
+                locked = Table.objects.select_for_update().filter(pk__in=[table.pk for table in tables])
+                list(locked.order_by('pk'))
+                index = get_day_index(reservation_date, refresh=True)
+                start = to_minutes(reservation_time)
+                taken = {table.pk for table in tables if not index.is_free(table.pk, start, start + duration)}
+                if taken:
+                    lost_tables |= taken
+                    continue
+                reservation = Reservation.objects.create(
+                    customer=customer,
+                    table=tables[0],
+                    numberOfGuests=number_of_guests,
+                    reservationDate=reservation_date,
+                    reservationTime=reservation_time,
+                    duration=duration,
+                )
+                if len(tables) > 1:
+                    reservation.linkedTables.set(tables[1:])
+                return reservation
+        except IntegrityError:
+            # someone else took the same slot on the main table first
+            if tables:
+                lost_tables.add(tables[0].pk)
+        except OperationalError as error:
+            # the database was too busy to take the lock; try again shortly
+            busy = error
+            time.sleep(BUSY_RETRY_DELAY * (attempt + 1))
+    if busy is not None:
+        raise busy
+    return None
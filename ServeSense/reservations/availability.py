@@ -0,0 +1,133 @@
+import datetime
+
+import numpy as np
+
+from .intervals import held_intervals
+from .models import Table, default_duration
+
+# Granularity of the search grid and the hours in which a party can be seated.
+SLOT_MINUTES = 15
+FIRST_SEATING = datetime.time(11, 0)
+LAST_SEATING = datetime.time(22, 0)
+
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def _slot_of(value):
+    """Returns the grid slot a time of day falls into."""
+    return (value.hour * 60 + value.minute) // SLOT_MINUTES
+
+
+def build_occupancy(table_ids, rows, origin, days):
+    """Builds a tables x slots boolean matrix of booked time.
+
+    Every booking is turned into a +1 at its first slot and a -1 after its
+    last one; a cumulative sum along each row then gives the number of
+    bookings covering every slot, without looping over slots in Python.
+    Partial slots count as booked, so the grid never reports a table free
+    while it is still taken.
+
+    Args:
+        table_ids (ndarray): Sorted ids of the tables, one row each.
+        rows (list): ``(table_id, date, time, duration)`` booking tuples.
+        origin (date): The day the first column belongs to.
+        days (int): How many days the grid covers.
+
+    Returns:
+        ndarray: ``occupied[table, slot]`` is True when the table is booked.
+    """
+    columns = days * SLOTS_PER_DAY
+    delta = np.zeros((len(table_ids), columns + 1), dtype=np.int32)
+    if rows:
+        booked_tables, dates, times, durations = zip(*rows)
+        table_rows = np.searchsorted(table_ids, np.fromiter(booked_tables, dtype=np.int64))
+        minutes = np.fromiter(
+            (((d - origin).days * 24 * 60) + t.hour * 60 + t.minute for d, t in zip(dates, times)),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        ends = minutes + np.fromiter(durations, dtype=np.int64, count=len(rows))
+        first = np.clip(minutes // SLOT_MINUTES, 0, columns)
+        last = np.clip(-(-ends // SLOT_MINUTES), 0, columns)
+        np.add.at(delta, (table_rows, first), 1)
+        np.add.at(delta, (table_rows, last), -1)
+    return np.cumsum(delta, axis=1)[:, :columns] > 0
+
+
+def find_open_slots(number_of_guests, start_date, end_date, duration=None):
+    """Lists every time a party can be seated between two dates.
+
+    All tables and all active bookings in the range are fetched with two
+    queries and laid out as a tables x 15-minute slots matrix (see
+    :func:`build_occupancy`). A start slot is open for a table when none of
+    the slots the party would use are booked, which is checked for every
+    table and slot at once from running totals of the matrix. Tables too
+    small for the party are masked out by capacity. A section can take the
+    party when the seats of its free tables add up to the party size; the
+    free seats of every section are summed for all slots with one matrix
+    product.
+
+    Args:
+        number_of_guests (int): The size of the party.
+        start_date (date): The first day to search.
+        end_date (date): The last day to search (inclusive).
+        duration (int): Minutes the party keeps the table. Defaults to the
+            usual time for the party size. Only the day after the last
+            searched day is checked past midnight, so longer stays are
+            checked up to its end.
+
+    Returns:
+        list: One dict per open slot with the ``date``, the ``time``, the
+        number of single ``tables`` that could take the party then, and the
+        number of sections whose free tables could be pushed together for it
+        (``combinations``).
+    """
+    duration = duration or default_duration(number_of_guests)
+    one_day = datetime.timedelta(days=1)
+    # one extra day on each side so bookings crossing midnight are counted
+    origin = start_date - one_day
+    days = (end_date - start_date).days + 3
+
+    tables = sorted(Table.objects.values_list('id', 'capacity', 'section'))
+    if not tables:
+        return []
+    table_ids = np.array([table_id for table_id, _, _ in tables], dtype=np.int64)
+    capacities = np.array([capacity for _, capacity, _ in tables], dtype=np.int64)
+    fits = capacities >= number_of_guests
+    sections = sorted({section for _, _, section in tables if section})
+    # seats each table adds to its section, one row per section
+    section_seats = np.array(
+        [[capacity if table_section == section else 0 for _, capacity, table_section in tables]
+         for section in sections],
+        dtype=np.int64,
+    ).reshape(len(sections), len(tables))
+
+    rows = [row[:4] for row in held_intervals(origin, end_date + one_day)]
+    occupied = build_occupancy(table_ids, rows, origin, days)
+
+    booked_before = np.zeros((occupied.shape[0], occupied.shape[1] + 1), dtype=np.int32)
+    np.cumsum(occupied, axis=1, out=booked_before[:, 1:])
+
+    day_slots = np.arange(_slot_of(FIRST_SEATING), _slot_of(LAST_SEATING) + 1)
+    searched_days = days - 2
+    starts = ((np.arange(searched_days) + 1) * SLOTS_PER_DAY)[:, None] + day_slots
+    starts = starts.ravel()
+    needed = -(-duration // SLOT_MINUTES)
+
+    # a stay running past the end of the matrix is checked up to its end
+    ends = np.minimum(starts + needed, booked_before.shape[1] - 1)
+    free = booked_before[:, ends] == booked_before[:, starts]
+    free_tables = free[fits].sum(axis=0)
+    free_sections = (section_seats @ free >= number_of_guests).sum(axis=0)
+
+    slots = []
+    for position in np.flatnonzero(free_tables + free_sections):
+        day, slot = divmod(int(starts[position]), SLOTS_PER_DAY)
+        minutes = slot * SLOT_MINUTES
+        slots.append({
+            'date': origin + datetime.timedelta(days=day),
+            'time': datetime.time(minutes // 60, minutes % 60),
+            'tables': int(free_tables[position]),
+            'combinations': int(free_sections[position]),
+        })
+    return slots
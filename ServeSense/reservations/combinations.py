@@ -0,0 +1,85 @@
+"""
+Finds groups of adjacent tables that can be pushed together for a party.
+
+Only tables in the same section are combined. Within a section the search is
+a subset-sum dynamic programme over seat counts: for every total number of
+seats it keeps the fewest tables that add up to it, so the cost grows with
+``tables x party size`` instead of with the number of subsets. Totals that
+already seat the party are never extended, because adding a table to them
+can only waste seats, and a section whose free tables cannot seat the party
+together is skipped without running the programme at all.
+"""
+
+
+def _fewest_tables(members, number_of_guests):
+    """Returns the best combination of one section's free tables.
+
+    Args:
+        members (list): ``(table_id, capacity)`` of the free tables.
+        number_of_guests (int): The size of the party.
+
+    Returns:
+        tuple: ``(wasted seats, table ids)`` of the combination that wastes
+        the fewest seats, using the fewest tables among those, or None.
+    """
+    members = sorted(members, key=lambda member: (-member[1], member[0]))
+    # A combination with the least waste never reaches guests + the largest
+    # capacity: dropping any one table from it would still seat the party.
+    limit = number_of_guests + members[0][1]
+    unreached = len(members) + 1
+    counts = [unreached] * limit
+    chosen = [0] * limit  # bit i set: members[i] is part of the total
+    counts[0] = 0
+
+    for position, (_, capacity) in enumerate(members):
+        bit = 1 << position
+        # walk totals downwards so every table is used at most once
+        for total in range(limit - 1, capacity - 1, -1):
+            base = total - capacity
+            if base >= number_of_guests or counts[base] == unreached:
+                continue
+            if counts[base] + 1 < counts[total]:
+                counts[total] = counts[base] + 1
+                chosen[total] = chosen[base] | bit
+
+    for total in range(number_of_guests, limit):
+        if counts[total] != unreached:
+            tables = [table_id for position, (table_id, _) in enumerate(members) if chosen[total] >> position & 1]
+            return total - number_of_guests, tables
+    return None
+
+
+def best_combination(free_tables, number_of_guests):
+    """Picks the free tables to push together for a party.
+
+    Args:
+        free_tables (iterable): ``(table_id, capacity, section)`` of the
+            tables that are free for the whole stay. Tables without a
+            section are ignored.
+        number_of_guests (int): The size of the party.
+
+    Returns:
+        list: The ids of the chosen tables, largest table first, or an empty
+        list if no section can seat the party. Across sections the choice
+        with the fewest wasted seats wins, then the one with fewer tables,
+        then the first section by name.
+    """
+    sections = {}
+    for table_id, capacity, section in free_tables:
+        if section and capacity > 0:
+            sections.setdefault(section, []).append((table_id, capacity))
+
+    best = None
+    for section in sorted(sections):
+        members = sections[section]
+        if sum(capacity for _, capacity in members) < number_of_guests:
+            continue
+        found = _fewest_tables(members, number_of_guests)
+        if found is None:
+            continue
+        wasted, tables = found
+        if best is None or (wasted, len(tables)) < (best[0], len(best[1])):
+            best = (wasted, tables)
+            if wasted == 0 and len(tables) == 1:
+                break
+    return best[1] if best else []
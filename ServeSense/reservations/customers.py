@@ -0,0 +1,80 @@
+import re
+
+from django.db import transaction
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone_number):
+    """Returns the canonical, digits-only form of a phone number.
+
+    ``555-2222``, ``(555) 2222`` and ``555 2222`` all become ``5552222``.
+    Returns None when the number contains no digits at all.
+    """
+    digits = NON_DIGITS.sub('', phone_number or '')
+    return digits or None
+
+
+def merge_duplicate_customers(customer_model, batch_size=500):
+    """Fills in missing canonical phone numbers and merges duplicates.
+
+    Customers without a ``normalizedPhone`` are processed in batches of
+    ``batch_size``, each in its own transaction. A customer whose canonical
+    number is not taken yet gets it; otherwise it is a duplicate, so every
+    row pointing at it (reservations and anything else with a foreign key to
+    the customer) is moved to the customer that already owns the number and
+    the duplicate is deleted.
+
+    The model is passed in so that migrations can run this with their
+    historical models.
+
+    Args:
+        customer_model: The Customer model class to work on.
+        batch_size (int): How many customers to handle per transaction.
+
+    Returns:
+        int: The number of duplicate customers merged away.
+    """
+    relations = [
+        relation for relation in customer_model._meta.related_objects
+        if relation.one_to_many
+    ]
+    merged = 0
+    last_id = 0
+    while True:
+        batch = list(
+            customer_model.objects.filter(normalizedPhone__isnull=True, id__gt=last_id)
+            .order_by('id')[:batch_size]
+        )
+        if not batch:
+            return merged
+        last_id = batch[-1].id
+
+        with transaction.atomic():
+            keys = {normalize_phone(customer.phoneNumber) for customer in batch} - {None}
+            owners = dict(
+                customer_model.objects.filter(normalizedPhone__in=keys)
+                .values_list('normalizedPhone', 'id')
+            )
+            keyed = []
+            duplicates = {}
+            for customer in batch:
+                key = normalize_phone(customer.phoneNumber)
+                if key is None:
+                    continue
+                if key in owners:
+                    duplicates.setdefault(owners[key], []).append(customer.id)
+                else:
+                    customer.normalizedPhone = key
+                    owners[key] = customer.id
+                    keyed.append(customer)
+
+            for owner_id, duplicate_ids in duplicates.items():
+                for relation in relations:
+                    relation.related_model.objects.filter(
+                        **{f'{relation.field.name}__in': duplicate_ids}
+                    ).update(**{relation.field.name: owner_id})
+            duplicate_ids = [pk for ids in duplicates.values() for pk in ids]
+            customer_model.objects.filter(id__in=duplicate_ids).delete()
+            customer_model.objects.bulk_update(keyed, ['normalizedPhone'])
+            merged += len(duplicate_ids)
@@ -1,6 +1,14 @@
+import datetime
+
 from django import forms
+from ServeSense.streaming import EXPORT_FORMATS
+from .customers import normalize_phone
 from .models import Reservation
 
+# the longest stay a booking can hold; the interval index only checks the
+# day either side of a booking for overlaps
+MAX_DURATION = 24 * 60
+
 class ReservationForm(forms.Form):
     # customer fields
     first_name = forms.CharField(max_length=50, required=True, label="First Name")
@@ -12,12 +20,95 @@ class ReservationForm(forms.Form):
     reservation_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), required=True, label="Date")
     reservation_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), required=True, label="Time")
 
+    def clean_phone_number(self):
+        phone_number = self.cleaned_data['phone_number']
+        if normalize_phone(phone_number) is None:
+            raise forms.ValidationError("Please enter a phone number with digits.")
+        return phone_number
+
 
 class EditReservationForm(forms.ModelForm):
+    duration = forms.IntegerField(min_value=0, max_value=MAX_DURATION, required=False, label="Duration (minutes)")
+
     class Meta:
         model = Reservation  # template model
-        fields = ['numberOfGuests', 'reservationDate', 'reservationTime'] # The fields we need to change
+        fields = ['numberOfGuests', 'reservationDate', 'reservationTime', 'duration'] # The fields we need to change
         widgets = {
             'reservationDate': forms.DateInput(attrs={'type': 'date'}),
             'reservationTime': forms.TimeInput(attrs={'type': 'time'}),
-        }
\ No newline at end of file
+        }
+
+class AvailabilitySearchForm(forms.Form):
+    """
+    Validates the query string of the availability search.
+
+    The end date is optional and defaults to the start date, so a search for
+    a single evening only needs a party size and a day.
+    """
+    MAX_DAYS = 31
+    MAX_DURATION = MAX_DURATION
+
+    guests = forms.IntegerField(min_value=1, label="Number of Guests")
+    start = forms.DateField(label="From")
+    end = forms.DateField(required=False, label="To")
+    duration = forms.IntegerField(min_value=1, max_value=MAX_DURATION, required=False, label="Duration (minutes)")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        if start is None:
+            return cleaned_data
+        end = cleaned_data.get('end') or start
+        if end < start:
+            raise forms.ValidationError("The end date must not be before the start date.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise forms.ValidationError(f"Please search at most {self.MAX_DAYS} days at a time.")
+        cleaned_data['end'] = end
+        return cleaned_data
+
+
+class ReservationListFilterForm(forms.Form):
+    """
+    Validates the filters and the page cursor of the reservation list.
+
+    The cursor (``after``) is the date, time and id of the last row of the
+    previous page, written as ``2025-08-16,19:30:00,42``; the next page starts
+    right after that row.
+    """
+    start = forms.DateField(required=False, label="From", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, label="To", widget=forms.DateInput(attrs={'type': 'date'}))
+    status = forms.ChoiceField(
+        required=False,
+        label="Status",
+        choices=(('', 'Any'),) + Reservation.STATUS_CHOICES,
+    )
+    after = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def clean_after(self):
+        after = self.cleaned_data['after']
+        if not after:
+            return None
+        try:
+            date, time, reservation_id = after.split(',')
+            return (
+                datetime.date.fromisoformat(date),
+                datetime.time.fromisoformat(time),
+                int(reservation_id),
+            )
+        except ValueError:
+            raise forms.ValidationError("Invalid page cursor.")
+
+
+class ReservationExportForm(forms.Form):
+    """
+    Validates the filters of the reservation export. Every filter is
+    optional; without any, the whole history is exported as CSV.
+    """
+    start = forms.DateField(required=False, label="From")
+    end = forms.DateField(required=False, label="To")
+    status = forms.ChoiceField(
+        required=False,
+        label="Status",
+        choices=(('', 'Any'),) + Reservation.STATUS_CHOICES,
+    )
+    format = forms.ChoiceField(required=False, choices=EXPORT_FORMATS, label="Format")
@@ -0,0 +1,232 @@
+import csv
+import datetime
+import json
+from bisect import bisect_left
+
+from django.db import transaction
+
+from . import intervals
+from .combinations import best_combination
+from .customers import normalize_phone
+from .intervals import DayIndex, MINUTES_PER_DAY, to_minutes
+from .models import Customer, Reservation, Table, default_duration
+
+STATUSES = {value for value, _ in Reservation.STATUS_CHOICES}
+
+
+class RejectedRow(Exception):
+    """Raised when an input row cannot be imported."""
+
+
+def read_rows(stream, file_format):
+    """Yields ``(line_number, row dict)`` pairs from a CSV or JSONL stream.
+
+    Rows are read one at a time, so the file is never held in memory.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def parse_row(row):
+    """Validates one input row and converts it to Python values.
+
+    The columns are the same as on the booking form: ``first_name``,
+    ``last_name``, ``phone_number``, ``number_of_guests``,
+    ``reservation_date`` and ``reservation_time``, plus optional
+    ``duration`` (minutes) and ``status``.
+
+    Raises:
+        RejectedRow: With a short reason if the row is not usable.
+    """
+    if not isinstance(row, dict):
+        raise RejectedRow("not a JSON object")
+    try:
+        first_name = str(row['first_name']).strip()
+        last_name = str(row['last_name']).strip()
+        phone_number = str(row['phone_number']).strip()
+        guests = int(row['number_of_guests'])
+        date = datetime.date.fromisoformat(str(row['reservation_date']))
+        time = datetime.time.fromisoformat(str(row['reservation_time']))
+        duration = int(row.get('duration') or 0) or default_duration(guests)
+    except KeyError as missing:
+        raise RejectedRow(f"missing column {missing}")
+    except (TypeError, ValueError) as error:
+        raise RejectedRow(f"invalid value ({error})")
+
+    status = row.get('status') or 'Pending'
+    phone_key = normalize_phone(phone_number)
+    if not first_name or not last_name:
+        raise RejectedRow("missing name")
+    if phone_key is None or len(phone_number) > 20:
+        raise RejectedRow("invalid phone number")
+    if guests < 1 or duration < 1:
+        raise RejectedRow("guests and duration must be positive")
+    if status not in STATUSES:
+        raise RejectedRow(f"unknown status {status!r}")
+    return {
+        'first_name': first_name[:50],
+        'last_name': last_name[:50],
+        'phone_number': phone_number,
+        'phone_key': phone_key,
+        'guests': guests,
+        'date': date,
+        'time': time,
+        'duration': duration,
+        'status': status,
+    }
+
+
+class ReservationImporter:
+    """Loads reservations in bulk, allocating tables as it goes.
+
+    Rows are processed in chunks. For each chunk, tables are allocated
+    best-fit, pushing adjacent tables together for parties no single table
+    can seat, against in-memory interval indexes (one per day, loaded once
+    from the database and updated as rows are placed). The customers of the
+    placed rows are then looked up with one query, the missing ones are
+    created with one ``bulk_create``, and the reservations and the links of
+    combined bookings are written with two more, all in one transaction per
+    chunk.
+
+    The day indexes are loaded when a day is first seen, so bookings made
+    through the site for those days while an import runs are not taken
+    into account; run large imports outside service hours.
+
+    Attributes:
+        imported (int): Reservations written so far.
+        rejects (list): ``(line_number, reason)`` for every skipped row.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.rejects = []
+        self.tables = list(
+            Table.objects.order_by('capacity', 'tableNumber').values_list('id', 'capacity', 'section')
+        )
+        self.capacities = [capacity for _, capacity, _ in self.tables]
+        self.days = {}
+
+    def run(self, rows):
+        """Imports ``(line_number, row)`` pairs, e.g. from :func:`read_rows`."""
+        chunk = []
+        for line_number, row in rows:
+            try:
+                chunk.append((line_number, parse_row(row)))
+            except RejectedRow as reason:
+                self.rejects.append((line_number, str(reason)))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        # the bulk inserts bypass the signals that normally do this
+        intervals.invalidate(*self.days)
+
+    def _day(self, date):
+        index = self.days.get(date)
+        if index is None:
+            index = self.days[date] = DayIndex.build(date)
+        return index
+
+    def _allocate(self, booking):
+        """Returns the ids of the free tables for a booking and records them.
+
+        The smallest free table that seats the party is used; if there is
+        none, the best combination of adjacent tables. The main table comes
+        first. Returns an empty list if nothing is free.
+        """
+        candidates = self.tables[bisect_left(self.capacities, booking['guests']):]
+        if booking['status'] == 'Cancelled':
+            # cancelled bookings hold no table time; file them on the best fit
+            return [candidates[0][0]] if candidates else []
+
+        date = booking['date']
+        start = to_minutes(booking['time'])
+        end = start + booking['duration']
+        index = self.days[date]
+        for table_id, _, _ in candidates:
+            if index.is_free(table_id, start, end):
+                table_ids = [table_id]
+                break
+        else:
+            table_ids = best_combination(
+                (table for table in self.tables if table[2] and index.is_free(table[0], start, end)),
+                booking['guests'],
+            )
+            if not table_ids:
+                return []
+
+        # the neighbouring days see this booking too, shifted by a day
+        for offset in (-1, 0, 1):
+            neighbour = self.days.get(date + datetime.timedelta(days=offset))
+            if neighbour is not None:
+                shift = -offset * MINUTES_PER_DAY
+                for table_id in table_ids:
+                    neighbour.add(table_id, start + shift, end + shift)
+        return table_ids
+
+    def _import_chunk(self, chunk):
+        for date in {booking['date'] for _, booking in chunk}:
+            self._day(date)
+
+        placed = []
+        for line_number, booking in chunk:
+            table_ids = self._allocate(booking)
+            if not table_ids:
+                self.rejects.append((line_number, "no table available"))
+            else:
+                placed.append((booking, table_ids))
+
+        with transaction.atomic():
+            customers = self._resolve_customers([booking for booking, _ in placed])
+            reservations = [
+                Reservation(
+                    customer_id=customers[booking['phone_key']],
+                    table_id=table_ids[0],
+                    numberOfGuests=booking['guests'],
+                    reservationDate=booking['date'],
+                    reservationTime=booking['time'],
+                    duration=booking['duration'],
+                    status=booking['status'],
+                )
+                for booking, table_ids in placed
+            ]
+            Reservation.objects.bulk_create(reservations)
+            LinkedTable = Reservation.linkedTables.through
+            LinkedTable.objects.bulk_create(
+                LinkedTable(reservation_id=reservation.pk, table_id=table_id)
+                for reservation, (_, table_ids) in zip(reservations, placed)
+                for table_id in table_ids[1:]
+            )
+        self.imported += len(reservations)
+
+    def _resolve_customers(self, bookings):
+        """Maps the chunk's canonical phone numbers to customer ids."""
+        keys = {booking['phone_key'] for booking in bookings}
+        customers = dict(
+            Customer.objects.filter(normalizedPhone__in=keys).values_list('normalizedPhone', 'id')
+        )
+        new_customers = {}
+        for booking in bookings:
+            key = booking['phone_key']
+            if key not in customers and key not in new_customers:
+                new_customers[key] = Customer(
+                    firstName=booking['first_name'],
+                    lastName=booking['last_name'],
+                    phoneNumber=booking['phone_number'],
+                    normalizedPhone=key,
+                )
+        for customer in Customer.objects.bulk_create(new_customers.values()):
+            customers[customer.normalizedPhone] = customer.id
+        return customers
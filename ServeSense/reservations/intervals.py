@@ -0,0 +1,194 @@
+import collections
+import datetime
+import threading
+from bisect import bisect_left
+
+from .models import Reservation
+
+MINUTES_PER_DAY = 24 * 60
+# how many days of indexes a process keeps; the least recently used go first
+MAX_CACHED_DAYS = 60
+
+
+def to_minutes(value):
+    """Converts a time of day to minutes after midnight."""
+    return value.hour * 60 + value.minute
+
+
+def held_intervals(first_day, last_day):
+    """Returns the table time held by active bookings between two days.
+
+    Yields ``(table_id, date, time, duration, reservation_id)`` rows, one
+    for the main table of every booking and one for each linked table of a
+    combined booking, fetched with a single ``UNION ALL`` query.
+    """
+    window = (first_day, last_day)
+    main_tables = (
+        Reservation.objects.filter(reservationDate__range=window)
+        .exclude(status='Cancelled')
+        .values_list('table_id', 'reservationDate', 'reservationTime', 'duration', 'id')
+    )
+    linked_tables = (
+        Reservation.linkedTables.through.objects.filter(reservation__reservationDate__range=window)
+        .exclude(reservation__status='Cancelled')
+        .values_list(
+            'table_id', 'reservation__reservationDate', 'reservation__reservationTime',
+            'reservation__duration', 'reservation_id',
+        )
+    )
+    return main_tables.union(linked_tables, all=True)
+
+
+class TableSchedule:
+    """The booked intervals of one table, kept sorted by start time.
+
+    Intervals are half-open ``[start, end)`` minute ranges, so a party leaving
+    at 21:00 does not clash with one arriving at 21:00. Next to the sorted
+    starts we keep a running maximum of the end times: every interval that
+    starts before ``end`` sits left of one bisect point, and the running
+    maximum there tells whether any of them reaches past ``start``. A lookup
+    is therefore ``O(log n)`` and only walks further back when it has to skip
+    the reservation being edited.
+    """
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_ends')
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_ends = []
+        for start, end, reservation_id in sorted(intervals):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.ids.append(reservation_id)
+        self._rebuild_max_ends()
+
+    def _rebuild_max_ends(self, from_position=0):
+        running = self.max_ends[from_position - 1] if from_position else None
+        del self.max_ends[from_position:]
+        for end in self.ends[from_position:]:
+            running = end if running is None else max(running, end)
+            self.max_ends.append(running)
+
+    def add(self, start, end, reservation_id=None):
+        """Inserts an interval, keeping the schedule sorted."""
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, reservation_id)
+        self._rebuild_max_ends(position)
+
+    def conflicts(self, start, end, exclude=None):
+        """Returns True if ``[start, end)`` overlaps a booked interval.
+
+        Args:
+            start (int): Start of the interval in minutes.
+            end (int): End of the interval in minutes.
+            exclude (int): Optional reservation id to ignore, used when a
+                reservation is checked against its own old booking.
+        """
+        position = bisect_left(self.starts, end) - 1
+        if position < 0:
+            return False
+        if exclude is None:
+            # every interval up to here starts before end, and the running
+            # maximum tells whether any of them ends after start
+            return self.max_ends[position] > start
+        # walk back only to step over the excluded reservation
+        while position >= 0 and self.max_ends[position] > start:
+            if self.ends[position] > start and self.ids[position] != exclude:
+                return True
+            position -= 1
+        return False
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class DayIndex:
+    """The booked intervals of every table for one service day.
+
+    Times are minutes after midnight of ``date``. Bookings from the previous
+    day that run past midnight get negative start times, and early bookings
+    on the next day start at 1440 or later, so late seatings are checked
+    against both neighbours.
+    """
+
+    def __init__(self, date, rows=()):
+        self.date = date
+        by_table = {}
+        for table_id, booked_date, booked_time, duration, reservation_id in rows:
+            offset = (booked_date - date).days * MINUTES_PER_DAY
+            start = offset + to_minutes(booked_time)
+            by_table.setdefault(table_id, []).append(
+                (start, start + duration, reservation_id)
+            )
+        self.tables = {
+            table_id: TableSchedule(intervals)
+            for table_id, intervals in by_table.items()
+        }
+
+    @classmethod
+    def build(cls, date):
+        """Loads all active bookings around ``date`` with one query."""
+        one_day = datetime.timedelta(days=1)
+        return cls(date, held_intervals(date - one_day, date + one_day))
+
+    def is_free(self, table_id, start, end, exclude=None):
+        """Returns True if the table has nothing booked in ``[start, end)``."""
+        schedule = self.tables.get(table_id)
+        return schedule is None or not schedule.conflicts(start, end, exclude)
+
+    def add(self, table_id, start, end, reservation_id=None):
+        """Records a new booking without reloading the day."""
+        self.tables.setdefault(table_id, TableSchedule()).add(start, end, reservation_id)
+
+
+_indexes = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def get_day_index(date, refresh=False):
+    """Returns the interval index for ``date``, building it on first use.
+
+    Indexes live in process memory and are dropped by :func:`invalidate`
+    whenever a reservation on or next to that day is created, edited or
+    deleted. Only the ``MAX_CACHED_DAYS`` most recently used days are kept,
+    so a process that is asked about many days does not keep them all.
+
+    Args:
+        date (date): The service day.
+        refresh (bool): Rebuild from the database even if an index is cached.
+    """
+    with _lock:
+        index = None if refresh else _indexes.get(date)
+        if index is not None:
+            _indexes.move_to_end(date)
+    if index is None:
+        index = DayIndex.build(date)
+        with _lock:
+            _indexes[date] = index
+            _indexes.move_to_end(date)
+            while len(_indexes) > MAX_CACHED_DAYS:
+                _indexes.popitem(last=False)
+    return index
+
+
+def invalidate(*dates):
+    """Drops the cached indexes that can see bookings on ``dates``."""
+    one_day = datetime.timedelta(days=1)
+    with _lock:
+        for date in dates:
+            if date is None:
+                continue
+            if isinstance(date, str):
+                date = datetime.date.fromisoformat(date)
+            for day in (date - one_day, date, date + one_day):
+                _indexes.pop(day, None)
+
+
+def clear():
+    """Drops every cached index."""
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.importer import ReservationImporter, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Imports reservations from a CSV or JSONL file.
+
+    Used when a new location is migrated or bookings arrive from a
+    third-party channel. The file is streamed, customers are matched or
+    created by phone number, and every booking is placed on the smallest
+    free table (see :class:`reservations.importer.ReservationImporter`).
+    Rows that cannot be imported are listed at the end with their line
+    numbers, and the import rate is reported.
+    """
+    help = "Bulk-import reservations from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The file to import.")
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help="File format. Guessed from the file extension if left out.",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Rows written per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        importer = ReservationImporter(chunk_size=options['chunk_size'])
+        started = time.perf_counter()
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                importer.run(read_rows(stream, file_format))
+        except OSError as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+        elapsed = time.perf_counter() - started
+
+        for line_number, reason in importer.rejects:
+            self.stdout.write(self.style.WARNING(f"line {line_number}: {reason}"))
+        rows = importer.imported + len(importer.rejects)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.imported} reservation(s), rejected {len(importer.rejects)}, "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else rows:.0f} rows/s)."
+        ))
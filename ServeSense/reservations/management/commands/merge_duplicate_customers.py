@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from reservations.customers import merge_duplicate_customers
+from reservations.models import Customer
+
+
+class Command(BaseCommand):
+    """
+    Merges customers that share a phone number.
+
+    Customers that were written without going through ``Customer.save()``
+    (bulk loads, raw SQL, old data) have no canonical phone number yet. This
+    command fills it in and folds every duplicate into the customer that
+    already owns the number, moving their reservations across. Work is done
+    in batches, each in its own transaction, so it can run on a live
+    database.
+    """
+    help = "Normalize customer phone numbers and merge duplicate customers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="How many customers to process per transaction (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        merged = merge_duplicate_customers(Customer, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Merged {merged} duplicate customer(s)."))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+# Copied from reservations.models so the migration does not depend on code
+# that may change later.
+DEFAULT_DURATIONS = (
+    (2, 90),
+    (4, 120),
+    (6, 150),
+)
+LARGE_PARTY_DURATION = 180
+
+
+def fill_durations(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+    lower = 0
+    for max_guests, minutes in DEFAULT_DURATIONS:
+        Reservation.objects.filter(
+            numberOfGuests__gt=lower, numberOfGuests__lte=max_guests
+        ).update(duration=minutes)
+        lower = max_guests
+    Reservation.objects.filter(numberOfGuests__gt=lower).update(
+        duration=LARGE_PARTY_DURATION
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0003_reservation_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="duration",
+            field=models.PositiveIntegerField(
+                blank=True, default=90, help_text="Minutes the table is held."
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_durations, migrations.RunPython.noop),
+    ]
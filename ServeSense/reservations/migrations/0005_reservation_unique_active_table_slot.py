@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+def cancel_duplicate_bookings(apps, schema_editor):
+    """Cancels all but the first active booking of a table slot, so the
+    unique constraint can be added to an existing database."""
+    Reservation = apps.get_model("reservations", "Reservation")
+    seen = set()
+    duplicates = []
+    bookings = (
+        Reservation.objects.exclude(status="Cancelled")
+        .order_by("id")
+        .values_list("id", "table_id", "reservationDate", "reservationTime")
+    )
+    for reservation_id, table_id, date, time in bookings.iterator():
+        slot = (table_id, date, time)
+        if slot in seen:
+            duplicates.append(reservation_id)
+        else:
+            seen.add(slot)
+    Reservation.objects.filter(id__in=duplicates).update(status="Cancelled")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0004_reservation_duration"),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "Cancelled"), _negated=True),
+                fields=("table", "reservationDate", "reservationTime"),
+                name="unique_active_table_slot",
+            ),
+        ),
+    ]
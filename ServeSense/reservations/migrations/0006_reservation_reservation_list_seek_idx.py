@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0005_reservation_unique_active_table_slot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["reservationDate", "reservationTime", "id"],
+                name="reservation_list_seek_idx",
+            ),
+        ),
+    ]
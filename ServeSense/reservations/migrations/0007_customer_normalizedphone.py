@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:02
+
+import re
+
+from django.db import migrations, models, transaction
+
+# Copied from reservations.customers so the migration does not depend on
+# code that may change later.
+NON_DIGITS = re.compile(r"\D")
+BATCH_SIZE = 500
+
+
+def normalize_phone(phone_number):
+    digits = NON_DIGITS.sub("", phone_number or "")
+    return digits or None
+
+
+def normalize_and_merge(apps, schema_editor):
+    """Fills in the canonical phone numbers and merges duplicate customers.
+
+    Customers are handled in batches by id. A customer whose canonical
+    number is not taken yet gets it; otherwise every row pointing at it is
+    moved to the customer that owns the number and the duplicate is
+    deleted.
+    """
+    Customer = apps.get_model("reservations", "Customer")
+    relations = [relation for relation in Customer._meta.related_objects if relation.one_to_many]
+    last_id = 0
+    while True:
+        batch = list(
+            Customer.objects.filter(normalizedPhone__isnull=True, id__gt=last_id).order_by("id")[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        with transaction.atomic():
+            keys = {normalize_phone(customer.phoneNumber) for customer in batch} - {None}
+            owners = dict(
+                Customer.objects.filter(normalizedPhone__in=keys).values_list("normalizedPhone", "id")
+            )
+            keyed = []
+            duplicates = {}
+            for customer in batch:
+                key = normalize_phone(customer.phoneNumber)
+                if key is None:
+                    continue
+                if key in owners:
+                    duplicates.setdefault(owners[key], []).append(customer.id)
+                else:
+                    customer.normalizedPhone = key
+                    owners[key] = customer.id
+                    keyed.append(customer)
+
+            for owner_id, duplicate_ids in duplicates.items():
+                for relation in relations:
+                    relation.related_model.objects.filter(
+                        **{f"{relation.field.name}__in": duplicate_ids}
+                    ).update(**{relation.field.name: owner_id})
+            Customer.objects.filter(id__in=[pk for ids in duplicates.values() for pk in ids]).delete()
+            Customer.objects.bulk_update(keyed, ["normalizedPhone"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0006_reservation_reservation_list_seek_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="normalizedPhone",
+            field=models.CharField(editable=False, max_length=20, null=True),
+        ),
+        migrations.RunPython(normalize_and_merge, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="customer",
+            name="normalizedPhone",
+            field=models.CharField(
+                editable=False, max_length=20, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0007_customer_normalizedphone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="table",
+            name="section",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Tables in the same section can be pushed together for large parties.",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="linkedTables",
+            field=models.ManyToManyField(
+                blank=True, related_name="linked_reservations", to="reservations.table"
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0008_table_section_reservation_linkedtables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WaitlistEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("numberOfGuests", models.IntegerField()),
+                ("requestedDate", models.DateField()),
+                ("requestedTime", models.TimeField()),
+                (
+                    "duration",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="Minutes the table would be held."
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Waiting", "Waiting"),
+                            ("Promoted", "Promoted"),
+                            ("Removed", "Removed"),
+                        ],
+                        default="Waiting",
+                        max_length=10,
+                    ),
+                ),
+                ("createdAt", models.DateTimeField(auto_now_add=True)),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="reservations.customer",
+                    ),
+                ),
+                (
+                    "reservation",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="waitlistEntry",
+                        to="reservations.reservation",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "Waiting")),
+                        fields=["requestedDate", "requestedTime"],
+                        name="waitlist_waiting_idx",
+                    )
+                ],
+            },
+        ),
+    ]
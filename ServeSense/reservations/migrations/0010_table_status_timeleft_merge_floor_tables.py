@@ -0,0 +1,82 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# floor statuses of the old tables.Table and the ones they became
+STATUSES = {"Free": "available", "Reserved": "reserved", "Occupied": "occupied"}
+
+# when a table was in both models, the busier of the two statuses is kept
+BUSY = {"available": 0, "reserved": 1, "occupied": 2}
+
+
+def merge_floor_tables(apps, schema_editor):
+    """Copies the tables of the floor view into the reservations tables.
+
+    The floor tables are read in batches by id. A floor table whose number
+    matches an existing ``tableNumber`` is merged into it: the reservations
+    table keeps its capacity and section, takes the time left, and takes the
+    floor status if that one is busier. Every other floor table is created.
+    """
+    FloorTable = apps.get_model("tables", "Table")
+    Table = apps.get_model("reservations", "Table")
+    last_id = 0
+    while True:
+        batch = list(FloorTable.objects.filter(pk__gt=last_id).order_by("pk")[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1].pk
+        existing = Table.objects.in_bulk([str(floor.number) for floor in batch], field_name="tableNumber")
+        changed, created = [], []
+        for floor in batch:
+            status = STATUSES.get(floor.status, "available")
+            table = existing.get(str(floor.number))
+            if table is None:
+                created.append(Table(
+                    tableNumber=str(floor.number), capacity=floor.capacity,
+                    status=status, timeLeft=floor.time_left,
+                ))
+                continue
+            if BUSY.get(status, 0) > BUSY.get(table.status, 0):
+                table.status = status
+            table.timeLeft = floor.time_left
+            changed.append(table)
+        Table.objects.bulk_update(changed, ["status", "timeLeft"])
+        Table.objects.bulk_create(created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0009_waitlistentry"),
+        ("tables", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="table",
+            name="timeLeft",
+            field=models.IntegerField(
+                blank=True, help_text="Estimated minutes until the table is free.", null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="table",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("available", "Free"),
+                    ("reserved", "Reserved"),
+                    ("occupied", "Occupied"),
+                ],
+                default="available",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="table",
+            index=models.Index(fields=["status", "tableNumber"], name="table_status_idx"),
+        ),
+        migrations.RunPython(merge_floor_tables, migrations.RunPython.noop),
+    ]
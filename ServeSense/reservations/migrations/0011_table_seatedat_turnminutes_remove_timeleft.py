@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:20
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# copied from reservations.models.default_duration as it was when this was written
+DEFAULT_DURATIONS = ((2, 90), (4, 120), (6, 150))
+LARGE_PARTY_DURATION = 180
+
+
+def default_duration(number_of_guests):
+    for max_guests, minutes in DEFAULT_DURATIONS:
+        if number_of_guests <= max_guests:
+            return minutes
+    return LARGE_PARTY_DURATION
+
+
+def stamp_occupied_tables(apps, schema_editor):
+    """Gives the occupied tables a seating time that keeps their countdown.
+
+    A table that had minutes left entered is taken to have been seated as
+    long ago as its turn minus those minutes; any other occupied table is
+    taken to have been seated now.
+    """
+    Table = apps.get_model("reservations", "Table")
+    now = timezone.now()
+    tables = list(Table.objects.filter(status="occupied"))
+    for table in tables:
+        turn = default_duration(table.capacity)
+        elapsed = max(0, turn - table.timeLeft) if table.timeLeft is not None else 0
+        table.seatedAt = now - datetime.timedelta(minutes=elapsed)
+    Table.objects.bulk_update(tables, ["seatedAt"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservations", "0010_table_status_timeleft_merge_floor_tables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="table",
+            name="seatedAt",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="table",
+            name="turnMinutes",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Minutes guests are expected to keep the table. Defaults by its capacity.",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(stamp_occupied_tables, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="table",
+            name="timeLeft",
+        ),
+    ]
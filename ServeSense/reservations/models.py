@@ -1,20 +1,54 @@
+import math
+
 from django.db import models
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .customers import normalize_phone
+
+
+# How long a party keeps its table, by party size: (max guests, minutes).
+# Parties bigger than the last entry use LARGE_PARTY_DURATION.
+DEFAULT_DURATIONS = (
+    (2, 90),
+    (4, 120),
+    (6, 150),
+)
+LARGE_PARTY_DURATION = 180
+
+
+def default_duration(number_of_guests):
+    """Returns the default table time in minutes for a party of this size."""
+    for max_guests, minutes in DEFAULT_DURATIONS:
+        if number_of_guests <= max_guests:
+            return minutes
+    return LARGE_PARTY_DURATION
+
 
 class Customer(models.Model):
     """Represents a customer who makes a reservation.
 
     This model stores the basic contact information for a customer, which allows
     the restaurant to identify them. The phoneNumber is a key piece of information
-    used to look up existing customers when a new reservation is being made.
+    used to look up existing customers when a new reservation is being made;
+    lookups go through its digits-only form, which is unique, so the same
+    number typed with or without dashes or spaces finds the same customer.
 
     Attributes:
         firstName (str): The customer's first name.
         lastName (str): The customer's last name.
-        phoneNumber (str): The customer's contact phone number.
+        phoneNumber (str): The customer's contact phone number, as entered.
+        normalizedPhone (str): The digits of phoneNumber. Filled in on save.
     """
     firstName = models.CharField(max_length=50)
     lastName = models.CharField(max_length=50)
     phoneNumber = models.CharField(max_length=20)
+    normalizedPhone = models.CharField(max_length=20, unique=True, null=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        """Keeps the canonical phone number in step with the entered one."""
+        self.normalizedPhone = normalize_phone(self.phoneNumber)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """Returns a string representation of the customer for the admin panel."""
@@ -27,15 +61,120 @@ class Table(models.Model):
     Each table has a unique number or identifier, a capacity to indicate how
     many guests it can seat, and a status to track whether it is currently
     available, reserved for an upcoming booking, or occupied by guests.
+    Tables in the same section stand next to each other and can be pushed
+    together to seat a party that no single table can take.
+
+    This is the one table model of the restaurant: bookings are allocated to
+    it and the live floor view of the tables app shows it. The status only
+    changes through :meth:`move_to` and the transitions built on it, each a
+    single conditional ``UPDATE``, so two requests can never move the same
+    table from one state into two different ones.
 
     Attributes:
         tableNumber (str): A unique identifier for the table (e.g., 'A1').
         capacity (int): The maximum number of guests the table can seat.
-        status (str): The current status of the table (e.g., 'available').
+        status (str): The current status of the table, one of
+            :class:`Table.Status`.
+        section (str): The group of adjacent tables this table belongs to.
+            Tables without a section are never combined.
+        seatedAt (datetime): When the guests at an occupied table sat down.
+        turnMinutes (int): Optional; how many minutes guests are expected
+            to keep the table. Left empty, the default duration for a party
+            filling the table is used.
     """
+
+    class Status(models.TextChoices):
+        FREE = 'available', 'Free'
+        RESERVED = 'reserved', 'Reserved'
+        OCCUPIED = 'occupied', 'Occupied'
+
+    # the states a table may move to from each state
+    TRANSITIONS = {
+        Status.FREE: (Status.RESERVED, Status.OCCUPIED),
+        Status.RESERVED: (Status.OCCUPIED, Status.FREE),
+        Status.OCCUPIED: (Status.FREE,),
+    }
+
     tableNumber = models.CharField(unique=True, max_length=10)
     capacity = models.IntegerField()
-    status = models.CharField(max_length=20, default='available')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.FREE)
+    section = models.CharField(
+        max_length=20,
+        blank=True,
+        default='',
+        help_text="Tables in the same section can be pushed together for large parties.",
+    )
+    seatedAt = models.DateTimeField(null=True, blank=True, editable=False)
+    turnMinutes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Minutes guests are expected to keep the table. Defaults by its capacity.",
+    )
+
+    class Meta:
+        indexes = [
+            # serves the floor view's status reads and filters
+            models.Index(fields=['status', 'tableNumber'], name='table_status_idx'),
+        ]
+
+    @property
+    def expected_turn(self):
+        """Minutes guests are expected to keep the table."""
+        return self.turnMinutes or default_duration(self.capacity)
+
+    @property
+    def timeLeft(self):
+        """Minutes until an occupied table should be free, counted from when
+        it was seated, or None if nobody is seated. Never stored, so it is
+        always current; :func:`reservations.turns.times_left` works it out
+        for many tables at once."""
+        if self.status != self.Status.OCCUPIED or self.seatedAt is None:
+            return None
+        elapsed = (timezone.now() - self.seatedAt).total_seconds()
+        return max(0, math.ceil((self.expected_turn * 60 - elapsed) / 60))
+
+    def move_to(self, status):
+        """Moves the table to a new status, if its current one allows it.
+
+        The move is one ``UPDATE ... WHERE status IN (...)`` over the states
+        that may lead to ``status``, so it is checked against the status in
+        the database, not the possibly stale one of this instance. Seating
+        a table stamps when the guests sat down, and freeing it clears the
+        stamp. A move sends ``post_save`` with the changed ``update_fields``,
+        as a save would, so listeners such as the floor screens hear about
+        it.
+
+        Returns:
+            bool: True if the table moved, False if its status did not
+            allow the move.
+        """
+        sources = [source for source, targets in self.TRANSITIONS.items() if status in targets]
+        changes = {'status': status}
+        if status == self.Status.OCCUPIED:
+            changes['seatedAt'] = timezone.now()
+        elif status == self.Status.FREE:
+            changes['seatedAt'] = None
+        moved = Table.objects.filter(pk=self.pk, status__in=sources).update(**changes)
+        if moved:
+            for field, value in changes.items():
+                setattr(self, field, value)
+            post_save.send(
+                sender=Table, instance=self, created=False, update_fields=frozenset(changes),
+                raw=False, using=Table.objects.db,
+            )
+        return bool(moved)
+
+    def reserve(self):
+        """Holds a free table for a confirmed booking."""
+        return self.move_to(self.Status.RESERVED)
+
+    def seat(self):
+        """Marks a free or reserved table as occupied by guests, from now."""
+        return self.move_to(self.Status.OCCUPIED)
+
+    def release(self):
+        """Frees a reserved or occupied table."""
+        return self.move_to(self.Status.FREE)
 
     def __str__(self):
         """Returns a detailed string summary of the table."""
@@ -52,18 +191,25 @@ class Reservation(models.Model):
 
     Attributes:
         customer (Customer): A foreign key to the customer who made the booking.
-        table (Table): A foreign key to the table that was booked.
+        table (Table): A foreign key to the table that was booked. For a
+            party seated at several pushed-together tables, the largest one.
+        linkedTables (Table): The other tables of a combined booking, held
+            for the same time as ``table``. Empty for most bookings.
         numberOfGuests (int): The number of people in the party.
         reservationTime (TimeField): The time of the reservation.
         reservationDate (DateField): The date of the reservation.
+        duration (int): How many minutes the party keeps the table. If left
+            empty it is filled in from the party size when saved.
         status (str): The current status of the booking (e.g., 'Pending').
         
     """
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     table = models.ForeignKey(Table, on_delete=models.CASCADE)
+    linkedTables = models.ManyToManyField(Table, blank=True, related_name='linked_reservations')
     numberOfGuests = models.IntegerField()
     reservationTime = models.TimeField()
     reservationDate = models.DateField()
+    duration = models.PositiveIntegerField(blank=True, help_text="Minutes the table is held.")
     STATUS_CHOICES = (
         ('Pending', 'Pending'),
         ('Confirmed', 'Confirmed'),
@@ -71,6 +217,96 @@ class Reservation(models.Model):
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
 
+    class Meta:
+        indexes = [
+            # serves the date/time ordered, seek-paginated reservation list
+            models.Index(
+                fields=['reservationDate', 'reservationTime', 'id'],
+                name='reservation_list_seek_idx',
+            ),
+        ]
+        constraints = [
+            # a table can only hold one active booking per start time
+            models.UniqueConstraint(
+                fields=['table', 'reservationDate', 'reservationTime'],
+                condition=~models.Q(status='Cancelled'),
+                name='unique_active_table_slot',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the date the row was loaded with, so that moving a
+        reservation to another day can invalidate the old day's index too."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_date = instance.__dict__.get('reservationDate')
+        return instance
+
+    def tables(self):
+        """Returns every table the booking holds, the main table first."""
+        return [self.table, *self.linkedTables.all()]
+
+    def save(self, *args, **kwargs):
+        """Fills in the default duration for the party size before saving."""
+        if not self.duration:
+            self.duration = default_duration(self.numberOfGuests)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         """Returns a concise summary of the reservation."""
-        return f"Reservation for {self.customer} at {self.reservationDate} for Table {self.table}"
\ No newline at end of file
+        return f"Reservation for {self.customer} at {self.reservationDate} for Table {self.table}"
+
+class WaitlistEntry(models.Model):
+    """Represents a party waiting for a table that was not free when they asked.
+
+    When a booking is cancelled or moved, the freed table time is offered to
+    the waiting parties (see :mod:`reservations.waitlist`); a party that can
+    be seated is booked and its entry is marked as promoted.
+
+    Attributes:
+        customer (Customer): The customer who is waiting.
+        numberOfGuests (int): The number of people in the party.
+        requestedDate (DateField): The date the party would like to come.
+        requestedTime (TimeField): The time the party would like to come.
+        duration (int): How many minutes the party would keep the table. If
+            left empty it is filled in from the party size when saved.
+        status (str): 'Waiting', 'Promoted' or 'Removed'.
+        createdAt (DateTimeField): When the party joined the waitlist.
+        reservation (Reservation): The booking made when the party was
+            promoted.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    numberOfGuests = models.IntegerField()
+    requestedDate = models.DateField()
+    requestedTime = models.TimeField()
+    duration = models.PositiveIntegerField(blank=True, help_text="Minutes the table would be held.")
+    STATUS_CHOICES = (
+        ('Waiting', 'Waiting'),
+        ('Promoted', 'Promoted'),
+        ('Removed', 'Removed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Waiting')
+    createdAt = models.DateTimeField(auto_now_add=True)
+    reservation = models.OneToOneField(
+        Reservation, null=True, blank=True, on_delete=models.SET_NULL, related_name='waitlistEntry',
+    )
+
+    class Meta:
+        indexes = [
+            # serves the lookup of waiting parties around a freed slot
+            models.Index(
+                fields=['requestedDate', 'requestedTime'],
+                condition=models.Q(status='Waiting'),
+                name='waitlist_waiting_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Fills in the default duration for the party size before saving."""
+        if not self.duration:
+            self.duration = default_duration(self.numberOfGuests)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        """Returns a concise summary of the waitlist entry."""
+        return f"{self.customer} waiting for {self.numberOfGuests} on {self.requestedDate} at {self.requestedTime}"
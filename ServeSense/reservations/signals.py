@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import intervals
+from .models import Reservation
+
+
+def _invalidate_days(reservation):
+    dates = (reservation.reservationDate, getattr(reservation, '_loaded_date', None))
+    intervals.invalidate(*dates)
+    # Drop again once the write is visible, in case another request rebuilt
+    # the index from the old rows while this transaction was still open.
+    transaction.on_commit(lambda: intervals.invalidate(*dates))
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, **kwargs):
+    """Invalidates the interval indexes of the days a saved booking touches."""
+    _invalidate_days(instance)
+    instance._loaded_date = instance.reservationDate
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    """Invalidates the interval indexes of the day a deleted booking was on."""
+    _invalidate_days(instance)
+
+
+@receiver(m2m_changed, sender=Reservation.linkedTables.through)
+def linked_tables_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidates the interval indexes when the tables of a combined
+    booking change."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        _invalidate_days(instance)
+    elif pk_set:
+        # tables were linked or unlinked from the table's side
+        for reservation in Reservation.objects.filter(pk__in=pk_set).only('reservationDate'):
+            _invalidate_days(reservation)
+    else:
+        # a table's links were cleared; we cannot tell which days they were on
+        intervals.clear()
@@ -1,7 +1,26 @@
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse # reverse is used to find urls
-from .models import Customer, Table, Reservation
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import Customer, Table, Reservation, WaitlistEntry
+from .allocation import MAX_BOOKING_ATTEMPTS, book_table, find_available_table, find_table_combination
+from .availability import find_open_slots
+from .combinations import best_combination
+from .customers import normalize_phone
+from .turns import times_left, with_time_left
+from .waitlist import promote_waitlist
+from unittest import mock
+from . import intervals
+from .views import RESERVATIONS_PER_PAGE
 import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+import threading
+import time
 
 
 class ReservationTests(TestCase):
@@ -12,8 +31,11 @@ class ReservationTests(TestCase):
 
         This method sets up a consistent environment for all tests by creating
         a sample Table and a sample Customer in the test database. This avoids
-        repeating the same creation code in every test function.
+        repeating the same creation code in every test function. It also
+        empties the in-memory interval indexes, which outlive the database
+        rollback between tests.
         """
+        intervals.clear()
         self.table = Table.objects.create(tableNumber='A1', capacity=2)
         self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
 
@@ -132,4 +154,1364 @@ class ReservationTests(TestCase):
         self.assertEqual(reservation.status, 'Confirmed')
         
         table = Table.objects.get(id=self.table.id)
-        self.assertEqual(table.status, 'reserved')
\ No newline at end of file
+        self.assertEqual(table.status, 'reserved')
+
+class TableAllocationTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a customer and a small floor with tables of different sizes,
+        so the tests can check which table the allocation engine picks.
+        """
+        intervals.clear()
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.date = datetime.date.today()
+        self.time = datetime.time(19, 0)
+        self.big = Table.objects.create(tableNumber='B1', capacity=8)
+        self.small = Table.objects.create(tableNumber='S1', capacity=2)
+        self.medium = Table.objects.create(tableNumber='M1', capacity=4)
+
+
+    def test_smallest_fitting_table_is_chosen(self):
+        """
+        Tests that the engine picks the best fit rather than the first table.
+
+        A party of 3 fits both the 4-seat and the 8-seat table, so the 4-seat
+        table must be chosen to keep the big one free for a large party.
+        """
+        table = find_available_table(3, self.date, self.time)
+        self.assertEqual(table, self.medium)
+
+
+    def test_booked_table_is_skipped(self):
+        """
+        Tests that a table booked at the same date and time is not offered,
+        but that a cancelled booking does not block it.
+        """
+        booking = Reservation.objects.create(
+            customer=self.customer,
+            table=self.medium,
+            numberOfGuests=3,
+            reservationDate=self.date,
+            reservationTime=self.time,
+        )
+        self.assertEqual(find_available_table(3, self.date, self.time), self.big)
+
+        booking.status = 'Cancelled'
+        booking.save()
+        self.assertEqual(find_available_table(3, self.date, self.time), self.medium)
+
+
+    def test_no_table_when_party_too_big(self):
+        """Tests that None is returned when no table can seat the party."""
+        self.assertIsNone(find_available_table(9, self.date, self.time))
+
+
+    def test_booking_reads_the_day_once(self):
+        """
+        Tests that booking picks the table from the cached index and re-reads
+        the day's bookings only once, after locking it, and that editing a
+        booking also reads the day only once.
+        """
+        intervals.get_day_index(self.date)
+        with mock.patch.object(intervals.DayIndex, 'build', wraps=intervals.DayIndex.build) as build:
+            reservation = book_table(self.customer, 3, self.date, self.time)
+        self.assertEqual(reservation.table, self.medium)
+        self.assertEqual(build.call_count, 1)
+
+        with mock.patch.object(intervals.DayIndex, 'build', wraps=intervals.DayIndex.build) as build:
+            self.client.post(reverse('edit_reservation', args=[reservation.pk]), {
+                'numberOfGuests': 6, 'reservationDate': self.date, 'reservationTime': '19:00',
+                'duration': 120,
+            })
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.table, self.big)
+        self.assertEqual(build.call_count, 1)
+
+
+    def test_stale_cache_does_not_turn_a_party_away(self):
+        """
+        Tests that a booking cancelled without this process hearing about it,
+        for example through another server process, frees its table even
+        though the cached index still shows it as taken.
+        """
+        booked = book_table(self.customer, 8, self.date, self.time)
+        self.assertEqual(booked.table, self.big)
+        intervals.get_day_index(self.date)
+        # delete behind the back of the signals that clear the cache
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Reservation._meta.db_table} WHERE id = %s', [booked.pk])
+        self.assertFalse(intervals.get_day_index(self.date).is_free(self.big.pk, 19 * 60, 20 * 60))
+
+        reservation = book_table(self.customer, 8, self.date, self.time)
+        self.assertEqual(reservation.table, self.big)
+
+
+    def test_busy_database_is_not_reported_as_full(self):
+        """
+        Tests that when the database stays locked for every attempt, the
+        booking fails with the database error instead of None, and the
+        booking page asks to try again rather than offering the waitlist.
+        """
+        locked = OperationalError("database is locked")
+        with mock.patch('reservations.allocation.BUSY_RETRY_DELAY', 0), \
+                mock.patch('reservations.allocation.find_tables', side_effect=locked) as find:
+            with self.assertRaises(OperationalError):
+                book_table(self.customer, 2, self.date, self.time)
+            self.assertEqual(find.call_count, MAX_BOOKING_ATTEMPTS)
+
+            response = self.client.post(reverse('add_reservation'), {
+                'first_name': 'John', 'last_name': 'Doe', 'phone_number': '5231211',
+                'number_of_guests': 2, 'reservation_date': self.date, 'reservation_time': '19:00',
+            })
+        self.assertContains(response, "busy right now")
+        self.assertFalse(response.context['offer_waitlist'])
+        self.assertFalse(Reservation.objects.exists())
+
+
+    def test_query_count_is_constant_as_tables_grow(self):
+        """
+        Tests that finding a table costs the same number of queries no matter
+        how many tables exist or how many of them are already booked: one for
+        the candidate tables, plus one to load the day's bookings the first
+        time the day is looked at.
+        """
+        for tables_to_add in (0, 60):
+            for i in range(tables_to_add):
+                table = Table.objects.create(tableNumber=f'T{i}', capacity=2)
+                Reservation.objects.create(
+                    customer=self.customer,
+                    table=table,
+                    numberOfGuests=2,
+                    reservationDate=self.date,
+                    reservationTime=self.time,
+                )
+            with self.assertNumQueries(2):
+                find_available_table(2, self.date, self.time)
+            with self.assertNumQueries(1):
+                find_available_table(2, self.date, self.time)
+
+
+    def test_create_reservation_query_count_is_constant(self):
+        """
+        Tests that the booking view does not issue one query per candidate
+        table. Bookings on a floor of 3 tables and a floor of 63 tables must
+        cost the same number of queries.
+        """
+        def book(phone):
+            data = {
+                'first_name': 'Jane',
+                'last_name': 'Doe',
+                'phone_number': phone,
+                'number_of_guests': 2,
+                'reservation_date': self.date,
+                'reservation_time': '12:00',
+            }
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse('add_reservation'), data=data)
+            return len(queries)
+
+        small_floor = book('555-0001')
+        for i in range(60):
+            Table.objects.create(tableNumber=f'T{i}', capacity=2)
+        Reservation.objects.all().delete()
+        self.assertEqual(book('555-0002'), small_floor)
+
+
+class OverlapDetectionTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates one 2-seat table and a customer, so every new booking has to
+        share the same table and any overlap shows up as "no table free".
+        """
+        intervals.clear()
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.table = Table.objects.create(tableNumber='A1', capacity=2)
+        self.date = datetime.date(2026, 3, 14)
+
+    def book(self, time, date=None, guests=2, **extra):
+        """Creates a reservation on the test table."""
+        return Reservation.objects.create(
+            customer=self.customer,
+            table=self.table,
+            numberOfGuests=guests,
+            reservationDate=date or self.date,
+            reservationTime=time,
+            **extra,
+        )
+
+
+    def test_duration_defaults_to_party_size(self):
+        """Tests that a booking without a duration gets one from its party size."""
+        self.assertEqual(self.book('12:00', guests=2).duration, 90)
+        self.assertEqual(self.book('15:00', guests=4).duration, 120)
+        self.assertEqual(self.book('18:00', guests=12).duration, 180)
+        self.assertEqual(self.book('22:00', duration=45).duration, 45)
+
+
+    def test_overlapping_start_times_conflict(self):
+        """
+        Tests that a 19:15 party cannot take a table that a 19:00 party is
+        still sitting at, while a party arriving as the first one leaves can.
+        """
+        self.book('19:00')
+        self.assertIsNone(find_available_table(2, self.date, datetime.time(19, 15)))
+        self.assertIsNone(find_available_table(2, self.date, datetime.time(18, 0)))
+        self.assertEqual(find_available_table(2, self.date, datetime.time(20, 30)), self.table)
+        self.assertEqual(find_available_table(2, self.date, datetime.time(17, 30)), self.table)
+
+
+    def test_late_booking_blocks_next_morning(self):
+        """Tests that a booking running past midnight blocks the next day."""
+        self.book('23:30')
+        next_day = self.date + datetime.timedelta(days=1)
+        self.assertIsNone(find_available_table(2, next_day, datetime.time(0, 30)))
+        self.assertEqual(find_available_table(2, next_day, datetime.time(1, 0)), self.table)
+
+
+    def test_index_is_invalidated_on_edit_and_delete(self):
+        """
+        Tests that moving or deleting a booking frees its old slot right away,
+        even though the day's index was already cached.
+        """
+        booking = self.book('19:00')
+        self.assertIsNone(find_available_table(2, self.date, datetime.time(19, 30)))
+
+        booking.reservationTime = datetime.time(12, 0)
+        booking.save()
+        self.assertEqual(find_available_table(2, self.date, datetime.time(19, 30)), self.table)
+        self.assertIsNone(find_available_table(2, self.date, datetime.time(12, 30)))
+
+        booking.delete()
+        self.assertEqual(find_available_table(2, self.date, datetime.time(12, 30)), self.table)
+
+
+    def test_moving_booking_to_another_day_frees_the_old_day(self):
+        """Tests that the old day's index is dropped when a booking changes date."""
+        booking = self.book('19:00')
+        self.assertIsNone(find_available_table(2, self.date, datetime.time(19, 0)))
+
+        booking = Reservation.objects.get(pk=booking.pk)
+        booking.reservationDate = self.date + datetime.timedelta(days=7)
+        booking.save()
+        self.assertEqual(find_available_table(2, self.date, datetime.time(19, 0)), self.table)
+
+
+    def test_edit_into_a_clash_is_rejected(self):
+        """
+        Tests that the edit page refuses to move a booking onto a time where
+        its table is already taken and no other table is free.
+        """
+        self.book('19:00')
+        later = self.book('21:00')
+        response = self.client.post(reverse('edit_reservation', args=[later.id]), data={
+            'numberOfGuests': 2,
+            'reservationDate': self.date,
+            'reservationTime': '19:30',
+        })
+        self.assertContains(response, "Sorry, no tables are available")
+        later.refresh_from_db()
+        self.assertEqual(later.reservationTime, datetime.time(21, 0))
+
+
+    def test_edit_refuses_a_stay_longer_than_a_day(self):
+        """
+        Tests that the edit page refuses a stay longer than a day, which the
+        index could not check against bookings two days away, and asks to
+        try again when the tables cannot be locked.
+        """
+        booking = self.book('19:00')
+        url = reverse('edit_reservation', args=[booking.id])
+        data = {'numberOfGuests': 2, 'reservationDate': self.date, 'reservationTime': '19:00'}
+        response = self.client.post(url, data={**data, 'duration': 3000})
+        self.assertFormError(response.context['form'], 'duration', "Ensure this value is less than or equal to 1440.")
+        booking.refresh_from_db()
+        self.assertEqual(booking.duration, 90)
+
+        locked = OperationalError("database is locked")
+        with mock.patch('reservations.views.get_day_index', side_effect=locked):
+            response = self.client.post(url, data={**data, 'duration': 120})
+        self.assertContains(response, "busy right now")
+        booking.refresh_from_db()
+        self.assertEqual(booking.duration, 90)
+
+
+    def test_index_cache_keeps_only_recent_days(self):
+        """
+        Tests that the process keeps indexes for a limited number of days,
+        dropping the one used longest ago.
+        """
+        days = [self.date + datetime.timedelta(days=offset) for offset in range(4)]
+        with mock.patch.object(intervals, 'MAX_CACHED_DAYS', 3):
+            for day in days[:3]:
+                intervals.get_day_index(day)
+            intervals.get_day_index(days[0])
+            intervals.get_day_index(days[3])
+        self.assertEqual(list(intervals._indexes), [days[2], days[0], days[3]])
+
+
+    def test_table_schedule_skips_excluded_booking(self):
+        """
+        Tests the interval lookup directly, including overlapping legacy
+        bookings and ignoring the booking that is being edited.
+        """
+        schedule = intervals.TableSchedule([(600, 900, 1), (660, 700, 2), (1000, 1100, 3)])
+        self.assertTrue(schedule.conflicts(850, 950))
+        self.assertFalse(schedule.conflicts(900, 1000))
+        self.assertFalse(schedule.conflicts(850, 950, exclude=1))
+        self.assertTrue(schedule.conflicts(650, 670, exclude=1))
+
+        schedule.add(920, 980, 4)
+        self.assertTrue(schedule.conflicts(900, 1000))
+
+
+    def test_table_schedule_lookup_does_not_walk(self):
+        """
+        Tests that without a booking to skip, a lookup answers from the
+        running maximum alone, even behind one long early booking and
+        thousands of short ones, and that skipping still walks back.
+        """
+        class CountingList(list):
+            reads = 0
+
+            def __getitem__(self, position):
+                CountingList.reads += 1
+                return super().__getitem__(position)
+
+        schedule = intervals.TableSchedule(
+            [(0, 10_000, 1)] + [(start, start + 1, start + 1) for start in range(1, 5000)]
+        )
+        schedule.ends = CountingList(schedule.ends)
+        self.assertTrue(schedule.conflicts(6000, 6001))
+        self.assertEqual(CountingList.reads, 0)
+        self.assertFalse(schedule.conflicts(6000, 6001, exclude=1))
+
+
+class AvailabilitySearchTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a 2-seat and a 6-seat table and a customer to book them with.
+        """
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.small = Table.objects.create(tableNumber='A1', capacity=2)
+        self.large = Table.objects.create(tableNumber='B1', capacity=6)
+        self.date = datetime.date(2026, 3, 14)
+
+    def slot_times(self, slots, date=None):
+        """Returns the open start times found for one day."""
+        date = date or self.date
+        return [slot['time'] for slot in slots if slot['date'] == date]
+
+
+    def test_booked_stay_is_not_offered(self):
+        """
+        Tests that no start time is offered for a party of 6 that would
+        overlap a 19:00 booking of the only 6-seat table, and that slots
+        around it remain open.
+        """
+        Reservation.objects.create(
+            customer=self.customer, table=self.large, numberOfGuests=6,
+            reservationDate=self.date, reservationTime='19:00',
+        )
+        times = self.slot_times(find_open_slots(6, self.date, self.date))
+
+        self.assertIn(datetime.time(16, 30), times)
+        self.assertNotIn(datetime.time(16, 45), times)
+        self.assertNotIn(datetime.time(21, 15), times)
+        self.assertIn(datetime.time(21, 30), times)
+
+
+    def test_small_tables_are_masked_out(self):
+        """Tests that only tables big enough for the party are counted."""
+        slots = find_open_slots(2, self.date, self.date)
+        self.assertTrue(all(slot['tables'] == 2 for slot in slots))
+        slots = find_open_slots(3, self.date, self.date)
+        self.assertTrue(all(slot['tables'] == 1 for slot in slots))
+        self.assertEqual(find_open_slots(7, self.date, self.date), [])
+
+
+    def test_previous_night_spills_into_search(self):
+        """Tests that a booking running past midnight is seen by the next day."""
+        Reservation.objects.create(
+            customer=self.customer, table=self.large, numberOfGuests=6,
+            reservationDate=self.date - datetime.timedelta(days=1),
+            reservationTime='23:00', duration=13 * 60,
+        )
+        times = self.slot_times(find_open_slots(6, self.date, self.date))
+        self.assertNotIn(datetime.time(11, 45), times)
+        self.assertIn(datetime.time(12, 0), times)
+
+
+    def test_search_view_returns_json(self):
+        """Tests the endpoint for a valid and an invalid search."""
+        url = reverse('availability_search')
+        response = self.client.get(url, {'guests': 6, 'start': '2026-03-14', 'end': '2026-03-15'})
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()['slots']
+        self.assertEqual(
+            slots[0], {'date': '2026-03-14', 'time': '11:00', 'tables': 1, 'combinations': 0},
+        )
+        self.assertEqual(slots[-1]['date'], '2026-03-15')
+
+        response = self.client.get(url, {'guests': 6, 'start': '2026-03-15', 'end': '2026-03-14'})
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_search_rejects_a_too_long_stay(self):
+        """
+        Tests that the endpoint refuses stays longer than a day, and that a
+        stay running past the searched days does not break the search.
+        """
+        url = reverse('availability_search')
+        response = self.client.get(url, {'guests': 2, 'start': '2026-03-14', 'duration': 2000})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'guests': 2, 'start': '2026-03-14', 'duration': 24 * 60})
+        self.assertEqual(response.status_code, 200)
+
+        slots = find_open_slots(2, self.date, self.date, duration=3000)
+        self.assertEqual(slots[0]['time'], datetime.time(11, 0))
+
+
+    def test_benchmark_two_weeks_over_a_hundred_tables(self):
+        """
+        Benchmarks a 14-day search over 100 tables with three bookings per
+        table per day (4,200 bookings).
+
+        The search is expected to take tens of milliseconds, bulk fetch
+        included; the assertion leaves headroom for slow test machines.
+        """
+        Table.objects.all().delete()
+        tables = Table.objects.bulk_create(
+            Table(tableNumber=f'T{i}', capacity=2 + i % 7) for i in range(100)
+        )
+        Reservation.objects.bulk_create(
+            Reservation(
+                customer=self.customer, table=table, numberOfGuests=2,
+                reservationDate=self.date + datetime.timedelta(days=day),
+                reservationTime=datetime.time(hour, 15 * (table.pk % 4)), duration=90,
+            )
+            for table in tables
+            for day in range(14)
+            for hour in (12, 17, 20)
+        )
+
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            slots = find_open_slots(4, self.date, self.date + datetime.timedelta(days=13))
+            timings.append(time.perf_counter() - started)
+
+        self.assertEqual(len({slot['date'] for slot in slots}), 14)
+        self.assertLess(sorted(timings)[2], 0.25)
+
+
+
+class TableCombinationTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a floor with no table bigger than six seats: three 4-seat
+        tables and a 6-seat table in section A, two 6-seat tables in section
+        B, and a 2-seat table that belongs to no section.
+        """
+        intervals.clear()
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.date = datetime.date(2026, 3, 14)
+        self.time = datetime.time(19, 0)
+        self.a = [Table.objects.create(tableNumber=f'A{i}', capacity=4, section='A') for i in range(1, 4)]
+        self.a6 = Table.objects.create(tableNumber='A6', capacity=6, section='A')
+        self.b = [Table.objects.create(tableNumber=f'B{i}', capacity=6, section='B') for i in range(1, 3)]
+        self.loose = Table.objects.create(tableNumber='C1', capacity=2)
+
+
+    def test_large_party_gets_adjacent_tables(self):
+        """
+        Tests that a party of 12 is seated at pushed-together tables of one
+        section with no seat wasted, and that those tables are then held for
+        the whole stay.
+        """
+        reservation = book_table(self.customer, 12, self.date, self.time)
+        self.assertIsNotNone(reservation)
+        tables = reservation.tables()
+        self.assertEqual(sum(table.capacity for table in tables), 12)
+        self.assertEqual({table.section for table in tables}, {'B'})
+        self.assertEqual(reservation.table.capacity, 6)
+
+        # the linked table is taken too, so the next party of 12 goes to section A
+        second = book_table(self.customer, 12, self.date, datetime.time(20, 0))
+        self.assertEqual({table.section for table in second.tables()}, {'A'})
+        self.assertIsNone(book_table(self.customer, 12, self.date, datetime.time(20, 30)))
+
+
+    def test_combination_wastes_fewest_seats_then_uses_fewest_tables(self):
+        """
+        Tests the choice between combinations: for 10 guests, 6 + 4 in
+        section A wastes nothing, where 6 + 6 in section B wastes two seats
+        and 4 + 4 + 4 in section A needs a third table.
+        """
+        tables = find_table_combination(10, self.date, self.time)
+        self.assertEqual(tables, [self.a6, self.a[0]])
+
+        # section A is busy, so section B is the only way to seat 10
+        for table in self.a:
+            Reservation.objects.create(
+                customer=self.customer, table=table, numberOfGuests=4,
+                reservationDate=self.date, reservationTime=datetime.time(18, 30),
+            )
+        self.assertEqual(find_table_combination(10, self.date, self.time), self.b)
+
+
+    def test_tables_are_only_combined_within_a_section(self):
+        """
+        Tests that tables of different sections, or without a section, are
+        never pushed together.
+        """
+        self.assertEqual(best_combination([(1, 4, 'A'), (2, 4, 'B'), (3, 4, '')], 8), [])
+        self.assertEqual(best_combination([(1, 4, 'A'), (2, 4, 'A'), (3, 4, '')], 8), [1, 2])
+        self.assertIsNone(book_table(self.customer, 25, self.date, self.time))
+
+
+    def test_availability_search_counts_combinations(self):
+        """
+        Tests that the availability search offers a time to a party no single
+        table can seat when a section can take it, and stops offering it once
+        the linked tables are booked.
+        """
+        slots = {slot['time']: slot for slot in find_open_slots(12, self.date, self.date)}
+        self.assertEqual(slots[self.time]['tables'], 0)
+        self.assertEqual(slots[self.time]['combinations'], 2)
+
+        book_table(self.customer, 16, self.date, self.time)
+        book_table(self.customer, 12, self.date, self.time)
+        slots = {slot['time'] for slot in find_open_slots(12, self.date, self.date)}
+        self.assertNotIn(self.time, slots)
+
+
+    def test_editing_a_combined_booking(self):
+        """
+        Tests that a combined booking keeps its tables when it is edited but
+        still fits, and gives the linked tables back when the party shrinks
+        to fit the main table alone.
+        """
+        reservation = book_table(self.customer, 12, self.date, self.time)
+        url = reverse('edit_reservation', args=[reservation.id])
+        data = {
+            'numberOfGuests': 11,
+            'reservationDate': self.date,
+            'reservationTime': '19:00',
+            'duration': 180,
+        }
+        self.client.post(url, data=data)
+        reservation.refresh_from_db()
+        self.assertEqual(len(reservation.tables()), 2)
+
+        data['numberOfGuests'] = 5
+        self.client.post(url, data=data)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.linkedTables.count(), 0)
+        self.assertEqual(reservation.table.capacity, 6)
+
+
+    def test_benchmark_worst_case_party_sizes(self):
+        """
+        Benchmarks the combination search on a floor of 120 tables in six
+        sections of 20 mixed 2- to 8-seat tables, with every third table
+        already booked.
+
+        The party sizes include the ones that are hardest to place: a party
+        that needs every free table of a section, party sizes that no
+        combination matches exactly, and one more guest than any section can
+        seat. Each search is expected to take a few milliseconds, the
+        database included; the assertions on the median and the slowest
+        search leave headroom for slow machines.
+        """
+        Table.objects.all().delete()
+        tables = Table.objects.bulk_create(
+            Table(tableNumber=f'T{i}', capacity=2 + i % 7, section=f'S{i % 6}') for i in range(120)
+        )
+        Reservation.objects.bulk_create(
+            Reservation(
+                customer=self.customer, table=table, numberOfGuests=2,
+                reservationDate=self.date, reservationTime=self.time, duration=120,
+            )
+            for table in tables[::3]
+        )
+        intervals.clear()
+
+        section_seats = {}
+        for position, table in enumerate(tables):
+            if position % 3:
+                section_seats[table.section] = section_seats.get(table.section, 0) + table.capacity
+        largest = max(section_seats.values())
+
+        timings = []
+        for guests in (9, 37, 61, largest - 1, largest, largest + 1):
+            started = time.perf_counter()
+            chosen = find_table_combination(guests, self.date, self.time)
+            timings.append(time.perf_counter() - started)
+            if guests <= largest:
+                self.assertGreaterEqual(sum(table.capacity for table in chosen), guests)
+                self.assertEqual(len({table.section for table in chosen}), 1)
+            else:
+                self.assertEqual(chosen, [])
+
+        self.assertLess(sorted(timings)[len(timings) // 2], 0.05)
+        self.assertLess(max(timings), 0.5)
+
+
+class WaitlistTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a floor of one 4-seat table, booked at 19:00, and a few
+        customers to put on the waitlist.
+        """
+        intervals.clear()
+        self.date = datetime.date(2026, 3, 14)
+        self.table = Table.objects.create(tableNumber='A1', capacity=4)
+        self.customers = [
+            Customer.objects.create(firstName=name, lastName='Doe', phoneNumber=f'555-000{i}')
+            for i, name in enumerate(['John', 'Ann', 'Bob', 'Eve'])
+        ]
+        self.booking = Reservation.objects.create(
+            customer=self.customers[0], table=self.table, numberOfGuests=4,
+            reservationDate=self.date, reservationTime=datetime.time(19, 0),
+        )
+
+    def wait(self, customer, guests, hour, minute=0, date=None):
+        """Puts a party on the waitlist."""
+        return WaitlistEntry.objects.create(
+            customer=customer, numberOfGuests=guests,
+            requestedDate=date or self.date, requestedTime=datetime.time(hour, minute),
+        )
+
+
+    def test_cancellation_promotes_the_best_match(self):
+        """
+        Tests that cancelling a booking seats the waiting party whose request
+        is closest to the freed time, preferring the larger party on a tie,
+        and leaves the others waiting.
+        """
+        later = self.wait(self.customers[1], 2, 19, 30)
+        small = self.wait(self.customers[2], 2, 19)
+        best = self.wait(self.customers[3], 4, 19)
+        other_day = self.wait(self.customers[1], 4, 19, date=self.date + datetime.timedelta(days=3))
+
+        response = self.client.post(reverse('delete_reservation', args=[self.booking.id]), follow=True)
+        self.assertContains(response, 'was booked from the waitlist at 19:00 on Table A1')
+
+        best.refresh_from_db()
+        self.assertEqual(best.status, 'Promoted')
+        self.assertEqual(best.reservation.table, self.table)
+        self.assertEqual(best.reservation.reservationTime, datetime.time(19, 0))
+        for entry in (later, small, other_day):
+            entry.refresh_from_db()
+            self.assertEqual(entry.status, 'Waiting')
+
+
+    def test_freed_time_can_seat_several_parties(self):
+        """
+        Tests that a long freed stay is shared out: after the first party is
+        seated, the next one that still fits around it is seated as well.
+        """
+        self.booking.duration = 240
+        self.booking.save()
+        early = self.wait(self.customers[1], 2, 19)
+        late = self.wait(self.customers[2], 2, 20, 30)
+        clash = self.wait(self.customers[3], 2, 20)
+
+        with transaction.atomic():
+            self.booking.delete()
+            promoted = promote_waitlist(self.date, datetime.time(19, 0), 240, [self.table.pk])
+
+        self.assertEqual([entry.pk for entry in promoted], [early.pk, late.pk])
+        clash.refresh_from_db()
+        self.assertEqual(clash.status, 'Waiting')
+
+
+    def test_promotion_is_part_of_the_cancellation(self):
+        """
+        Tests that the cancellation and the promotion share one transaction:
+        if the promotion fails, the booking is not deleted either.
+        """
+        self.wait(self.customers[1], 2, 19)
+        with mock.patch('reservations.views.promote_waitlist', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('delete_reservation', args=[self.booking.id]))
+        self.assertTrue(Reservation.objects.filter(pk=self.booking.pk).exists())
+
+
+    def test_moving_a_booking_promotes_into_its_old_slot(self):
+        """
+        Tests that editing a booking to another time offers the time it held
+        before to the waitlist.
+        """
+        waiting = self.wait(self.customers[1], 3, 19)
+        self.client.post(reverse('edit_reservation', args=[self.booking.id]), data={
+            'numberOfGuests': 4,
+            'reservationDate': self.date,
+            'reservationTime': '12:00',
+            'duration': 120,
+        })
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, 'Promoted')
+        self.assertEqual(waiting.reservation.table, self.table)
+
+
+    def test_join_waitlist_from_booking_page(self):
+        """
+        Tests that the booking page offers the waitlist when no table is free
+        and puts the party on it, and that a party can be taken off again.
+        """
+        data = {
+            'first_name': 'Ann',
+            'last_name': 'Doe',
+            'phone_number': '555-0001',
+            'number_of_guests': 2,
+            'reservation_date': self.date,
+            'reservation_time': '19:30',
+        }
+        response = self.client.post(reverse('add_reservation'), data=data)
+        self.assertContains(response, 'Join the Waitlist')
+
+        response = self.client.post(reverse('add_reservation'), data={**data, 'join_waitlist': ''}, follow=True)
+        self.assertContains(response, 'has been added to the waitlist')
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual(entry.customer, self.customers[1])
+        self.assertEqual(entry.duration, 90)
+
+        self.client.post(reverse('remove_waitlist_entry', args=[entry.id]))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'Removed')
+        self.assertNotContains(self.client.get(reverse('waitlist')), 'Ann Doe')
+
+class ConcurrentBookingTests(TransactionTestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a small floor of ten 2-seat tables. Transactions are real in
+        this test class, so every thread sees the other threads' commits.
+        """
+        intervals.clear()
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        Table.objects.bulk_create(Table(tableNumber=f'T{i}', capacity=2) for i in range(10))
+        self.date = datetime.date(2026, 3, 14)
+
+
+    def test_parallel_bookings_never_share_a_table(self):
+        """
+        Stress test: 30 threads try to book the same slot on a floor of 10
+        tables at the same moment.
+
+        Exactly 10 bookings must succeed, every one on a different table,
+        and the other 20 must be turned away rather than double-booked, at
+        no less than one request per second.
+        """
+        threads_count = 30
+        start_together = threading.Barrier(threads_count)
+        results = []
+
+        def book():
+            try:
+                start_together.wait()
+                results.append(book_table(self.customer, 2, self.date, datetime.time(19, 0)))
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=book) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rate = threads_count / (time.perf_counter() - started)
+
+        # every request must be answered, booked or turned away, at a
+        # reasonable rate even though they all fight over the same rows
+        self.assertGreater(rate, 1, f"{rate:.1f} booking requests per second")
+
+        booked = [reservation for reservation in results if reservation is not None]
+        self.assertEqual(len(results), threads_count)
+        self.assertEqual(len(booked), 10)
+        self.assertEqual(Reservation.objects.count(), 10)
+        self.assertEqual(Reservation.objects.values('table').distinct().count(), 10)
+
+
+    def test_unique_constraint_rejects_duplicate_slot(self):
+        """Tests that the database refuses two active bookings of one table slot."""
+        table = Table.objects.first()
+        booking = {
+            'customer': self.customer, 'table': table, 'numberOfGuests': 2,
+            'reservationDate': self.date, 'reservationTime': '19:00',
+        }
+        Reservation.objects.create(**booking)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Reservation.objects.create(**booking)
+        Reservation.objects.create(status='Cancelled', **booking)
+
+
+class ReservationListTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a customer and a table, and a helper date for "today" so
+        past and upcoming reservations can be told apart.
+        """
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.table = Table.objects.create(tableNumber='A1', capacity=4)
+        self.today = timezone.localdate()
+
+    def add_reservations(self, count, first_day):
+        """Bulk-creates one reservation per hour slot, starting on first_day."""
+        Reservation.objects.bulk_create(
+            Reservation(
+                customer=self.customer, table=self.table, numberOfGuests=2, duration=90,
+                reservationDate=first_day + datetime.timedelta(days=i // 10),
+                reservationTime=datetime.time(12 + i % 10),
+            )
+            for i in range(count)
+        )
+
+
+    def test_past_reservations_are_hidden_by_default(self):
+        """Tests that the default list starts today and a start date widens it."""
+        self.add_reservations(3, self.today - datetime.timedelta(days=30))
+        self.add_reservations(2, self.today)
+
+        response = self.client.get(reverse('reservation_list'))
+        self.assertEqual(len(response.context['reservations']), 2)
+
+        start = self.today - datetime.timedelta(days=31)
+        response = self.client.get(reverse('reservation_list'), {'start': start})
+        self.assertEqual(len(response.context['reservations']), 5)
+
+
+    def test_cursor_walks_every_row_once(self):
+        """
+        Tests that following the "next page" links visits every upcoming
+        reservation exactly once and in order.
+        """
+        self.add_reservations(RESERVATIONS_PER_PAGE * 2 + 5, self.today)
+        seen = []
+        query = ''
+        while query is not None:
+            response = self.client.get(reverse('reservation_list') + '?' + query)
+            seen.extend(r.id for r in response.context['reservations'])
+            query = response.context['next_query']
+
+        expected = list(
+            Reservation.objects.order_by('reservationDate', 'reservationTime', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+
+    def test_page_cost_does_not_grow_with_history(self):
+        """
+        Tests that a page costs the same number of queries with 10 rows or
+        with 300 rows of history, i.e. there is no query per row for the
+        customer or the table.
+        """
+        def page_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('reservation_list'))
+            return len(queries)
+
+        self.add_reservations(10, self.today)
+        small = page_queries()
+        self.add_reservations(300, self.today + datetime.timedelta(days=1))
+        self.assertEqual(page_queries(), small)
+
+
+    def test_invalid_cursor_is_ignored(self):
+        """Tests that a broken cursor shows the first page instead of failing."""
+        self.add_reservations(2, self.today)
+        response = self.client.get(reverse('reservation_list'), {'after': 'garbage'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['reservations']), 2)
+
+
+class CustomerPhoneTests(TestCase):
+
+    def setUp(self):
+        """Runs before every single test. Creates a table to book."""
+        intervals.clear()
+        self.table = Table.objects.create(tableNumber='A1', capacity=4)
+
+    def booking_data(self, phone, time):
+        return {
+            'first_name': 'Jane',
+            'last_name': 'Doe',
+            'phone_number': phone,
+            'number_of_guests': 2,
+            'reservation_date': datetime.date.today(),
+            'reservation_time': time,
+        }
+
+
+    def test_phone_numbers_are_normalized(self):
+        """Tests the digits-only canonical form of phone numbers."""
+        self.assertEqual(normalize_phone('(555) 123-4567'), '5551234567')
+        self.assertEqual(normalize_phone('555 1234567'), '5551234567')
+        self.assertIsNone(normalize_phone('n/a'))
+        customer = Customer.objects.create(firstName='Jane', lastName='Doe', phoneNumber='555-2222')
+        self.assertEqual(customer.normalizedPhone, '5552222')
+
+
+    def test_same_number_in_another_format_reuses_the_customer(self):
+        """
+        Tests that booking twice with the same number written differently
+        attaches both reservations to one customer.
+        """
+        self.client.post(reverse('add_reservation'), data=self.booking_data('555-2222', '12:00'))
+        self.client.post(reverse('add_reservation'), data=self.booking_data('(555) 2222', '18:00'))
+
+        self.assertEqual(Customer.objects.count(), 1)
+        self.assertEqual(Reservation.objects.filter(customer__normalizedPhone='5552222').count(), 2)
+
+
+    def test_duplicate_phone_numbers_are_rejected(self):
+        """Tests that the database keeps canonical phone numbers unique."""
+        Customer.objects.create(firstName='Jane', lastName='Doe', phoneNumber='555-2222')
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Customer.objects.create(firstName='Janet', lastName='Doe', phoneNumber='5552222')
+
+
+    def test_merge_command_folds_duplicates_together(self):
+        """
+        Tests the merge command on customers that were bulk-loaded without a
+        canonical number: duplicates are deleted and their reservations are
+        moved to the customer that keeps the number.
+        """
+        customers = Customer.objects.bulk_create([
+            Customer(firstName='Jane', lastName='Doe', phoneNumber='555-2222'),
+            Customer(firstName='Jane', lastName='Doe', phoneNumber='555 2222'),
+            Customer(firstName='Bob', lastName='Roe', phoneNumber='555-3333'),
+            Customer(firstName='Janet', lastName='Doe', phoneNumber='(555) 2222'),
+        ])
+        for hour, customer in enumerate(customers):
+            Reservation.objects.create(
+                customer=customer, table=self.table, numberOfGuests=2,
+                reservationDate=datetime.date.today(), reservationTime=datetime.time(12 + hour),
+            )
+
+        out = StringIO()
+        call_command('merge_duplicate_customers', batch_size=2, stdout=out)
+
+        self.assertIn("Merged 2 duplicate customer(s).", out.getvalue())
+        self.assertEqual(Customer.objects.count(), 2)
+        jane = Customer.objects.get(normalizedPhone='5552222')
+        self.assertEqual(jane.id, customers[0].id)
+        self.assertEqual(jane.reservation_set.count(), 3)
+
+
+class ReservationImportTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a 2-seat and a 4-seat table and an existing customer, and a
+        temporary directory for the files to import.
+        """
+        intervals.clear()
+        self.small = Table.objects.create(tableNumber='A1', capacity=2)
+        self.large = Table.objects.create(tableNumber='B1', capacity=4)
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='555-1111')
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def import_file(self, name, content, *args):
+        """Writes content to a file and runs the import command on it."""
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'w', newline='') as stream:
+            stream.write(content)
+        out = StringIO()
+        call_command('import_reservations', path, *args, stdout=out)
+        return out.getvalue()
+
+
+    def test_csv_import_allocates_and_reports_rejects(self):
+        """
+        Tests a CSV import: existing customers are reused by phone number,
+        tables are allocated best-fit without overlaps, and bad rows or rows
+        that do not fit are listed with their line numbers.
+        """
+        output = self.import_file('bookings.csv', '\n'.join([
+            'first_name,last_name,phone_number,number_of_guests,reservation_date,reservation_time',
+            'John,Doe,(555) 1111,2,2026-03-14,19:00',
+            'Ann,Lee,555-2222,2,2026-03-14,19:30',
+            'Bob,Roe,555-3333,2,2026-03-14,20:00',
+            'Eve,Poe,555-4444,two,2026-03-14,20:00',
+            'Ann,Lee,555-2222,3,2026-03-15,12:00',
+        ]), '--chunk-size', '2')
+
+        self.assertIn("Imported 3 reservation(s), rejected 2", output)
+        self.assertIn("line 4: no table available", output)
+        self.assertIn("line 5: invalid value", output)
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(self.customer.reservation_set.get().table, self.small)
+        ann = Customer.objects.get(normalizedPhone='5552222')
+        self.assertEqual(
+            list(ann.reservation_set.order_by('reservationDate').values_list('table__tableNumber', flat=True)),
+            ['B1', 'B1'],
+        )
+
+
+    def test_jsonl_import_sees_existing_bookings(self):
+        """
+        Tests a JSONL import against a day that already has a booking, and
+        that the live allocation sees the imported rows afterwards.
+        """
+        Reservation.objects.create(
+            customer=self.customer, table=self.large, numberOfGuests=4,
+            reservationDate=datetime.date(2026, 3, 14), reservationTime='19:00',
+        )
+        self.assertEqual(find_available_table(2, datetime.date(2026, 3, 14), datetime.time(19, 0)), self.small)
+
+        rows = [
+            {'first_name': 'Ann', 'last_name': 'Lee', 'phone_number': '5552222', 'number_of_guests': 4,
+             'reservation_date': '2026-03-14', 'reservation_time': '20:00'},
+            {'first_name': 'Bob', 'last_name': 'Roe', 'phone_number': '5553333', 'number_of_guests': 2,
+             'reservation_date': '2026-03-14', 'reservation_time': '19:00', 'duration': 60},
+        ]
+        output = self.import_file('bookings.jsonl', '\n'.join(json.dumps(row) for row in rows))
+
+        self.assertIn("Imported 1 reservation(s), rejected 1", output)
+        self.assertIn("line 1: no table available", output)
+        self.assertIsNone(find_available_table(2, datetime.date(2026, 3, 14), datetime.time(19, 0)))
+
+
+class ReservationExportTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a table, a customer and three bookings over two days, one of
+        them cancelled.
+        """
+        intervals.clear()
+        table = Table.objects.create(tableNumber='A1', capacity=4)
+        customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='555-1111')
+        for date, time_of_day, status in [
+            ('2026-03-14', '19:00', 'Confirmed'),
+            ('2026-03-14', '21:30', 'Cancelled'),
+            ('2026-03-15', '12:00', 'Pending'),
+        ]:
+            Reservation.objects.create(
+                customer=customer, table=table, numberOfGuests=2,
+                reservationDate=date, reservationTime=time_of_day, status=status,
+            )
+
+    def read(self, response):
+        """Joins the chunks of a streamed response into one string."""
+        return b''.join(response.streaming_content).decode()
+
+
+    def test_csv_export_streams_filtered_rows(self):
+        """
+        Tests that the CSV export is streamed as a download, starts with the
+        header and only contains the bookings matching the filters.
+        """
+        response = self.client.get(reverse('export_reservations'), {'status': 'Confirmed'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('reservations.csv', response['Content-Disposition'])
+
+        lines = self.read(response).splitlines()
+        self.assertEqual(lines[0], 'id,date,time,duration,guests,status,table,first_name,last_name,phone_number')
+        self.assertEqual(len(lines), 2)
+        self.assertIn('2026-03-14,19:00:00,90,2,Confirmed,A1,John,Doe,555-1111', lines[1])
+
+        response = self.client.get(reverse('export_reservations'), {'start': '2026-03-15'})
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+
+
+    def test_export_sends_header_before_querying(self):
+        """
+        Tests that the header goes out before the bookings are read, so the
+        first bytes of a large export do not wait for the query.
+        """
+        response = self.client.get(reverse('export_reservations'))
+        chunks = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            header = next(chunks)
+        self.assertTrue(header.startswith(b'id,date'))
+        self.assertEqual(len(list(chunks)), 3)
+
+
+    def test_jsonl_export(self):
+        """
+        Tests that the JSON Lines export writes one object per booking, and
+        that an unknown format is rejected.
+        """
+        response = self.client.get(reverse('export_reservations'), {'format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['status'] for row in rows], ['Confirmed', 'Cancelled', 'Pending'])
+        self.assertEqual(rows[0]['date'], '2026-03-14')
+        self.assertEqual(rows[0]['table'], 'A1')
+
+        response = self.client.get(reverse('export_reservations'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TableStateTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a customer and two free tables.
+        """
+        self.customer = Customer.objects.create(firstName='Ada', lastName='Lee', phoneNumber='555-2222')
+        self.table = Table.objects.create(tableNumber='F1', capacity=4)
+        self.other = Table.objects.create(tableNumber='F2', capacity=2)
+
+
+    def test_transitions_follow_the_state_machine(self):
+        """
+        Tests that a table moves free -> reserved -> occupied -> free, that
+        moves its status does not allow are refused, and that seating a table
+        starts its countdown and freeing it stops it.
+        """
+        self.assertEqual(self.table.status, Table.Status.FREE)
+        self.assertTrue(self.table.reserve())
+        self.assertFalse(self.table.reserve())
+        self.assertIsNone(self.table.timeLeft)
+        self.assertTrue(self.table.seat())
+        self.assertFalse(self.table.reserve())
+        self.assertFalse(self.table.seat())
+        self.table.refresh_from_db()
+        self.assertIsNotNone(self.table.seatedAt)
+        self.assertEqual(self.table.timeLeft, 120)
+
+        self.assertTrue(self.table.release())
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.status, Table.Status.FREE)
+        self.assertIsNone(self.table.seatedAt)
+        self.assertIsNone(self.table.timeLeft)
+        self.assertFalse(self.table.release())
+
+        # a free table can be seated by walk-ins
+        self.assertTrue(self.other.seat())
+
+
+    def test_transition_checks_the_stored_status(self):
+        """
+        Tests that a move is checked against the status in the database, so
+        of two hosts seating the same table from stale copies only one wins.
+        """
+        first = Table.objects.get(pk=self.table.pk)
+        second = Table.objects.get(pk=self.table.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(first.seat())
+        self.assertFalse(second.seat())
+        self.assertEqual(second.status, Table.Status.FREE)
+        self.assertFalse(second.reserve())
+        self.assertEqual(Table.objects.get(pk=self.table.pk).status, Table.Status.OCCUPIED)
+
+
+    def test_accepting_keeps_an_occupied_table_occupied(self):
+        """
+        Tests that confirming a booking does not reserve a table that guests
+        are sitting at, but still confirms the booking.
+        """
+        self.table.seat()
+        reservation = Reservation.objects.create(
+            customer=self.customer, table=self.table, numberOfGuests=2,
+            reservationDate=datetime.date.today(), reservationTime='20:00',
+        )
+        self.client.get(reverse('accept_reservation', args=[reservation.id]))
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'Confirmed')
+        self.assertEqual(Table.objects.get(pk=self.table.pk).status, Table.Status.OCCUPIED)
+
+
+    def test_floor_view_shows_the_booked_tables(self):
+        """
+        Tests that the floor view shows the tables bookings are made on, so
+        accepting a booking shows up there, and that it filters by status.
+        """
+        reservation = Reservation.objects.create(
+            customer=self.customer, table=self.table, numberOfGuests=2,
+            reservationDate=datetime.date.today(), reservationTime='20:00',
+        )
+        self.client.get(reverse('accept_reservation', args=[reservation.id]))
+
+        response = self.client.get(reverse('table_list'))
+        self.assertEqual([table.tableNumber for table in response.context['tables']], ['F1', 'F2'])
+        self.assertIn(('reserved', 'Reserved', 1), response.context['status_counts'])
+        self.assertContains(response, 'Reserved')
+
+        response = self.client.get(reverse('table_list'), {'status': 'reserved'})
+        self.assertEqual([table.tableNumber for table in response.context['tables']], ['F1'])
+
+
+    def test_floor_view_transitions(self):
+        """
+        Tests that the floor view's seat and release actions move a table,
+        and that a refused move leaves it alone.
+        """
+        url = reverse('table_transition', args=[self.table.pk, 'seat'])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.client.post(url)
+        self.assertEqual(Table.objects.get(pk=self.table.pk).status, Table.Status.OCCUPIED)
+
+        self.client.post(reverse('table_transition', args=[self.table.pk, 'reserve']))
+        self.assertEqual(Table.objects.get(pk=self.table.pk).status, Table.Status.OCCUPIED)
+
+        self.client.post(reverse('table_transition', args=[self.table.pk, 'release']))
+        self.assertEqual(Table.objects.get(pk=self.table.pk).status, Table.Status.FREE)
+
+
+class TableCountdownTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates tables of a few sizes, some of them seated a while ago.
+        """
+        self.now = timezone.now()
+        Table.objects.bulk_create([
+            Table(tableNumber='T1', capacity=2, status='occupied', seatedAt=self.now - datetime.timedelta(minutes=30)),
+            Table(tableNumber='T2', capacity=4, status='occupied', seatedAt=self.now - datetime.timedelta(minutes=150)),
+            Table(
+                tableNumber='T3', capacity=4, status='occupied', turnMinutes=60,
+                seatedAt=self.now - datetime.timedelta(minutes=20, seconds=30),
+            ),
+            Table(tableNumber='T4', capacity=6, status='reserved'),
+            Table(tableNumber='T5', capacity=8),
+        ])
+
+
+    def test_time_left_counts_down_from_the_seating(self):
+        """
+        Tests that the minutes left come from when the table was seated and
+        its turn, rounded up and never negative, and that the batch gives
+        the same figures as each table alone.
+        """
+        tables = list(Table.objects.order_by('tableNumber'))
+        expected = [60, 0, 40, None, None]
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            self.assertEqual([table.timeLeft for table in tables], expected)
+        self.assertEqual(times_left(tables, now=self.now), expected)
+
+        rows = with_time_left(list(Table.objects.order_by('tableNumber').values()), now=self.now)
+        self.assertEqual([row['timeLeft'] for row in rows], expected)
+        self.assertEqual(times_left([]), [])
+
+
+    def test_time_left_needs_no_writes(self):
+        """
+        Tests that the countdown moves on by itself: reading the floor later
+        gives fewer minutes without anything having been saved.
+        """
+        tables = list(Table.objects.filter(status='occupied').order_by('tableNumber'))
+        later = self.now + datetime.timedelta(minutes=10)
+        self.assertEqual(times_left(tables, now=later), [50, 0, 30])
+
+
+    def test_batch_is_fast_for_a_large_floor(self):
+        """
+        Tests that the batch works out a few thousand tables quickly.
+        """
+        seated_at = self.now - datetime.timedelta(minutes=45)
+        tables = [
+            {'status': 'occupied', 'seatedAt': seated_at, 'turnMinutes': None, 'capacity': number % 8 + 1}
+            for number in range(5000)
+        ]
+        started = time.perf_counter()
+        left = times_left(tables, now=self.now)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(left[:3], [45, 45, 75])
+
+
+class TableMergeMigrationTests(TransactionTestCase):
+
+    migrate_from = [('reservations', '0009_waitlistentry'), ('tables', '0001_initial')]
+    migrate_to = [('reservations', '0010_table_status_timeleft_merge_floor_tables')]
+
+    def tearDown(self):
+        """
+        Runs after every single test.
+
+        Migrates the test database forward again for the other tests.
+        """
+        call_command('migrate', verbosity=0)
+
+
+    def test_floor_tables_are_merged(self):
+        """
+        Tests that the migration copies the floor tables into the
+        reservations tables, merging the ones with the same number and
+        keeping the busier status.
+        """
+        from django.db.migrations.executor import MigrationExecutor
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldTable = old_apps.get_model('reservations', 'Table')
+        FloorTable = old_apps.get_model('tables', 'Table')
+        OldTable.objects.create(tableNumber='1', capacity=4, status='available', section='Patio')
+        OldTable.objects.create(tableNumber='2', capacity=2, status='reserved')
+        FloorTable.objects.create(number=1, capacity=6, status='Occupied', time_left=20)
+        FloorTable.objects.create(number=2, capacity=2, status='Free')
+        FloorTable.objects.create(number=3, capacity=8, status='Reserved')
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        NewTable = executor.loader.project_state(self.migrate_to).apps.get_model('reservations', 'Table')
+        tables = {
+            table.tableNumber: (table.capacity, table.status, table.section, table.timeLeft)
+            for table in NewTable.objects.all()
+        }
+        self.assertEqual(tables, {
+            '1': (4, 'occupied', 'Patio', 20),
+            '2': (2, 'reserved', '', None),
+            '3': (8, 'reserved', '', None),
+        })
+
+
+    def test_entered_time_left_carries_over(self):
+        """
+        Tests that an occupied table keeps counting down from the minutes
+        that had been entered for it once they are derived instead.
+        """
+        from django.db.migrations.executor import MigrationExecutor
+
+        before = [('reservations', '0010_table_status_timeleft_merge_floor_tables')]
+        after = [('reservations', '0011_table_seatedat_turnminutes_remove_timeleft')]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        OldTable = executor.loader.project_state(before).apps.get_model('reservations', 'Table')
+        OldTable.objects.create(tableNumber='1', capacity=4, status='occupied', timeLeft=20)
+        OldTable.objects.create(tableNumber='2', capacity=2, status='occupied')
+        OldTable.objects.create(tableNumber='3', capacity=2, status='available', timeLeft=5)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(after)
+        tables = {table.tableNumber: table for table in Table.objects.all()}
+        self.assertEqual(tables['1'].timeLeft, 20)
+        self.assertEqual(tables['2'].timeLeft, 90)
+        self.assertIsNone(tables['3'].seatedAt)
@@ -0,0 +1,55 @@
+"""
+Works out how long occupied tables have left, for a whole floor at once.
+
+Nothing about the countdown is stored: an occupied table keeps when its
+guests sat down and how long they are expected to stay, and the minutes
+left are derived whenever the tables are read. The floor view therefore
+never shows a stale countdown and no background job has to write to the
+tables every minute. :attr:`reservations.models.Table.timeLeft` gives the
+figure for one table; :func:`times_left` gives the same figures for a list
+of tables in a few array operations.
+"""
+import numpy as np
+from django.utils import timezone
+
+from .models import Table, default_duration
+
+
+def _get(table, field):
+    return table[field] if isinstance(table, dict) else getattr(table, field)
+
+
+def times_left(tables, now=None):
+    """Returns the minutes left at each of a list of tables.
+
+    Args:
+        tables (list): ``Table`` instances or ``values()`` dicts, with at
+            least ``status``, ``seatedAt``, ``turnMinutes`` and
+            ``capacity``.
+        now (datetime): The moment to count from. Defaults to now.
+
+    Returns:
+        list: For each table in order, the whole minutes until it should be
+        free, rounded up and never below 0, or None if nobody is seated at
+        it; the same figures as :attr:`Table.timeLeft`.
+    """
+    now = (now or timezone.now()).timestamp()
+    count = len(tables)
+    seated = np.full(count, np.nan)
+    turns = np.empty(count)
+    for position, table in enumerate(tables):
+        seated_at = _get(table, 'seatedAt')
+        if _get(table, 'status') == Table.Status.OCCUPIED and seated_at is not None:
+            seated[position] = seated_at.timestamp()
+        turns[position] = _get(table, 'turnMinutes') or default_duration(_get(table, 'capacity'))
+
+    left = np.maximum(0, np.ceil((seated + turns * 60 - now) / 60))
+    return [None if np.isnan(minutes) else int(minutes) for minutes in left]
+
+
+def with_time_left(tables, now=None):
+    """Adds ``timeLeft`` to each of a list of ``values()`` dicts, worked
+    out by :func:`times_left`, and returns the list."""
+    for table, minutes in zip(tables, times_left(tables, now)):
+        table['timeLeft'] = minutes
+    return tables
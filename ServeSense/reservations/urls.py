@@ -7,5 +7,9 @@ urlpatterns = [
     path('edit/<int:reservation_id>/', views.edit_reservation, name='edit_reservation'),
     path('delete/<int:reservation_id>/', views.delete_reservation, name='delete_reservation'),
     path('accept/<int:reservation_id>/', views.accept_reservation, name='accept_reservation'),
+    path('availability/', views.availability_search, name='availability_search'),
+    path('export/', views.export_reservations, name='export_reservations'),
+    path('waitlist/', views.waitlist, name='waitlist'),
+    path('waitlist/remove/<int:entry_id>/', views.remove_waitlist_entry, name='remove_waitlist_entry'),
     path('', views.home, name='home'),  # Home page view
 ]
\ No newline at end of file
@@ -1,9 +1,30 @@
 # reservations/views.py
 
+from django.db import IntegrityError, OperationalError, transaction
+from django.http import JsonResponse
+from django.db.models import Prefetch, Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from .forms import ReservationForm, EditReservationForm
-from .models import Customer, Table, Reservation
+from django.utils import timezone
+from ServeSense.streaming import streaming_export
+from .forms import (
+    ReservationForm, EditReservationForm, AvailabilitySearchForm, ReservationListFilterForm, ReservationExportForm,
+)
+from .models import Customer, Table, Reservation, WaitlistEntry, default_duration
+from .customers import normalize_phone
+from .allocation import book_table, find_tables
+from .availability import find_open_slots
+from .intervals import get_day_index, to_minutes
+from .waitlist import promote_waitlist
+
+RESERVATIONS_PER_PAGE = 50
+
+# the columns reservation_list.html shows, so nothing else is loaded
+RESERVATION_LIST_FIELDS = (
+    'numberOfGuests', 'reservationDate', 'reservationTime', 'status',
+    'customer__firstName', 'customer__lastName', 'customer__phoneNumber',
+    'table__tableNumber',
+)
 
 def home(request):
     """Renders the main homepage of the application."""
@@ -17,58 +38,63 @@ def create_reservation(request):
     If the user is just visiting the page (a GET request), it shows a blank
     reservation form. If the user submits the form (a POST request), it first
     validates the data. If valid, it will either find an existing customer by
-    their phone number or create a new one. It then searches for a table that
-    is big enough and not already booked at that specific date and time. If an
-    available table is found, the reservation is created, a success message is
-    shown, and the user is redirected to the main reservation list. If no table
-    is free, it shows an error on the form.
+    their phone number (ignoring dashes, spaces and brackets) or create a new
+    one in the same atomic step. It then asks the allocation engine
+    to book the smallest table that is big enough and free for the whole stay;
+    the check and the insert happen in one transaction, so two hosts booking
+    at the same moment never get the same table. If a table was booked, a
+    success message is shown, and the user is redirected to the main
+    reservation list. If no table is free, it shows an error on the form
+    and offers to put the party on the waitlist instead. If the database is
+    too busy to complete the booking, it asks the user to try again.
     """
+    offer_waitlist = False
     if request.method == 'POST':
         form = ReservationForm(request.POST)
         if form.is_valid():
             data = form.cleaned_data
-            # create new customer or get existing one
-            try:
-                customer = Customer.objects.get(phoneNumber=data['phone_number'])
-            except Customer.DoesNotExist:
-                customer = Customer.objects.create(
-                    firstName=data['first_name'],
-                    lastName=data['last_name'],
-                    phoneNumber=data['phone_number']
-                )
-            
-            possible_tables = Table.objects.filter(capacity__gte=data['number_of_guests'])
-            
-            # Check for available tables at the requested time
-            found_table = None
-            for table in possible_tables:
-                is_reserved = Reservation.objects.filter(
-                    table=table, 
-                    reservationDate=data['reservation_date'], 
-                    reservationTime=data['reservation_time']
-                ).exists()  # is_reserved is True if the table is already booked
-                
-                if not is_reserved:
-                    found_table = table
-                    break
-            
-            if found_table:
-                Reservation.objects.create(
+            # create new customer or get existing one, matched on the digits of the phone number
+            customer, _ = Customer.objects.get_or_create(
+                normalizedPhone=normalize_phone(data['phone_number']),
+                defaults={
+                    'firstName': data['first_name'],
+                    'lastName': data['last_name'],
+                    'phoneNumber': data['phone_number'],
+                },
+            )
+
+            if 'join_waitlist' in request.POST:
+                WaitlistEntry.objects.create(
                     customer=customer,
-                    table=found_table,
                     numberOfGuests=data['number_of_guests'],
-                    reservationDate=data['reservation_date'],
-                    reservationTime=data['reservation_time']
+                    requestedDate=data['reservation_date'],
+                    requestedTime=data['reservation_time'],
                 )
+                messages.success(request, f"{customer.firstName} has been added to the waitlist.")
+                return redirect('waitlist')
+
+            try:
+                reservation = book_table(
+                    customer,
+                    data['number_of_guests'],
+                    data['reservation_date'],
+                    data['reservation_time'],
+                )
+            except OperationalError:
+                form.add_error(None, "The booking system is busy right now. Please try again in a moment.")
+                return render(request, 'add_reservation.html', {'form': form, 'offer_waitlist': False})
+
+            if reservation:
                 messages.success(request, "Reservation created successfully!")
                 return redirect('reservation_list')
             else:
                 form.add_error(None, "Sorry, no tables are available for that time and party size.")
+                offer_waitlist = True
     
     else:
         form = ReservationForm()
 
-    return render(request, 'add_reservation.html', {'form': form})
+    return render(request, 'add_reservation.html', {'form': form, 'offer_waitlist': offer_waitlist})
 
 
 def edit_reservation(request, reservation_id):
@@ -78,16 +104,71 @@ def edit_reservation(request, reservation_id):
     It finds the specific reservation to edit using the 'reservation_id'
     from the URL. If the user is just visiting the page, it displays the
     edit form pre-filled with that reservation's current details. If the
-    user submits the form with changes, it validates the data, saves the
-    updates, and redirects back to the main reservation list.
+    user submits the form with changes, it validates the data and checks
+    that the booked tables are still free for the new time and long enough
+    stay and still seat the party; if not, it moves the booking to another
+    free table, or to adjacent tables pushed together. It then saves
+    the updates and redirects back to the main reservation list, or shows an
+    error if no table can take the changed booking. If the booking moved,
+    the time it held before is offered to the waitlist in the same
+    transaction. If the database is too busy to lock the tables, it asks
+    the user to try again.
     """
     reservation = get_object_or_404(Reservation, id=reservation_id)
     if request.method == 'POST':
+        # the form writes the new values onto the instance, so keep the old slot
+        held = [reservation.table_id, *reservation.linkedTables.values_list('pk', flat=True)]
+        old_slot = (reservation.reservationDate, reservation.reservationTime, reservation.duration)
+        promoted = []
         form = EditReservationForm(request.POST, instance=reservation)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Reservation updated successfully!")
-            return redirect('reservation_list')
+            edited = form.save(commit=False)
+            if not edited.duration:
+                edited.duration = default_duration(edited.numberOfGuests)
+
+            try:
+                with transaction.atomic():
+                    # keep the same tables if they still fit, otherwise look for others
+                    tables = list(Table.objects.select_for_update().filter(pk__in=held).order_by('pk'))
+                    # re-read the day once the tables are locked; the search
+                    # below then finds this fresh index in the cache
+                    index = get_day_index(edited.reservationDate, refresh=True)
+                    start = to_minutes(edited.reservationTime)
+                    tables_still_fit = sum(table.capacity for table in tables) >= edited.numberOfGuests and all(
+                        index.is_free(table.pk, start, start + edited.duration, exclude=edited.pk)
+                        for table in tables
+                    )
+                    if tables_still_fit:
+                        tables.sort(key=lambda table: table.pk != edited.table_id)
+                        if tables[0].capacity >= edited.numberOfGuests:
+                            # the party shrank enough to release the pushed-together tables
+                            tables = tables[:1]
+                    else:
+                        tables = find_tables(
+                            edited.numberOfGuests,
+                            edited.reservationDate,
+                            edited.reservationTime,
+                            edited.duration,
+                            exclude=edited.pk,
+                        )
+                    if tables:
+                        edited.table = tables[0]
+                        edited.save()
+                        edited.linkedTables.set(tables[1:])
+                        new_slot = (edited.reservationDate, edited.reservationTime, edited.duration)
+                        if new_slot != old_slot or {table.pk for table in tables} != set(held):
+                            promoted = promote_waitlist(*old_slot, held)
+            except IntegrityError:
+                tables = []
+            except OperationalError:
+                form.add_error(None, "The booking system is busy right now. Please try again in a moment.")
+                return render(request, 'edit_reservation.html', {'form': form, 'reservation': reservation})
+
+            if tables:
+                messages.success(request, "Reservation updated successfully!")
+                _report_promotions(request, promoted)
+                return redirect('reservation_list')
+            form.add_error(None, "Sorry, no tables are available for that time and party size.")
     else:
         form = EditReservationForm(instance=reservation)
 
@@ -101,25 +182,74 @@ def delete_reservation(request, reservation_id):
     On a GET request, it shows a confirmation page to make sure the user
     really wants to delete the reservation. If the user confirms by submitting
     the form (a POST request), the reservation record is deleted from the
-    database, and the user is redirected back to the reservation list.
+    database, and the user is redirected back to the reservation list. The
+    freed table time is offered to the waitlist in the same transaction, so
+    a waiting party is booked into it before anyone else can take it.
     """
     reservation = get_object_or_404(Reservation, id=reservation_id)
     if request.method == 'POST':
-        reservation.delete()
+        with transaction.atomic():
+            held = [reservation.table_id, *reservation.linkedTables.values_list('pk', flat=True)]
+            reservation.delete()
+            promoted = promote_waitlist(
+                reservation.reservationDate, reservation.reservationTime, reservation.duration, held,
+            )
         messages.success(request, "Reservation has been cancelled.")
+        _report_promotions(request, promoted)
         return redirect('reservation_list')
 
     return render(request, 'delete_reservation.html', {'reservation': reservation})
 
 
+def _report_promotions(request, promoted):
+    """Tells the host which waiting parties were booked into freed time."""
+    for entry in promoted:
+        reservation = entry.reservation
+        messages.info(
+            request,
+            f"{entry.customer.firstName} {entry.customer.lastName} ({entry.numberOfGuests} guests) was booked "
+            f"from the waitlist at {reservation.reservationTime:%H:%M} on Table {reservation.table.tableNumber}.",
+        )
+
+
+def waitlist(request):
+    """
+    Displays the parties that are waiting for a table, by requested date and
+    time. Parties join the waitlist from the booking page when no table is
+    free, and are booked automatically when a reservation is cancelled or
+    moved and frees a table that can seat them.
+    """
+    entries = (
+        WaitlistEntry.objects.filter(status='Waiting')
+        .select_related('customer')
+        .order_by('requestedDate', 'requestedTime', 'createdAt')
+    )
+    return render(request, 'waitlist.html', {'entries': entries})
+
+
+def remove_waitlist_entry(request, entry_id):
+    """
+    Takes a party off the waitlist. Only POST requests change anything; the
+    entry is kept, marked as removed, so the history stays complete.
+    """
+    entry = get_object_or_404(WaitlistEntry, id=entry_id, status='Waiting')
+    if request.method == 'POST':
+        entry.status = 'Removed'
+        entry.save(update_fields=['status'])
+        messages.success(request, f"{entry.customer.firstName} has been removed from the waitlist.")
+    return redirect('waitlist')
+
+
 def accept_reservation(request, reservation_id):
     """
     Handles the business logic for confirming a reservation.
 
     This view is triggered when a manager "accepts" a reservation. It finds
-    the specific reservation, changes its status to 'Confirmed', and then finds
-    the associated table and updates its status to 'reserved'. Finally, it
-    redirects the manager back to the reservation list with a success message.
+    the specific reservation, changes its status to 'Confirmed', and then
+    moves the associated table from free to reserved. A table that is already
+    reserved or occupied keeps its status; the booking is confirmed all the
+    same. Finally, it redirects the manager back to the reservation list with
+    a success message.
     """
     reservation = get_object_or_404(Reservation, id=reservation_id)
     
@@ -127,24 +257,146 @@ def accept_reservation(request, reservation_id):
     reservation.save()
     
     table_to_update = reservation.table
-    table_to_update.status = 'reserved'
-    table_to_update.save()
-
-    messages.success(request, f"Reservation for {reservation.customer.firstName} has been Confirmed and Table {table_to_update.tableNumber} is now reserved.")
+    if table_to_update.reserve():
+        messages.success(request, f"Reservation for {reservation.customer.firstName} has been Confirmed and Table {table_to_update.tableNumber} is now reserved.")
+    else:
+        messages.success(request, f"Reservation for {reservation.customer.firstName} has been Confirmed. Table {table_to_update.tableNumber} is currently {table_to_update.get_status_display().lower()}.")
     
     return redirect('reservation_list')
 
 
 def reservation_list(request):
     """
-    Displays a complete list of all reservations.
+    Displays one page of reservations, upcoming ones by default.
 
-    This view fetches every Reservation object from the database, ordering them
-    by date and then by time so the earliest ones appear first. It then passes
-    this list to the 'reservation_list.html' template to be displayed in a table.
+    Unless a start date is given, only reservations from today onwards are
+    shown, ordered by date, time and id. Pages are fetched with a seek
+    cursor (the position of the last row shown) instead of an offset, so
+    every page costs the same single indexed query however much history has
+    piled up. Customer and table are joined into that query and only the
+    columns the template shows are loaded; the linked tables of combined
+    bookings are fetched for the whole page with one more query. The list
+    can also be narrowed to a date range and a status.
     """
-    all_reservations = Reservation.objects.order_by('reservationDate', 'reservationTime')
+    form = ReservationListFilterForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    reservations = (
+        Reservation.objects.select_related('customer', 'table')
+        .only(*RESERVATION_LIST_FIELDS)
+        .prefetch_related(Prefetch('linkedTables', queryset=Table.objects.only('tableNumber')))
+        .filter(reservationDate__gte=filters.get('start') or timezone.localdate())
+        .order_by('reservationDate', 'reservationTime', 'id')
+    )
+    if filters.get('end'):
+        reservations = reservations.filter(reservationDate__lte=filters['end'])
+    if filters.get('status'):
+        reservations = reservations.filter(status=filters['status'])
+    if filters.get('after'):
+        date, time, reservation_id = filters['after']
+        reservations = reservations.filter(
+            Q(reservationDate__gt=date)
+            | Q(reservationDate=date, reservationTime__gt=time)
+            | Q(reservationDate=date, reservationTime=time, id__gt=reservation_id)
+        )
+
+    # fetch one extra row to find out whether there is another page
+    page = list(reservations[:RESERVATIONS_PER_PAGE + 1])
+    query = request.GET.copy()
+    query.pop('after', None)
+    first_query = query.urlencode() if filters.get('after') else None
+    next_query = None
+    if len(page) > RESERVATIONS_PER_PAGE:
+        page = page[:RESERVATIONS_PER_PAGE]
+        last = page[-1]
+        query['after'] = f"{last.reservationDate.isoformat()},{last.reservationTime.isoformat()},{last.id}"
+        next_query = query.urlencode()
+
     context = {
-        'reservations': all_reservations
+        'reservations': page,
+        'filter_form': form,
+        'first_query': first_query,
+        'next_query': next_query,
     }
-    return render(request, 'reservation_list.html', context)
\ No newline at end of file
+    return render(request, 'reservation_list.html', context)
+
+
+# columns of the reservation export, as (header, field) pairs
+RESERVATION_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date', 'reservationDate'),
+    ('time', 'reservationTime'),
+    ('duration', 'duration'),
+    ('guests', 'numberOfGuests'),
+    ('status', 'status'),
+    ('table', 'table__tableNumber'),
+    ('first_name', 'customer__firstName'),
+    ('last_name', 'customer__lastName'),
+    ('phone_number', 'customer__phoneNumber'),
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_reservations(request):
+    """
+    Streams the reservation history as a CSV or JSON Lines download.
+
+    The rows are read with a lazy ``values_list`` iterator, a chunk at a
+    time, and written to the response as they arrive, so an export of ten
+    million rows needs no more memory than one of a thousand. The download
+    can be narrowed by date range and status, and the format is chosen with
+    ``?format=csv`` (the default) or ``?format=jsonl``.
+    """
+    form = ReservationExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    filters = form.cleaned_data
+
+    reservations = Reservation.objects.order_by('reservationDate', 'reservationTime', 'id')
+    if filters['start']:
+        reservations = reservations.filter(reservationDate__gte=filters['start'])
+    if filters['end']:
+        reservations = reservations.filter(reservationDate__lte=filters['end'])
+    if filters['status']:
+        reservations = reservations.filter(status=filters['status'])
+
+    rows = reservations.values_list(
+        *(field for _, field in RESERVATION_EXPORT_COLUMNS)
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return streaming_export(
+        'reservations',
+        [header for header, _ in RESERVATION_EXPORT_COLUMNS],
+        rows,
+        filters['format'] or 'csv',
+    )
+
+
+def availability_search(request):
+    """
+    Answers "when can I seat this party?" for a range of days as JSON.
+
+    It reads the party size and the date range from the query string (for
+    example ``?guests=6&start=2025-08-16&end=2025-08-17``) and returns every
+    start time at which at least one table, or one section of tables pushed
+    together, is big enough and free for the whole stay, together with how
+    many tables and sections could take the party. Invalid input is answered
+    with a 400 response listing the form errors.
+    """
+    form = AvailabilitySearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    data = form.cleaned_data
+    slots = find_open_slots(data['guests'], data['start'], data['end'], data['duration'])
+    return JsonResponse({
+        'guests': data['guests'],
+        'slots': [
+            {
+                'date': slot['date'].isoformat(),
+                'time': slot['time'].strftime('%H:%M'),
+                'tables': slot['tables'],
+                'combinations': slot['combinations'],
+            }
+            for slot in slots
+        ],
+    })
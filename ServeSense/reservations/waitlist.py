@@ -0,0 +1,133 @@
+import datetime
+import heapq
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .combinations import best_combination
+from .intervals import MINUTES_PER_DAY, get_day_index, to_minutes
+from .models import Reservation, Table, WaitlistEntry
+
+
+def _time_of(minutes):
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def promote_waitlist(freed_date, freed_time, duration, table_ids):
+    """Books waiting parties into table time that has just been freed.
+
+    Call this inside the transaction that cancels or moves the booking, after
+    the change has been written, so the freed time and the promotions are
+    committed together.
+
+    Only waiting parties whose requested stay overlaps the freed time can
+    gain from it, and only parties that the freed tables (or their section,
+    pushed together) can seat. They are fetched with one query on the
+    partial index of waiting entries and pushed onto a heap keyed by how far
+    their requested time is from the freed time, then by party size (largest
+    first) and by when they joined, so the best match is always popped next
+    without rescanning the list.
+    Each popped party is checked against the day's interval index and booked
+    if it fits; the index is updated as parties are seated.
+
+    Args:
+        freed_date (date): The day of the freed booking.
+        freed_time (time): Its start time.
+        duration (int): How many minutes were freed.
+        table_ids (list): Ids of the tables the booking held.
+
+    Returns:
+        list: The promoted waitlist entries, with their new ``reservation``.
+    """
+    freed_start = to_minutes(freed_time)
+    freed_end = freed_start + duration
+
+    tables = list(Table.objects.select_for_update().filter(pk__in=table_ids).order_by('capacity', 'tableNumber'))
+    sections = {table.section for table in tables if table.section}
+    neighbours = list(Table.objects.filter(section__in=sections)) if sections else []
+    section_seats = {}
+    for table in neighbours:
+        section_seats[table.section] = section_seats.get(table.section, 0) + table.capacity
+    most_seats = max([table.capacity for table in tables] + list(section_seats.values()), default=0)
+    if not most_seats:
+        return []
+
+    # waiting parties whose requested time falls before the end of the freed
+    # stay, on the freed day or, for a stay running past midnight, the next one
+    requested = Q(requestedDate=freed_date)
+    if freed_end < MINUTES_PER_DAY:
+        requested &= Q(requestedTime__lt=_time_of(freed_end))
+    else:
+        overflow = min(freed_end - MINUTES_PER_DAY, MINUTES_PER_DAY - 1)
+        requested |= Q(requestedDate=freed_date + datetime.timedelta(days=1), requestedTime__lt=_time_of(overflow))
+    entries = (
+        WaitlistEntry.objects.filter(requested, status='Waiting', numberOfGuests__lte=most_seats)
+        .select_related('customer')
+    )
+
+    queue = []
+    for entry in entries:
+        start = to_minutes(entry.requestedTime) + (entry.requestedDate - freed_date).days * MINUTES_PER_DAY
+        if start + entry.duration <= freed_start:
+            continue
+        priority = (abs(start - freed_start), -entry.numberOfGuests, entry.createdAt, entry.pk)
+        queue.append((priority, entry))
+    heapq.heapify(queue)
+
+    indexes = {}
+    promoted = []
+    while queue:
+        _, entry = heapq.heappop(queue)
+        date = entry.requestedDate
+        if date not in indexes:
+            # read once per day, after the freed tables were locked above
+            indexes[date] = get_day_index(date, refresh=True)
+        index = indexes[date]
+        start = to_minutes(entry.requestedTime)
+        end = start + entry.duration
+
+        # the smallest freed table that seats the party, else pushed-together tables
+        seated = next(
+            (
+                [table] for table in tables
+                if table.capacity >= entry.numberOfGuests and index.is_free(table.pk, start, end)
+            ),
+            None,
+        )
+        if seated is None:
+            by_id = {table.pk: table for table in neighbours}
+            chosen = best_combination(
+                (
+                    (table.pk, table.capacity, table.section)
+                    for table in neighbours if index.is_free(table.pk, start, end)
+                ),
+                entry.numberOfGuests,
+            )
+            seated = [by_id[table_id] for table_id in chosen]
+        if not seated:
+            continue
+
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    customer=entry.customer,
+                    table=seated[0],
+                    numberOfGuests=entry.numberOfGuests,
+                    reservationDate=date,
+                    reservationTime=entry.requestedTime,
+                    duration=entry.duration,
+                )
+                if len(seated) > 1:
+                    reservation.linkedTables.set(seated[1:])
+                entry.status = 'Promoted'
+                entry.reservation = reservation
+                entry.save(update_fields=['status', 'reservation'])
+        except IntegrityError:
+            continue
+
+        for day, other in indexes.items():
+            shift = (date - day).days * MINUTES_PER_DAY
+            for table in seated:
+                other.add(table.pk, start + shift, end + shift, reservation.pk)
+        promoted.append(entry)
+    return promoted
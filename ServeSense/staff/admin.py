@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import User
+from .models import User, AttendanceArchive, DailyHours, ShiftSchedule
 
 # Register your models here.
-admin.site.register(User)
\ No newline at end of file
+admin.site.register(User)
+admin.site.register(DailyHours)
+admin.site.register(AttendanceArchive)
+admin.site.register(ShiftSchedule)
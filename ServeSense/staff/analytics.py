@@ -0,0 +1,167 @@
+"""
+Sets the staff on the floor against the guests booked, hour by hour.
+
+All shifts and bookings of a date range are loaded with one query each and
+turned into per-minute counts with NumPy: every interval adds +1 where it
+starts and -1 where it ends, and a cumulative sum gives the count at every
+minute, so no query or Python loop runs per hour. Figures for days that are
+over, with nobody still clocked in from them, cannot change any more and are
+cached per day.
+"""
+import datetime
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from reservations.models import Reservation
+
+from .archive import archive_needed
+from .models import Attendance, AttendanceArchive
+
+MINUTES_PER_DAY = 24 * 60
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def _cache_key(day):
+    return f'staff:labor:{day.isoformat()}'
+
+
+def _staff_per_minute(first_day, days):
+    """Counts the people clocked in at every minute of a range of days.
+
+    Shifts still open count up to now. Archived shifts are read too when
+    the range reaches back into the archive.
+    """
+    origin = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min))
+    columns = days * MINUTES_PER_DAY
+    end = origin + datetime.timedelta(minutes=columns)
+    overlapping = Q(clock_in_time__lt=end) & (Q(clock_out_time__isnull=True) | Q(clock_out_time__gt=origin))
+    rows = list(Attendance.objects.filter(overlapping).values_list('clock_in_time', 'clock_out_time'))
+    if archive_needed(first_day):
+        rows += AttendanceArchive.objects.filter(overlapping).values_list('clock_in_time', 'clock_out_time')
+
+    delta = np.zeros(columns + 1, dtype=np.int32)
+    if rows:
+        now = timezone.now()
+        starts = np.fromiter(((clock_in - origin).total_seconds() for clock_in, _ in rows), dtype=np.float64, count=len(rows))
+        ends = np.fromiter(
+            (((clock_out or now) - origin).total_seconds() for _, clock_out in rows), dtype=np.float64, count=len(rows),
+        )
+        first = np.clip(np.floor(starts / 60), 0, columns).astype(np.int64)
+        last = np.clip(np.ceil(ends / 60), 0, columns).astype(np.int64)
+        np.add.at(delta, first, 1)
+        np.add.at(delta, last, -1)
+    return np.cumsum(delta)[:columns]
+
+
+def _covers_per_hour(first_day, days):
+    """Counts the guests booked in during every hour of a range of days.
+
+    A booking counts towards every hour its stay touches, as in
+    :func:`staff.scheduling.forecast_covers`. Cancelled bookings are left
+    out.
+    """
+    columns = days * 24
+    rows = list(
+        Reservation.objects.filter(
+            reservationDate__range=(first_day - ONE_DAY, first_day + datetime.timedelta(days=days - 1)),
+        )
+        .exclude(status='Cancelled')
+        .values_list('reservationDate', 'reservationTime', 'duration', 'numberOfGuests')
+    )
+    delta = np.zeros(columns + 1, dtype=np.int64)
+    if rows:
+        dates, times, durations, guests = zip(*rows)
+        minutes = np.fromiter(
+            ((date - first_day).days * MINUTES_PER_DAY + time.hour * 60 + time.minute for date, time in zip(dates, times)),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        ends = minutes + np.maximum(np.fromiter(durations, dtype=np.int64, count=len(rows)), 1)
+        first = np.clip(minutes // 60, 0, columns)
+        last = np.clip((ends - 1) // 60 + 1, 0, columns)
+        counts = np.fromiter(guests, dtype=np.int64, count=len(rows))
+        np.add.at(delta, first, counts)
+        np.add.at(delta, last, -counts)
+    return np.cumsum(delta)[:columns]
+
+
+def _hourly_figures(first_day, last_day):
+    """Works out the figures of every hour of a range of days in one pass.
+
+    Returns:
+        dict: A list of 24 hourly rows per day, keyed by day.
+    """
+    days = (last_day - first_day).days + 1
+    staff = _staff_per_minute(first_day, days).reshape(days, 24, 60).mean(axis=2)
+    covers = _covers_per_hour(first_day, days).reshape(days, 24)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(staff > 0, covers / staff, np.nan)
+
+    figures = {}
+    for offset in range(days):
+        day = first_day + datetime.timedelta(days=offset)
+        figures[day] = [
+            {
+                'day': day,
+                'hour': datetime.time(hour),
+                'staff': round(float(staff[offset, hour]), 2),
+                'covers': int(covers[offset, hour]),
+                'covers_per_staff': None if np.isnan(ratios[offset, hour]) else round(float(ratios[offset, hour]), 2),
+            }
+            for hour in range(24)
+        ]
+    return figures
+
+
+def closed_before():
+    """Returns the first day whose figures may still change.
+
+    That is today, or the day the oldest shift still open started on if
+    that is earlier. One query.
+    """
+    oldest_open = Attendance.objects.filter(clock_out_time__isnull=True).aggregate(
+        first=Min('clock_in_time'),
+    )['first']
+    today = timezone.localdate()
+    if oldest_open is None:
+        return today
+    return min(today, timezone.localtime(oldest_open).date())
+
+
+def labor_vs_covers(first_day, last_day):
+    """Sets the staff clocked in against the guests booked for every hour.
+
+    Days already in the cache are not recomputed; the rest are worked out
+    together with :func:`_hourly_figures`, and those that are closed (see
+    :func:`closed_before`) are added to the cache.
+
+    Args:
+        first_day (date): The first day to report.
+        last_day (date): The last day to report.
+
+    Returns:
+        list: One dict per hour, in time order, with ``day``, ``hour``,
+        ``staff`` (the average number of people clocked in during the
+        hour), ``covers`` (guests whose stay touches the hour) and
+        ``covers_per_staff`` (None when nobody was clocked in).
+    """
+    days = [first_day + datetime.timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+    closed = closed_before()
+    cached = cache.get_many([_cache_key(day) for day in days if day < closed])
+    figures = {day: cached[_cache_key(day)] for day in days if _cache_key(day) in cached}
+
+    missing = [day for day in days if day not in figures]
+    if missing:
+        computed = _hourly_figures(missing[0], missing[-1])
+        cache.set_many({_cache_key(day): computed[day] for day in missing if day < closed}, None)
+        figures.update((day, computed[day]) for day in missing)
+    return [row for day in days for row in figures[day]]
+
+
+def invalidate_labor_days(*days):
+    """Drops the cached figures of the given days, after a past shift was
+    added, corrected or removed by hand."""
+    cache.delete_many([_cache_key(day) for day in days if day])
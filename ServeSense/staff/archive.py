@@ -0,0 +1,73 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Attendance, AttendanceArchive
+
+
+def default_cutoff():
+    """Returns the moment before which closed shifts are archived, going by
+    ``ATTENDANCE_ARCHIVE_AFTER_DAYS``."""
+    return timezone.now() - datetime.timedelta(days=settings.ATTENDANCE_ARCHIVE_AFTER_DAYS)
+
+
+def archive_shifts(cutoff=None, batch_size=1000):
+    """Moves closed shifts that ended before ``cutoff`` to the archive.
+
+    Shifts are moved in batches of ``batch_size``, oldest first, each batch
+    copied with one ``bulk_create`` and removed with one ``DELETE`` in its
+    own short transaction, so clock-ins and the log are never held up for
+    long and an interrupted run loses nothing. Shifts that are still open
+    are never moved.
+
+    Args:
+        cutoff (datetime): Shifts that ended before this are archived.
+            Defaults to :func:`default_cutoff`.
+        batch_size (int): How many shifts to move per transaction.
+
+    Returns:
+        int: The number of shifts moved.
+    """
+    cutoff = cutoff or default_cutoff()
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Attendance.objects.select_for_update()
+                .filter(clock_out_time__lt=cutoff)
+                .order_by('id')
+                .values_list('id', 'staff_member_id', 'clock_in_time', 'clock_out_time')[:batch_size]
+            )
+            if not batch:
+                return moved
+            AttendanceArchive.objects.bulk_create(
+                (
+                    AttendanceArchive(
+                        id=shift_id, staff_member_id=staff_member_id,
+                        clock_in_time=clock_in_time, clock_out_time=clock_out_time,
+                    )
+                    for shift_id, staff_member_id, clock_in_time, clock_out_time in batch
+                ),
+                # a batch copied by a run that died before its delete
+                ignore_conflicts=True,
+            )
+            Attendance.objects.filter(pk__in=[row[0] for row in batch]).delete()
+        moved += len(batch)
+
+
+def archived_until():
+    """Returns the clock-in time of the newest archived shift, or None if
+    nothing has been archived. One lookup on the archive's time index."""
+    return AttendanceArchive.objects.aggregate(newest=Max('clock_in_time'))['newest']
+
+
+def archive_needed(first_day=None):
+    """Tells whether shifts that started on or after ``first_day``, or at
+    any time without a day, may be in the archive."""
+    newest = archived_until()
+    if newest is None:
+        return False
+    return first_day is None or first_day <= timezone.localtime(newest).date()
@@ -1,6 +1,10 @@
+import datetime
+
 from django import forms
 from .models import User
 from django.contrib.auth.forms import UserCreationForm
+from ServeSense.streaming import EXPORT_FORMATS
+from .payroll import PERIOD_CHOICES
 
 
 class EditStaffForm(forms.ModelForm):
@@ -16,4 +20,151 @@ class AddStaffForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         # Define the fields to be shown on the form
-        fields = ('username', 'first_name', 'last_name', 'phone_number', 'role')
\ No newline at end of file
+        fields = ('username', 'first_name', 'last_name', 'phone_number', 'role')
+
+
+class AttendanceLogFilterForm(forms.Form):
+    """
+    Validates the filters and the page cursor of the attendance log.
+
+    The date range applies to the day a shift started. The cursor
+    (``after``) is the clock-in time and id of the last row of the previous
+    page, written as ``2025-08-16T09:00:00+00:00,42``; the log is newest
+    first, so the next page starts right before that row.
+    """
+    start = forms.DateField(required=False, label="From", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, label="To", widget=forms.DateInput(attrs={'type': 'date'}))
+    staff_member = forms.ModelChoiceField(
+        queryset=User.objects.order_by('username'),
+        required=False,
+        label="Staff Member",
+        empty_label="Everyone",
+    )
+    after = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def clean_after(self):
+        after = self.cleaned_data['after']
+        if not after:
+            return None
+        try:
+            clock_in_time, shift_id = after.split(',')
+            return datetime.datetime.fromisoformat(clock_in_time), int(shift_id)
+        except ValueError:
+            raise forms.ValidationError("Invalid page cursor.")
+
+
+class AttendanceExportForm(forms.Form):
+    """
+    Validates the filters of the attendance export. Every filter is optional;
+    without any, every shift is exported as CSV.
+    """
+    SHIFT_CHOICES = (
+        ('', 'Any'),
+        ('open', 'Open'),
+        ('closed', 'Closed'),
+    )
+    start = forms.DateField(required=False, label="From")
+    end = forms.DateField(required=False, label="To")
+    shift = forms.ChoiceField(required=False, choices=SHIFT_CHOICES, label="Shift")
+    format = forms.ChoiceField(required=False, choices=EXPORT_FORMATS, label="Format")
+
+
+class PayrollReportForm(forms.Form):
+    """
+    Validates the options of the payroll report. Without dates, the report
+    covers the current pay period.
+    """
+    MAX_DAYS = 366
+
+    start = forms.DateField(required=False, label="From", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, label="To", widget=forms.DateInput(attrs={'type': 'date'}))
+    period = forms.ChoiceField(required=False, choices=PERIOD_CHOICES, label="Group By")
+    staff_member = forms.ModelChoiceField(
+        queryset=User.objects.order_by('username'),
+        required=False,
+        label="Staff Member",
+        empty_label="Everyone",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end:
+            if end < start:
+                raise forms.ValidationError("The end date must not be before the start date.")
+            if (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Please report at most {self.MAX_DAYS} days at a time.")
+        return cleaned_data
+
+
+class BulkClockForm(forms.Form):
+    """
+    Validates a crew clock-in or clock-out: the action and the ids of the
+    staff members, given as a list or as a comma-separated string.
+    """
+    MAX_STAFF = 200
+
+    ACTION_CHOICES = (
+        ('clock_in', 'Clock In'),
+        ('clock_out', 'Clock Out'),
+    )
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    staff_ids = forms.Field(label="Staff Members")
+
+    def clean_staff_ids(self):
+        staff_ids = self.cleaned_data['staff_ids']
+        if isinstance(staff_ids, str):
+            staff_ids = staff_ids.split(',')
+        try:
+            staff_ids = [int(staff_id) for staff_id in staff_ids]
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Staff ids must be a list of numbers.")
+        if not staff_ids:
+            raise forms.ValidationError("Please choose at least one staff member.")
+        if len(staff_ids) > self.MAX_STAFF:
+            raise forms.ValidationError(f"Please clock at most {self.MAX_STAFF} people at a time.")
+        return staff_ids
+
+
+class ScheduleForm(forms.Form):
+    """
+    Validates the range of days to plan a schedule for.
+    """
+    MAX_DAYS = 62
+
+    start = forms.DateField(label="From", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(label="To", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end:
+            if end < start:
+                raise forms.ValidationError("The end date must not be before the start date.")
+            if (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Please plan at most {self.MAX_DAYS} days at a time.")
+        return cleaned_data
+
+
+class LaborReportForm(forms.Form):
+    """
+    Validates the range of days of the labor against covers report.
+    Without dates, the report covers the last seven days.
+    """
+    MAX_DAYS = 62
+
+    start = forms.DateField(required=False, label="From", widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, label="To", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end:
+            if end < start:
+                raise forms.ValidationError("The end date must not be before the start date.")
+            if (end - start).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f"Please report at most {self.MAX_DAYS} days at a time.")
+        return cleaned_data
@@ -0,0 +1,33 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from staff.archive import archive_shifts
+
+
+class Command(BaseCommand):
+    """
+    Moves old closed shifts from the attendance table to the archive.
+
+    Meant to be run regularly, for example nightly from cron, so the live
+    attendance table only holds recent shifts. Shifts are moved in small
+    batches, each in its own transaction, so it can run while the
+    restaurant is open.
+    """
+    help = "Move closed shifts older than the retention window to the attendance archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ATTENDANCE_ARCHIVE_AFTER_DAYS,
+            help="Archive shifts that ended more than this many days ago.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Shifts moved per transaction.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--days must be zero or more and --batch-size at least one.")
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        moved = archive_shifts(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} shift(s)."))
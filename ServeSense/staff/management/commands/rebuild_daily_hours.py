@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from staff.payroll import rebuild_daily_hours
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the daily hours rollup from the attendance records.
+
+    The rollup is kept up to date as shifts are closed; run this after
+    shifts were corrected by hand, for the days the corrections touch, or
+    without dates to rebuild everything.
+    """
+    help = "Rebuild the daily hours rollup used by the payroll report."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            first_day = datetime.date.fromisoformat(options['start']) if options['start'] else None
+            last_day = datetime.date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as error:
+            raise CommandError(f"Invalid date: {error}")
+        rows = rebuild_daily_hours(first_day, last_day)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily hours row(s)."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0002_attendance"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["staff_member", "clock_in_time"], name="attendance_member_in_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                condition=models.Q(("clock_out_time__isnull", True)),
+                fields=["staff_member"],
+                name="attendance_open_shift_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["-clock_in_time", "-id"], name="attendance_log_seek_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:10
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Copied from staff.payroll so the migration does not depend on code that
+# may change later.
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def split_by_day(clock_in_time, clock_out_time):
+    start = timezone.localtime(clock_in_time)
+    end = timezone.localtime(clock_out_time)
+    pieces = []
+    while start < end:
+        midnight = timezone.make_aware(datetime.datetime.combine(start.date() + ONE_DAY, datetime.time.min))
+        piece_end = min(end, midnight)
+        pieces.append((start.date(), int((piece_end - start).total_seconds())))
+        start = piece_end
+    return pieces
+
+
+def fill_daily_hours(apps, schema_editor):
+    """Adds up the closed shifts per staff member and day. Same-day shifts
+    are summed by the database; shifts past midnight are split by day."""
+    Attendance = apps.get_model("staff", "Attendance")
+    DailyHours = apps.get_model("staff", "DailyHours")
+    shifts = Attendance.objects.filter(clock_out_time__isnull=False).annotate(
+        in_day=TruncDate("clock_in_time"), out_day=TruncDate("clock_out_time"),
+    )
+
+    totals = {}
+    same_day = (
+        shifts.filter(in_day=F("out_day"))
+        .values("staff_member_id", "in_day")
+        .annotate(worked=Sum(ExpressionWrapper(
+            F("clock_out_time") - F("clock_in_time"), output_field=DurationField(),
+        )))
+    )
+    for row in same_day:
+        totals[(row["staff_member_id"], row["in_day"])] = int(row["worked"].total_seconds())
+
+    overnight = shifts.exclude(in_day=F("out_day")).values_list(
+        "staff_member_id", "clock_in_time", "clock_out_time",
+    )
+    for staff_member_id, clock_in_time, clock_out_time in overnight:
+        for day, seconds in split_by_day(clock_in_time, clock_out_time):
+            key = (staff_member_id, day)
+            totals[key] = totals.get(key, 0) + seconds
+
+    DailyHours.objects.bulk_create(
+        DailyHours(staff_member_id=staff_member_id, day=day, seconds=seconds)
+        for (staff_member_id, day), seconds in totals.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0003_attendance_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyHours",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("seconds", models.PositiveIntegerField(default=0)),
+                (
+                    "staff_member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_hours",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="daily_hours_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("staff_member", "day"), name="unique_daily_hours"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_daily_hours, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:45
+
+from django.db import migrations, models
+
+
+def close_duplicate_open_shifts(apps, schema_editor):
+    """Keeps only the newest open shift of each staff member.
+
+    Duplicates come from repeated clock-ins, so the older ones are closed
+    at their own start time and add no hours.
+    """
+    Attendance = apps.get_model("staff", "Attendance")
+    open_shifts = Attendance.objects.filter(clock_out_time__isnull=True).order_by(
+        "staff_member_id", "-clock_in_time", "-id"
+    )
+    seen = set()
+    duplicates = []
+    for shift in open_shifts.only("id", "staff_member_id", "clock_in_time"):
+        if shift.staff_member_id in seen:
+            shift.clock_out_time = shift.clock_in_time
+            duplicates.append(shift)
+        seen.add(shift.staff_member_id)
+    Attendance.objects.bulk_update(duplicates, ["clock_out_time"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0004_dailyhours"),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_shifts, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance_open_shift_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="attendance",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("clock_out_time__isnull", True)),
+                fields=("staff_member",),
+                name="one_open_shift_per_member",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0005_attendance_one_open_shift_per_member"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("clock_in_time", models.DateTimeField()),
+                ("clock_out_time", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "staff_member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_shifts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["staff_member", "clock_in_time"],
+                        name="archive_member_in_idx",
+                    ),
+                    models.Index(
+                        fields=["-clock_in_time", "-id"], name="archive_log_seek_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
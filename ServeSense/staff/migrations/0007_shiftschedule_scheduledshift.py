@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0006_attendancearchive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShiftSchedule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("first_day", models.DateField()),
+                ("last_day", models.DateField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("shortfall_hours", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ScheduledShift",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("role", models.CharField(choices=[("Manager", "Manager"), ("Waiter", "Waiter"), ("Chef", "Chef")], max_length=50)),
+                ("day", models.DateField()),
+                ("start_time", models.TimeField()),
+                ("hours", models.PositiveSmallIntegerField()),
+                ("staff_member", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="scheduled_shifts", to=settings.AUTH_USER_MODEL)),
+                ("schedule", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="shifts", to="staff.shiftschedule")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["schedule", "day", "start_time"], name="scheduled_shift_day_idx")],
+            },
+        ),
+    ]
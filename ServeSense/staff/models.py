@@ -42,6 +42,144 @@ class Attendance(models.Model):
     clock_in_time = models.DateTimeField(auto_now_add=True)
     clock_out_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # a staff member's shifts in time order
+            models.Index(fields=['staff_member', 'clock_in_time'], name='attendance_member_in_idx'),
+            # serves the newest-first, seek-paginated attendance log
+            models.Index(fields=['-clock_in_time', '-id'], name='attendance_log_seek_idx'),
+        ]
+        constraints = [
+            # at most one open shift per person; also the index clock_out
+            # uses to find it, which closed shifts stay out of
+            models.UniqueConstraint(
+                fields=['staff_member'],
+                condition=models.Q(clock_out_time__isnull=True),
+                name='one_open_shift_per_member',
+            ),
+        ]
+
+    def __str__(self):
+        """Returns a string summary of the shift for the admin panel."""
+        return f"{self.staff_member.username} - Shift from {self.clock_in_time.strftime('%Y-%m-%d %H:%M')}"
+
+class DailyHours(models.Model):
+    """The time a staff member worked on one day, rolled up from their shifts.
+
+    Rows are kept up to date as shifts are closed (see :mod:`staff.payroll`),
+    so payroll reports read one row per person per day instead of every
+    shift. A shift that runs past midnight counts towards both days.
+
+    Attributes:
+        staff_member (User): Who worked.
+        day (DateField): The day the time was worked on, in local time.
+        seconds (int): The time worked on that day, in seconds.
+    """
+    staff_member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_hours')
+    day = models.DateField()
+    seconds = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['staff_member', 'day'], name='unique_daily_hours'),
+        ]
+        indexes = [
+            # serves the date-range reads of the payroll report
+            models.Index(fields=['day'], name='daily_hours_day_idx'),
+        ]
+
+    @property
+    def hours(self):
+        """Returns the time worked in hours."""
+        return self.seconds / 3600
+
+    def __str__(self):
+        """Returns a short summary for the admin panel."""
+        return f"{self.staff_member.username} - {self.day} - {self.hours:.2f}h"
+
+
+class AttendanceArchive(models.Model):
+    """A closed shift moved out of the Attendance table.
+
+    Shifts that ended long ago are moved here in batches (see
+    :mod:`staff.archive`), so the everyday queries on Attendance only cover
+    recent history. Rows keep the id they had in Attendance, and the
+    attendance log, the export and the payroll rebuild read this table too
+    when the requested range reaches back this far.
+
+    Attributes:
+        id (int): The id the shift had in Attendance.
+        staff_member (User): The User who worked the shift.
+        clock_in_time (DateTimeField): When the shift started.
+        clock_out_time (DateTimeField): When the shift ended.
+        archived_at (DateTimeField): When the shift was moved here.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    staff_member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_shifts')
+    clock_in_time = models.DateTimeField()
+    clock_out_time = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['staff_member', 'clock_in_time'], name='archive_member_in_idx'),
+            models.Index(fields=['-clock_in_time', '-id'], name='archive_log_seek_idx'),
+        ]
+
     def __str__(self):
         """Returns a string summary of the shift for the admin panel."""
-        return f"{self.staff_member.username} - Shift from {self.clock_in_time.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.staff_member.username} - Archived shift from {self.clock_in_time.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ShiftSchedule(models.Model):
+    """A rota planned from the forecast reservation demand.
+
+    Schedules are built by :func:`staff.scheduling.create_schedule`, which
+    works out how many people of each role every hour needs and assigns
+    shifts to meet that. Whatever could not be staffed is kept as a
+    shortfall so the manager can see where the rota is thin.
+
+    Attributes:
+        first_day (DateField): The first day planned.
+        last_day (DateField): The last day planned.
+        created_at (DateTimeField): When the schedule was planned.
+        shortfall_hours (int): Staff-hours of demand that no one was free
+            to cover.
+    """
+    first_day = models.DateField()
+    last_day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    shortfall_hours = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """Returns the planned range for the admin panel."""
+        return f"Schedule {self.first_day} to {self.last_day}"
+
+
+class ScheduledShift(models.Model):
+    """One planned shift of a schedule.
+
+    Attributes:
+        schedule (ShiftSchedule): The schedule the shift belongs to.
+        staff_member (User): Who is scheduled.
+        role (str): The role they are scheduled for.
+        day (DateField): The day of the shift.
+        start_time (TimeField): When the shift starts.
+        hours (int): How long the shift is, in whole hours.
+    """
+    schedule = models.ForeignKey(ShiftSchedule, on_delete=models.CASCADE, related_name='shifts')
+    staff_member = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scheduled_shifts')
+    role = models.CharField(max_length=50, choices=User.ROLE_CHOICES)
+    day = models.DateField()
+    start_time = models.TimeField()
+    hours = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            # serves the schedule page, day by day
+            models.Index(fields=['schedule', 'day', 'start_time'], name='scheduled_shift_day_idx'),
+        ]
+
+    def __str__(self):
+        """Returns a short summary for the admin panel."""
+        return f"{self.staff_member.username} - {self.role} - {self.day} {self.start_time:%H:%M} ({self.hours}h)"
@@ -0,0 +1,231 @@
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .archive import archive_needed
+from .models import Attendance, AttendanceArchive, DailyHours
+
+PERIOD_CHOICES = (
+    ('day', 'Day'),
+    ('week', 'Week'),
+    ('pay_period', 'Pay Period'),
+)
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def split_by_day(clock_in_time, clock_out_time):
+    """Splits a shift at every local midnight it runs past.
+
+    Returns:
+        list: ``(day, seconds)`` for each day the shift covers.
+    """
+    start = timezone.localtime(clock_in_time)
+    end = timezone.localtime(clock_out_time)
+    pieces = []
+    while start < end:
+        midnight = timezone.make_aware(datetime.datetime.combine(start.date() + ONE_DAY, datetime.time.min))
+        piece_end = min(end, midnight)
+        pieces.append((start.date(), int((piece_end - start).total_seconds())))
+        start = piece_end
+    return pieces
+
+
+def daily_totals(shifts, first_day=None, last_day=None):
+    """Adds up closed shifts per staff member and day.
+
+    Shifts that start and end on the same day, nearly all of them, are
+    summed by the database with one ``GROUP BY`` on the staff member and the
+    local date. Shifts that run past midnight are split in Python, so each
+    day only gets the part worked on it.
+
+    Args:
+        shifts (QuerySet): The ``Attendance`` rows to add up. Open shifts
+            are ignored.
+        first_day (date): Optionally, only count time worked from this day.
+        last_day (date): Optionally, only count time worked up to this day.
+
+    Returns:
+        dict: Seconds worked, keyed by ``(staff_member_id, day)``.
+    """
+    shifts = shifts.filter(clock_out_time__isnull=False).annotate(
+        in_day=TruncDate('clock_in_time'), out_day=TruncDate('clock_out_time'),
+    )
+    if first_day:
+        shifts = shifts.filter(out_day__gte=first_day)
+    if last_day:
+        shifts = shifts.filter(in_day__lte=last_day)
+
+    totals = {}
+    same_day = (
+        shifts.filter(in_day=F('out_day'))
+        .values('staff_member_id', 'in_day')
+        .annotate(worked=Sum(ExpressionWrapper(
+            F('clock_out_time') - F('clock_in_time'), output_field=DurationField(),
+        )))
+    )
+    for row in same_day:
+        totals[(row['staff_member_id'], row['in_day'])] = int(row['worked'].total_seconds())
+
+    overnight = shifts.exclude(in_day=F('out_day')).values_list(
+        'staff_member_id', 'clock_in_time', 'clock_out_time',
+    )
+    for staff_member_id, clock_in_time, clock_out_time in overnight:
+        for day, seconds in split_by_day(clock_in_time, clock_out_time):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            key = (staff_member_id, day)
+            totals[key] = totals.get(key, 0) + seconds
+    return totals
+
+
+def _add_seconds(staff_member_id, day, seconds):
+    rollup = DailyHours.objects.filter(staff_member_id=staff_member_id, day=day)
+    if rollup.update(seconds=F('seconds') + seconds):
+        return
+    try:
+        with transaction.atomic():
+            DailyHours.objects.create(staff_member_id=staff_member_id, day=day, seconds=seconds)
+    except IntegrityError:
+        # another clock-out created the row first
+        rollup.update(seconds=F('seconds') + seconds)
+
+
+def record_shift(shift):
+    """Adds a shift that has just been closed to the daily rollup.
+
+    Each day the shift covers gets one ``UPDATE ... SET seconds = seconds +
+    n``, or an insert the first time the person works that day, so the
+    rollup stays right when several people clock out at once. Call this in
+    the transaction that closes the shift.
+    """
+    for day, seconds in split_by_day(shift.clock_in_time, shift.clock_out_time):
+        _add_seconds(shift.staff_member_id, day, seconds)
+
+
+def record_shifts(shifts):
+    """Adds many shifts that have just been closed to the daily rollup.
+
+    Used when a whole crew clocks out at once. The rows for the days the
+    shifts cover are read and locked with one query, then updated with one
+    ``bulk_update`` and the missing ones inserted with one ``bulk_create``.
+    Call this in the transaction that closes the shifts; each person can
+    only have one open shift, so nobody else adds to the same rows
+    meanwhile.
+    """
+    totals = {}
+    for shift in shifts:
+        for day, seconds in split_by_day(shift.clock_in_time, shift.clock_out_time):
+            key = (shift.staff_member_id, day)
+            totals[key] = totals.get(key, 0) + seconds
+    if not totals:
+        return
+
+    existing = DailyHours.objects.select_for_update().filter(
+        staff_member_id__in={staff_member_id for staff_member_id, _ in totals},
+        day__in={day for _, day in totals},
+    )
+    changed = []
+    for rollup in existing:
+        seconds = totals.pop((rollup.staff_member_id, rollup.day), None)
+        if seconds is not None:
+            rollup.seconds += seconds
+            changed.append(rollup)
+    DailyHours.objects.bulk_update(changed, ['seconds'])
+    DailyHours.objects.bulk_create(
+        DailyHours(staff_member_id=staff_member_id, day=day, seconds=seconds)
+        for (staff_member_id, day), seconds in totals.items()
+    )
+
+
+def rebuild_daily_hours(first_day=None, last_day=None):
+    """Recomputes the rollup from the shifts, for a range of days or all.
+
+    Use this after shifts were edited or deleted by hand. Archived shifts
+    are counted too when the range reaches back into the archive. The old
+    rows of the range are replaced in one transaction.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    totals = daily_totals(Attendance.objects.all(), first_day, last_day)
+    if archive_needed(first_day):
+        for key, seconds in daily_totals(AttendanceArchive.objects.all(), first_day, last_day).items():
+            totals[key] = totals.get(key, 0) + seconds
+    with transaction.atomic():
+        stale = DailyHours.objects.all()
+        if first_day:
+            stale = stale.filter(day__gte=first_day)
+        if last_day:
+            stale = stale.filter(day__lte=last_day)
+        stale.delete()
+        DailyHours.objects.bulk_create(
+            DailyHours(staff_member_id=staff_member_id, day=day, seconds=seconds)
+            for (staff_member_id, day), seconds in totals.items()
+        )
+    return len(totals)
+
+
+def pay_period_start(day):
+    """Returns the first day of the pay period ``day`` falls in."""
+    first = datetime.date.fromisoformat(settings.PAYROLL_PERIOD_START)
+    length = settings.PAYROLL_PERIOD_DAYS
+    return first + datetime.timedelta(days=(day - first).days // length * length)
+
+
+def hours_report(first_day, last_day, period='day', staff_member=None):
+    """Sums the rolled-up hours per staff member and day, week or pay period.
+
+    Reads only the rollup: days and weeks are grouped by the database, pay
+    periods by bucketing the daily totals, which are a few hundred rows
+    for a period. Shifts that are still open are not counted yet.
+
+    Args:
+        first_day (date): The first day to include.
+        last_day (date): The last day to include.
+        period (str): ``'day'``, ``'week'`` (starting on Monday) or
+            ``'pay_period'``.
+        staff_member (User): Optionally, only report this person.
+
+    Returns:
+        list: One dict per person and period, ordered by period and
+        username, with ``staff_member_id``, ``username``, ``full_name``,
+        ``period`` (its first day) and ``hours``.
+    """
+    rollups = DailyHours.objects.filter(day__range=(first_day, last_day))
+    if staff_member:
+        rollups = rollups.filter(staff_member=staff_member)
+    if period == 'week':
+        rollups = rollups.annotate(period=TruncWeek('day'))
+    else:
+        rollups = rollups.annotate(period=F('day'))
+    rows = rollups.values(
+        'period', 'staff_member_id', 'staff_member__username',
+        'staff_member__first_name', 'staff_member__last_name',
+    ).annotate(total=Sum('seconds'))
+
+    report = {}
+    for row in rows:
+        period_start = pay_period_start(row['period']) if period == 'pay_period' else row['period']
+        key = (period_start, row['staff_member__username'])
+        if key not in report:
+            full_name = f"{row['staff_member__first_name']} {row['staff_member__last_name']}".strip()
+            report[key] = {
+                'staff_member_id': row['staff_member_id'],
+                'username': row['staff_member__username'],
+                'full_name': full_name,
+                'period': period_start,
+                'seconds': 0,
+            }
+        report[key]['seconds'] += row['total']
+
+    results = []
+    for key in sorted(report):
+        entry = report[key]
+        entry['hours'] = round(entry.pop('seconds') / 3600, 2)
+        results.append(entry)
+    return results
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import User
+
+ROSTER_CACHE_KEY = 'staff:roster'
+
+
+def get_roster():
+    """Returns the staff list shown on the overview page, from the cache.
+
+    The roster is built with one query the first time it is asked for and
+    then served from the cache, with no query at all, until a clock-in,
+    clock-out or staff change invalidates it (see :func:`invalidate_roster`).
+
+    Returns:
+        dict: ``staff``, one dict per staff member ordered by username with
+        ``id``, ``username``, ``full_name``, ``role`` and ``is_on_duty``,
+        and ``on_duty``, the set of ids of the staff members on duty.
+    """
+    roster = cache.get(ROSTER_CACHE_KEY)
+    if roster is None:
+        staff = [
+            {
+                'id': staff_id,
+                'username': username,
+                'full_name': f"{first_name} {last_name}".strip(),
+                'role': role,
+                'is_on_duty': is_on_duty,
+            }
+            for staff_id, username, first_name, last_name, role, is_on_duty in User.objects.order_by('username').values_list(
+                'id', 'username', 'first_name', 'last_name', 'role', 'is_on_duty',
+            )
+        ]
+        roster = {
+            'staff': staff,
+            'on_duty': {member['id'] for member in staff if member['is_on_duty']},
+        }
+        cache.set(ROSTER_CACHE_KEY, roster, None)
+    return roster
+
+
+def invalidate_roster():
+    """Drops the cached roster after staff members or their duty changed.
+
+    Called by the staff signals and by the clock-in and clock-out functions,
+    which write with ``UPDATE`` and so send no signals. The roster is
+    dropped again once the transaction commits, in case another request
+    rebuilt it from the old rows in the meantime.
+    """
+    cache.delete(ROSTER_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(ROSTER_CACHE_KEY))
@@ -0,0 +1,195 @@
+"""
+Plans shifts to meet the demand forecast from the reservation book.
+
+Demand is counted in covers: the guests seated during each hour of the day,
+taken from the bookings. Each role has a ratio of covers one person can look
+after (``STAFFING_COVERS_PER_STAFF``), which turns the covers into the number
+of people of that role every hour needs.
+
+Shifts are handed out greedily, a day at a time: the earliest hour that is
+still short gets a shift starting at that hour, given to whoever of the role
+has worked the fewest hours that week. Starting shifts at the first
+uncovered hour needs the fewest shifts to cover a day, and keeping the staff
+on a heap ordered by their hours makes each pick ``O(log staff)``, so a month
+for a hundred people plans in milliseconds. Nobody works twice on one day or
+past ``SCHEDULE_MAX_WEEKLY_HOURS`` in a week; demand left over is counted as
+a shortfall.
+"""
+import datetime
+import heapq
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from reservations.models import Reservation
+
+from .models import DailyHours, ScheduledShift, ShiftSchedule, User
+
+HOURS_PER_DAY = 24
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def forecast_covers(first_day, last_day):
+    """Counts the guests booked in during each hour of a range of days.
+
+    A booking counts towards every hour its stay touches, including the
+    hours after midnight of a stay that runs late. Cancelled bookings are
+    left out. One query.
+
+    Returns:
+        dict: A list of 24 cover counts per day, keyed by day.
+    """
+    covers = {
+        first_day + datetime.timedelta(days=offset): [0] * HOURS_PER_DAY
+        for offset in range((last_day - first_day).days + 1)
+    }
+    bookings = (
+        # the day before too, for stays running past midnight into the range
+        Reservation.objects.filter(reservationDate__range=(first_day - ONE_DAY, last_day))
+        .exclude(status='Cancelled')
+        .values_list('reservationDate', 'reservationTime', 'duration', 'numberOfGuests')
+    )
+    for date, time, duration, guests in bookings:
+        start = time.hour * 60 + time.minute
+        end = start + max(duration, 1)
+        for hour in range(start // 60, (end - 1) // 60 + 1):
+            day = date + datetime.timedelta(days=hour // HOURS_PER_DAY)
+            if day in covers:
+                covers[day][hour % HOURS_PER_DAY] += guests
+    return covers
+
+
+def plan_shifts(needed, staff_ids, shift_hours, max_weekly_hours):
+    """Assigns shifts of one role to cover its hourly demand.
+
+    Args:
+        needed (dict): A list of 24 head counts per day, keyed by day.
+        staff_ids (list): Ids of the staff members who can work the role.
+        shift_hours (int): How long every shift is.
+        max_weekly_hours (int): The most anyone works in a week, Monday to
+            Sunday.
+
+    Returns:
+        tuple: ``(shifts, shortfall)``, the planned shifts as ``(staff id,
+        day, start hour)`` and the staff-hours of demand left uncovered.
+    """
+    shift_hours = min(shift_hours, HOURS_PER_DAY)
+    totals = dict.fromkeys(staff_ids, 0)
+    shifts = []
+    shortfall = 0
+    week = None
+    for day in sorted(needed):
+        if day.isocalendar()[:2] != week:
+            week = day.isocalendar()[:2]
+            # (hours this week, hours so far, id): the least worked first
+            available = [(0, totals[staff_id], staff_id) for staff_id in staff_ids]
+            heapq.heapify(available)
+
+        remaining = list(needed[day])
+        working = []
+        hour = 0
+        while True:
+            hour = next((later for later in range(hour, HOURS_PER_DAY) if remaining[later] > 0), None)
+            if hour is None:
+                break
+            if not available or available[0][0] + shift_hours > max_weekly_hours:
+                shortfall += sum(remaining)
+                break
+            week_hours, total, staff_id = heapq.heappop(available)
+            start = min(hour, HOURS_PER_DAY - shift_hours)
+            for covered in range(start, start + shift_hours):
+                if remaining[covered]:
+                    remaining[covered] -= 1
+            shifts.append((staff_id, day, start))
+            totals[staff_id] = total + shift_hours
+            working.append((week_hours + shift_hours, total + shift_hours, staff_id))
+
+        # back in line for tomorrow, behind those who worked less
+        for entry in working:
+            heapq.heappush(available, entry)
+    return shifts, shortfall
+
+
+def create_schedule(first_day, last_day):
+    """Plans and saves a schedule for a range of days.
+
+    The covers are forecast with :func:`forecast_covers`, turned into head
+    counts with each role's ratio, and planned with :func:`plan_shifts`
+    over the active staff of that role. The shifts are saved with one
+    ``bulk_create``.
+
+    Returns:
+        ShiftSchedule: The new schedule.
+    """
+    covers = forecast_covers(first_day, last_day)
+    ratios = settings.STAFFING_COVERS_PER_STAFF
+    staff = {role: [] for role in ratios}
+    for staff_id, role in User.objects.filter(is_active=True, role__in=ratios).order_by('id').values_list('id', 'role'):
+        staff[role].append(staff_id)
+
+    shift_hours = settings.SCHEDULE_SHIFT_HOURS
+    with transaction.atomic():
+        schedule = ShiftSchedule.objects.create(first_day=first_day, last_day=last_day)
+        rows = []
+        for role, covers_per_staff in ratios.items():
+            needed = {
+                day: [math.ceil(count / covers_per_staff) for count in hours]
+                for day, hours in covers.items()
+            }
+            shifts, shortfall = plan_shifts(needed, staff[role], shift_hours, settings.SCHEDULE_MAX_WEEKLY_HOURS)
+            schedule.shortfall_hours += shortfall
+            rows.extend(
+                ScheduledShift(
+                    schedule=schedule, staff_member_id=staff_id, role=role, day=day,
+                    start_time=datetime.time(start), hours=shift_hours,
+                )
+                for staff_id, day, start in shifts
+            )
+        ScheduledShift.objects.bulk_create(rows, batch_size=1000)
+        schedule.save(update_fields=['shortfall_hours'])
+    return schedule
+
+
+def compare_schedule(schedule):
+    """Sets the planned hours of a schedule against the hours worked.
+
+    Worked hours come from the daily hours rollup (see
+    :mod:`staff.payroll`), so shifts still open are not counted yet. People
+    who worked on a day they were not scheduled are listed too. Two queries.
+
+    Returns:
+        list: One dict per person and day, ordered by day and username,
+        with ``staff_member_id``, ``username``, ``full_name``, ``day``,
+        ``scheduled_hours``, ``worked_hours`` and ``difference`` (worked
+        minus scheduled).
+    """
+    names = ('staff_member_id', 'staff_member__username', 'staff_member__first_name', 'staff_member__last_name')
+    rows = {}
+
+    def row_for(values):
+        key = (values['day'], values['staff_member__username'])
+        if key not in rows:
+            rows[key] = {
+                'staff_member_id': values['staff_member_id'],
+                'username': values['staff_member__username'],
+                'full_name': f"{values['staff_member__first_name']} {values['staff_member__last_name']}".strip(),
+                'day': values['day'],
+                'scheduled_hours': 0,
+                'worked_hours': 0,
+            }
+        return rows[key]
+
+    for values in schedule.shifts.values(*names, 'day').annotate(planned=Sum('hours')):
+        row_for(values)['scheduled_hours'] = values['planned']
+    worked = DailyHours.objects.filter(day__range=(schedule.first_day, schedule.last_day)).values(*names, 'day', 'seconds')
+    for values in worked:
+        row_for(values)['worked_hours'] = round(values['seconds'] / 3600, 2)
+
+    results = []
+    for key in sorted(rows):
+        row = rows[key]
+        row['difference'] = round(row['worked_hours'] - row['scheduled_hours'], 2)
+        results.append(row)
+    return results
@@ -0,0 +1,148 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Attendance, User
+from .payroll import record_shift, record_shifts
+from .roster import invalidate_roster
+
+
+def start_shift(staff_member_id):
+    """Clocks a staff member in.
+
+    The on-duty flag is set with one ``UPDATE`` of that column only, and the
+    shift is inserted in the same transaction. The database allows only one
+    open shift per person, so a repeated or concurrent clock-in leaves the
+    open shift alone instead of starting a second one.
+
+    Returns:
+        Attendance: The new shift, or None if a shift was already open.
+
+    Raises:
+        User.DoesNotExist: If there is no such staff member.
+    """
+    with transaction.atomic():
+        if not User.objects.filter(pk=staff_member_id).update(is_on_duty=True):
+            raise User.DoesNotExist(f"No staff member with id {staff_member_id}.")
+        invalidate_roster()
+        try:
+            with transaction.atomic():
+                return Attendance.objects.create(staff_member_id=staff_member_id)
+        except IntegrityError:
+            # already clocked in
+            return None
+
+
+def end_shift(staff_member_id):
+    """Clocks a staff member out.
+
+    The open shift is closed with a conditional ``UPDATE ... WHERE
+    clock_out_time IS NULL``, so of two concurrent clock-outs only one
+    closes it and adds its hours to the payroll rollup; the other finds
+    nothing left to do. The on-duty flag is cleared with one ``UPDATE`` of
+    that column in the same transaction.
+
+    Returns:
+        Attendance: The closed shift, or None if no shift was open.
+
+    Raises:
+        User.DoesNotExist: If there is no such staff member.
+    """
+    with transaction.atomic():
+        if not User.objects.filter(pk=staff_member_id).update(is_on_duty=False):
+            raise User.DoesNotExist(f"No staff member with id {staff_member_id}.")
+        invalidate_roster()
+        shift = (
+            Attendance.objects.select_for_update()
+            .filter(staff_member_id=staff_member_id, clock_out_time__isnull=True)
+            .first()
+        )
+        if shift is None:
+            return None
+        shift.clock_out_time = timezone.now()
+        closed = Attendance.objects.filter(pk=shift.pk, clock_out_time__isnull=True).update(
+            clock_out_time=shift.clock_out_time,
+        )
+        if not closed:
+            # closed by a concurrent clock-out between the read and the update
+            return None
+        record_shift(shift)
+        return shift
+
+
+def start_shifts(staff_member_ids):
+    """Clocks a whole crew in at once.
+
+    Everyone's on-duty flag is set with one ``UPDATE``, which also locks
+    their rows against single clock-ins, and the new shifts are inserted
+    with one ``bulk_create``, all in one transaction. People who already
+    have an open shift keep it.
+
+    Args:
+        staff_member_ids (list): Ids of the staff members to clock in.
+
+    Returns:
+        dict: The outcome per id: ``'clocked_in'``, ``'already_on_duty'``
+        or ``'not_found'``.
+    """
+    staff_member_ids = set(staff_member_ids)
+    with transaction.atomic():
+        User.objects.filter(pk__in=staff_member_ids).update(is_on_duty=True)
+        invalidate_roster()
+        found = set(User.objects.filter(pk__in=staff_member_ids).values_list('pk', flat=True))
+        already_open = set(
+            Attendance.objects.filter(staff_member_id__in=found, clock_out_time__isnull=True)
+            .values_list('staff_member_id', flat=True)
+        )
+        Attendance.objects.bulk_create(
+            Attendance(staff_member_id=staff_member_id) for staff_member_id in sorted(found - already_open)
+        )
+    return {
+        staff_member_id: (
+            'not_found' if staff_member_id not in found
+            else 'already_on_duty' if staff_member_id in already_open
+            else 'clocked_in'
+        )
+        for staff_member_id in staff_member_ids
+    }
+
+
+def end_shifts(staff_member_ids):
+    """Clocks a whole crew out at once.
+
+    Everyone's on-duty flag is cleared with one ``UPDATE``, all their open
+    shifts are closed with one conditional ``UPDATE``, and the hours are
+    added to the payroll rollup in bulk (see
+    :func:`staff.payroll.record_shifts`), all in one transaction.
+
+    Args:
+        staff_member_ids (list): Ids of the staff members to clock out.
+
+    Returns:
+        dict: The outcome per id: ``'clocked_out'``, ``'not_on_duty'`` or
+        ``'not_found'``.
+    """
+    staff_member_ids = set(staff_member_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.filter(pk__in=staff_member_ids).update(is_on_duty=False)
+        invalidate_roster()
+        found = set(User.objects.filter(pk__in=staff_member_ids).values_list('pk', flat=True))
+        open_shifts = list(
+            Attendance.objects.select_for_update()
+            .filter(staff_member_id__in=found, clock_out_time__isnull=True)
+        )
+        Attendance.objects.filter(
+            pk__in=[shift.pk for shift in open_shifts], clock_out_time__isnull=True,
+        ).update(clock_out_time=now)
+        for shift in open_shifts:
+            shift.clock_out_time = now
+        record_shifts(open_shifts)
+    closed = {shift.staff_member_id for shift in open_shifts}
+    return {
+        staff_member_id: (
+            'not_found' if staff_member_id not in found
+            else 'clocked_out' if staff_member_id in closed
+            else 'not_on_duty'
+        )
+        for staff_member_id in staff_member_ids
+    }
@@ -0,0 +1,48 @@
+import datetime
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reservations.models import Reservation
+
+from .analytics import invalidate_labor_days
+from .models import Attendance, User
+from .roster import invalidate_roster
+
+
+@receiver(post_save, sender=User)
+def staff_member_saved(sender, instance, **kwargs):
+    """Drops the cached roster when a staff member is added or edited."""
+    invalidate_roster()
+
+
+@receiver(post_delete, sender=User)
+def staff_member_deleted(sender, instance, **kwargs):
+    """Drops the cached roster when a staff member is removed."""
+    invalidate_roster()
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def shift_changed(sender, instance, **kwargs):
+    """Drops the cached labor figures of the days a saved or deleted shift
+    covers."""
+    # values assigned by hand may still be strings
+    clock_in_time = Attendance._meta.get_field('clock_in_time').to_python(instance.clock_in_time)
+    clock_out_time = Attendance._meta.get_field('clock_out_time').to_python(instance.clock_out_time) or clock_in_time
+    first_day = timezone.localtime(clock_in_time).date()
+    last_day = timezone.localtime(clock_out_time).date()
+    invalidate_labor_days(*(
+        first_day + datetime.timedelta(days=offset) for offset in range((last_day - first_day).days + 1)
+    ))
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def booking_changed(sender, instance, **kwargs):
+    """Drops the cached labor figures of the day of a saved or deleted
+    booking, and of the next one for a stay running past midnight."""
+    # a date assigned by hand may still be a string
+    day = Reservation._meta.get_field('reservationDate').to_python(instance.reservationDate)
+    invalidate_labor_days(day, day + datetime.timedelta(days=1))
@@ -1,6 +1,23 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse #reverse is used to find urls
-from .models import User, Attendance
+from django.utils import timezone
+from .models import User, Attendance, AttendanceArchive, DailyHours, ShiftSchedule
+from .payroll import hours_report, rebuild_daily_hours
+from .roster import ROSTER_CACHE_KEY, get_roster
+from .scheduling import forecast_covers, plan_shifts
+from .analytics import labor_vs_covers
+from .shifts import end_shift, start_shift
+from io import StringIO
+import threading
+import time
+from .views import ATTENDANCE_PER_PAGE
+from reservations.models import Customer, Reservation, Table
+import datetime
+import json
 
 
 class StaffTests(TestCase):
@@ -102,4 +119,790 @@ class StaffTests(TestCase):
         
         shift_log = Attendance.objects.first()
         self.assertEqual(shift_log.staff_member, self.staff_member)
-        self.assertIsNotNone(shift_log.clock_out_time)
\ No newline at end of file
+        self.assertIsNotNone(shift_log.clock_out_time)
+
+
+class ClockInOutTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a single staff user to clock in and out.
+        """
+        self.staff_member = User.objects.create_user(username='testwaiter', password='Super_Password123')
+
+
+    def test_repeated_clock_in_and_out_are_harmless(self):
+        """
+        Tests that tapping clock-in twice leaves one open shift, and that
+        tapping clock-out twice closes it once without an error.
+        """
+        clock_in_url = reverse('clock_in', args=[self.staff_member.id])
+        clock_out_url = reverse('clock_out', args=[self.staff_member.id])
+        self.client.get(clock_in_url)
+        self.client.get(clock_in_url)
+        self.assertEqual(Attendance.objects.filter(clock_out_time__isnull=True).count(), 1)
+
+        self.assertEqual(self.client.get(clock_out_url).status_code, 302)
+        self.assertEqual(self.client.get(clock_out_url).status_code, 302)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertFalse(Attendance.objects.filter(clock_out_time__isnull=True).exists())
+        self.staff_member.refresh_from_db()
+        self.assertFalse(self.staff_member.is_on_duty)
+
+
+    def test_clock_in_writes_only_the_duty_flag(self):
+        """
+        Tests that clocking in updates the on-duty column alone, leaving the
+        rest of the user row, password hash included, untouched.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start_shift(self.staff_member.id)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"is_on_duty"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+
+
+    def test_unknown_staff_member(self):
+        """Tests that clocking in or out someone who does not exist is a 404."""
+        self.assertEqual(self.client.get(reverse('clock_in', args=[999])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('clock_out', args=[999])).status_code, 404)
+
+
+    def test_database_allows_one_open_shift(self):
+        """Tests that the database refuses a second open shift for a person."""
+        Attendance.objects.create(staff_member=self.staff_member)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Attendance.objects.create(staff_member=self.staff_member)
+
+
+
+class BulkClockTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a crew of five staff members, the first of them already
+        clocked in.
+        """
+        self.crew = [
+            User.objects.create_user(username=f'crew{i}', password='Super_Password123') for i in range(5)
+        ]
+        start_shift(self.crew[0].id)
+
+    def post(self, action, staff_ids):
+        """Sends a JSON crew request and returns the results by staff id."""
+        response = self.client.post(
+            reverse('bulk_clock'),
+            data=json.dumps({'action': action, 'staff_ids': staff_ids}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return {row['staff_id']: row['result'] for row in response.json()['results']}
+
+
+    def test_crew_clock_in_and_out_reports_each_person(self):
+        """
+        Tests that a crew is clocked in and out in one request, and that the
+        people who were already on duty, off duty or unknown are reported
+        rather than failing the whole request.
+        """
+        ids = [member.id for member in self.crew]
+        results = self.post('clock_in', ids + [999])
+        self.assertEqual(results[self.crew[0].id], 'already_on_duty')
+        self.assertEqual([results[staff_id] for staff_id in ids[1:]], ['clocked_in'] * 4)
+        self.assertEqual(results[999], 'not_found')
+        self.assertEqual(Attendance.objects.filter(clock_out_time__isnull=True).count(), 5)
+        self.assertEqual(User.objects.filter(is_on_duty=True).count(), 5)
+
+        results = self.post('clock_out', ids[:3])
+        self.assertEqual(set(results.values()), {'clocked_out'})
+        self.assertEqual(self.post('clock_out', ids[:1]), {ids[0]: 'not_on_duty'})
+        self.assertEqual(Attendance.objects.filter(clock_out_time__isnull=True).count(), 2)
+        self.assertEqual(DailyHours.objects.values('staff_member').distinct().count(), 3)
+
+
+    def test_query_count_does_not_grow_with_crew_size(self):
+        """
+        Tests that a crew request costs the same number of queries for two
+        people as for twenty.
+        """
+        def crew_queries(action, members):
+            with CaptureQueriesContext(connection) as queries:
+                self.post(action, [member.id for member in members])
+            return len(queries)
+
+        crew = self.crew + [
+            User.objects.create_user(username=f'extra{i}', password='Super_Password123') for i in range(15)
+        ]
+        for action in ('clock_in', 'clock_out'):
+            self.assertEqual(crew_queries(action, crew[1:3]), crew_queries(action, crew[3:]))
+
+
+    def test_form_post_and_invalid_requests(self):
+        """
+        Tests that the staff list form is answered with a redirect and a
+        message per person, and that bad input is refused.
+        """
+        response = self.client.post(
+            reverse('bulk_clock'), {'action': 'clock_in', 'staff_ids': [self.crew[1].id]}, follow=True,
+        )
+        self.assertContains(response, 'crew1 clocked in.')
+
+        bad = self.client.post(
+            reverse('bulk_clock'), data=json.dumps({'action': 'dance', 'staff_ids': ['x']}),
+            content_type='application/json',
+        )
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(set(bad.json()['errors']), {'action', 'staff_ids'})
+        self.assertEqual(self.client.get(reverse('bulk_clock')).status_code, 405)
+
+class ConcurrentClockTests(TransactionTestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a staff user. Transactions are real in this test class, so
+        every thread sees the other threads' commits.
+        """
+        self.staff_member = User.objects.create_user(username='testwaiter', password='Super_Password123')
+
+    def run_together(self, action, threads_count=20):
+        """Runs an action in many threads at the same moment."""
+        start_together = threading.Barrier(threads_count)
+        results = []
+        errors = []
+
+        def run():
+            try:
+                start_together.wait()
+                results.append(action(self.staff_member.id))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=run) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(errors, [])
+        self.assertLess(elapsed, 10, f"{threads_count} parallel {action.__name__} calls took {elapsed:.1f} s")
+        return results
+
+    def test_concurrent_clock_in_and_out(self):
+        """
+        Stress test: 20 threads clock the same person in at once, then 20
+        clock them out at once.
+
+        Exactly one shift must be opened and then closed once, with its
+        hours added to the payroll rollup once; every other call must
+        return quietly.
+        """
+        opened = [shift for shift in self.run_together(start_shift) if shift is not None]
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+        closed = [shift for shift in self.run_together(end_shift) if shift is not None]
+        self.assertEqual(len(closed), 1)
+        self.assertFalse(Attendance.objects.filter(clock_out_time__isnull=True).exists())
+        self.assertLessEqual(DailyHours.objects.count(), 2)
+        self.staff_member.refresh_from_db()
+        self.assertFalse(self.staff_member.is_on_duty)
+
+class AttendanceLogTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates two staff members. Shifts are added by each test with
+        :meth:`add_shifts`.
+        """
+        self.waiter = User.objects.create_user(username='waiter', password='Super_Password123', role='Waiter')
+        self.chef = User.objects.create_user(username='chef', password='Super_Password123', role='Chef')
+        self.start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) - datetime.timedelta(days=30)
+
+    def add_shifts(self, staff_member, days, first_day=0):
+        """Adds one closed eight-hour shift per day for a staff member."""
+        # created closed, since a person can only have one open shift
+        shifts = Attendance.objects.bulk_create(
+            Attendance(staff_member=staff_member, clock_out_time=self.start) for _ in range(days)
+        )
+        for offset, shift in enumerate(shifts):
+            clock_in_time = self.start + datetime.timedelta(days=first_day + offset)
+            shift.clock_in_time = clock_in_time
+            shift.clock_out_time = clock_in_time + datetime.timedelta(hours=8)
+        Attendance.objects.bulk_update(shifts, ['clock_in_time', 'clock_out_time'])
+
+
+    def test_log_query_count_does_not_grow_with_rows(self):
+        """
+        Tests that the staff member of each row is joined into the page query
+        instead of being fetched row by row.
+        """
+        def page_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('attendance_log'))
+            return len(queries)
+
+        self.add_shifts(self.waiter, 2)
+        small = page_queries()
+        self.add_shifts(self.chef, 25)
+        self.assertEqual(page_queries(), small)
+
+
+    def test_log_pages_newest_first(self):
+        """
+        Tests that the log is split into pages, newest shift first, and that
+        following the Next Page links visits every shift exactly once.
+        """
+        self.add_shifts(self.waiter, ATTENDANCE_PER_PAGE + 5)
+        response = self.client.get(reverse('attendance_log'))
+        first_page = response.context['logs']
+        self.assertEqual(len(first_page), ATTENDANCE_PER_PAGE)
+        self.assertGreater(first_page[0].clock_in_time, first_page[-1].clock_in_time)
+
+        seen = [shift.id for shift in first_page]
+        response = self.client.get(reverse('attendance_log') + '?' + response.context['next_query'])
+        seen += [shift.id for shift in response.context['logs']]
+        self.assertIsNone(response.context['next_query'])
+        self.assertEqual(sorted(seen), sorted(Attendance.objects.values_list('id', flat=True)))
+
+
+    def test_log_filters_by_date_range_and_staff_member(self):
+        """
+        Tests the date range, which applies to the day a shift started, and
+        the staff member filter.
+        """
+        self.add_shifts(self.waiter, 10)
+        self.add_shifts(self.chef, 10)
+        first = self.start.date()
+        response = self.client.get(reverse('attendance_log'), {
+            'start': first + datetime.timedelta(days=2),
+            'end': first + datetime.timedelta(days=4),
+            'staff_member': self.chef.id,
+        })
+        logs = response.context['logs']
+        self.assertEqual(len(logs), 3)
+        self.assertTrue(all(shift.staff_member == self.chef for shift in logs))
+
+
+    def test_date_filter_compares_the_indexed_column(self):
+        """
+        Tests that the date range is applied as bounds on the clock-in time,
+        not through a date cast that would keep its index from being used,
+        and that the last day is included in full.
+        """
+        self.add_shifts(self.waiter, 3)
+        first = self.start.date()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('attendance_log'), {'start': first, 'end': first + datetime.timedelta(days=1)})
+        self.assertEqual(len(response.context['logs']), 2)
+        self.assertFalse(any('cast_date' in query['sql'] for query in queries))
+
+class AttendanceExportTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a staff member with one closed shift yesterday and one open
+        shift today.
+        """
+        self.staff_member = User.objects.create_user(
+            username='testwaiter', password='Super_Password123',
+            first_name='Jane', last_name='Roe', role='Waiter',
+        )
+        now = timezone.now()
+        closed = Attendance.objects.create(staff_member=self.staff_member)
+        Attendance.objects.filter(pk=closed.pk).update(
+            clock_in_time=now - datetime.timedelta(days=1, hours=8),
+            clock_out_time=now - datetime.timedelta(days=1),
+        )
+        Attendance.objects.create(staff_member=self.staff_member)
+
+    def read(self, response):
+        """Joins the chunks of a streamed response into one string."""
+        return b''.join(response.streaming_content).decode()
+
+
+    def test_csv_export_lists_shifts(self):
+        """
+        Tests that the CSV export streams every shift, oldest first, with the
+        staff member's details, and that it can be limited to open shifts.
+        """
+        response = self.client.get(reverse('export_attendance'))
+        self.assertTrue(response.streaming)
+        self.assertIn('attendance.csv', response['Content-Disposition'])
+        lines = self.read(response).splitlines()
+        self.assertEqual(lines[0], 'id,username,first_name,last_name,role,clock_in_time,clock_out_time')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('testwaiter,Jane,Roe,Waiter', lines[1])
+        self.assertTrue(lines[2].endswith(','))
+
+        response = self.client.get(reverse('export_attendance'), {'shift': 'open'})
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+
+
+    def test_jsonl_export_sends_header_first(self):
+        """
+        Tests the JSON Lines export, and that no query runs before the first
+        chunk of a CSV export is sent.
+        """
+        response = self.client.get(reverse('export_attendance'), {'format': 'jsonl'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertIsNone(rows[1]['clock_out_time'])
+
+        response = self.client.get(reverse('export_attendance'))
+        with self.assertNumQueries(0):
+            next(iter(response.streaming_content))
+
+
+class PayrollTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates two staff members and a reference day, 2026-03-10, which
+        falls in the pay period of 2026-03-02 to 2026-03-15 with the default
+        settings.
+        """
+        self.waiter = User.objects.create_user(username='waiter', password='Super_Password123', first_name='Jane')
+        self.chef = User.objects.create_user(username='chef', password='Super_Password123')
+        self.day = datetime.date(2026, 3, 10)
+
+    def at(self, hour, days=0):
+        """Returns an aware datetime on the reference day plus some days."""
+        day = self.day + datetime.timedelta(days=days)
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+    def add_shift(self, staff_member, clock_in_time, clock_out_time):
+        """Adds a closed shift without touching the rollup."""
+        shift = Attendance.objects.create(staff_member=staff_member)
+        Attendance.objects.filter(pk=shift.pk).update(clock_in_time=clock_in_time, clock_out_time=clock_out_time)
+
+    def rollup(self):
+        """Returns the rollup as {(username, day): hours}."""
+        return {
+            (row.staff_member.username, row.day): row.hours
+            for row in DailyHours.objects.select_related('staff_member')
+        }
+
+
+    def test_clock_out_updates_daily_hours(self):
+        """
+        Tests that closing a shift adds its time to the staff member's day,
+        and that a second shift on the same day is added to the same row.
+        """
+        for _ in range(2):
+            self.client.get(reverse('clock_in', args=[self.waiter.id]))
+            shift = Attendance.objects.get(clock_out_time__isnull=True)
+            Attendance.objects.filter(pk=shift.pk).update(
+                clock_in_time=timezone.now() - datetime.timedelta(hours=3),
+            )
+            self.client.get(reverse('clock_out', args=[self.waiter.id]))
+
+        rollup = DailyHours.objects.get()
+        self.assertEqual(rollup.staff_member, self.waiter)
+        self.assertAlmostEqual(rollup.hours, 6, places=2)
+
+
+    def test_shift_past_midnight_is_split_between_days(self):
+        """
+        Tests that a shift from 20:00 to 02:00 counts four hours on the day
+        it started and two on the next, both when rebuilt from the shifts
+        and through the command.
+        """
+        self.add_shift(self.waiter, self.at(20), self.at(2, days=1))
+        self.add_shift(self.waiter, self.at(10), self.at(14))
+        self.add_shift(self.chef, self.at(9), self.at(17))
+        expected = {
+            ('waiter', self.day): 8,
+            ('waiter', self.day + datetime.timedelta(days=1)): 2,
+            ('chef', self.day): 8,
+        }
+        self.assertEqual(rebuild_daily_hours(), 3)
+        self.assertEqual(self.rollup(), expected)
+
+        DailyHours.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_daily_hours', '--start', '2026-03-11', stdout=out)
+        self.assertIn('Rebuilt 1 daily hours row(s).', out.getvalue())
+        self.assertEqual(self.rollup(), {('waiter', self.day + datetime.timedelta(days=1)): 2})
+
+
+    def test_report_groups_by_week_and_pay_period(self):
+        """
+        Tests the report's grouping and that it reads only the rollup, with
+        one query however many shifts there are.
+        """
+        for days in range(14):
+            self.add_shift(self.waiter, self.at(9, days), self.at(13, days))
+        rebuild_daily_hours()
+        first, last = self.day, self.day + datetime.timedelta(days=13)
+
+        with self.assertNumQueries(1):
+            weeks = hours_report(first, last, 'week')
+        self.assertEqual([row['period'] for row in weeks], [
+            datetime.date(2026, 3, 9), datetime.date(2026, 3, 16), datetime.date(2026, 3, 23),
+        ])
+        self.assertEqual([row['hours'] for row in weeks], [24, 28, 4])
+        self.assertEqual(weeks[0]['full_name'], 'Jane')
+
+        periods = hours_report(first, last, 'pay_period')
+        self.assertEqual([(row['period'], row['hours']) for row in periods], [
+            (datetime.date(2026, 3, 2), 24), (datetime.date(2026, 3, 16), 32),
+        ])
+
+
+    def test_report_page(self):
+        """Tests that the report page shows the hours of the chosen range."""
+        self.add_shift(self.chef, self.at(9), self.at(17))
+        rebuild_daily_hours()
+        response = self.client.get(reverse('payroll_report'), {
+            'start': '2026-03-01', 'end': '2026-03-31', 'period': 'week',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '8.00')
+        self.assertEqual(response.context['total_hours'], 8)
+
+
+class AttendanceArchiveTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a staff member with five closed shifts a year ago, two
+        closed shifts last week and one open shift.
+        """
+        self.staff_member = User.objects.create_user(username='testwaiter', password='Super_Password123')
+        now = timezone.now().replace(microsecond=0)
+        self.old_day = (now - datetime.timedelta(days=365)).date()
+        for days_ago in [369, 368, 367, 366, 365, 8, 7]:
+            shift = Attendance.objects.create(staff_member=self.staff_member)
+            Attendance.objects.filter(pk=shift.pk).update(
+                clock_in_time=now - datetime.timedelta(days=days_ago, hours=8),
+                clock_out_time=now - datetime.timedelta(days=days_ago),
+            )
+        Attendance.objects.create(staff_member=self.staff_member)
+
+    def archive(self):
+        call_command('archive_attendance', '--batch-size', '2', stdout=StringIO())
+
+
+    def test_command_moves_only_old_closed_shifts(self):
+        """
+        Tests that the command moves the old closed shifts, keeping their
+        ids and times, and leaves recent and open shifts in place.
+        """
+        old = list(Attendance.objects.order_by('id').values_list('id', 'clock_in_time', 'clock_out_time')[:5])
+        out = StringIO()
+        call_command('archive_attendance', '--batch-size', '2', stdout=out)
+        self.assertIn('Archived 5 shift(s).', out.getvalue())
+        self.assertEqual(
+            list(AttendanceArchive.objects.order_by('id').values_list('id', 'clock_in_time', 'clock_out_time')),
+            old,
+        )
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(Attendance.objects.filter(clock_out_time__isnull=True).count(), 1)
+
+        call_command('archive_attendance', stdout=out)
+        self.assertEqual(AttendanceArchive.objects.count(), 5)
+
+
+    def test_log_and_export_include_archived_shifts(self):
+        """
+        Tests that the log and the export still show archived shifts, merged
+        in by time, and that recent ranges do not read the archive.
+        """
+        before = [shift.id for shift in self.client.get(reverse('attendance_log')).context['logs']]
+        self.archive()
+        response = self.client.get(reverse('attendance_log'))
+        self.assertEqual([shift.id for shift in response.context['logs']], before)
+
+        lines = b''.join(self.client.get(reverse('export_attendance')).streaming_content).decode().splitlines()
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], sorted(before))
+
+        recent = (timezone.now() - datetime.timedelta(days=30)).date()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('attendance_log'), {'start': recent})
+        self.assertEqual(len(response.context['logs']), 3)
+        self.assertFalse(any('staff_attendancearchive' in query['sql'] and 'JOIN' in query['sql']
+                             for query in queries.captured_queries))
+
+
+    def test_rebuild_counts_archived_shifts(self):
+        """Tests that rebuilding the payroll rollup still counts archived shifts."""
+        self.archive()
+        rebuild_daily_hours(self.old_day - datetime.timedelta(days=10), self.old_day)
+        self.assertEqual(DailyHours.objects.filter(day__lte=self.old_day).count(), 5)
+
+
+class RosterCacheTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Empties the cache, which outlives the rolled-back test transactions,
+        and creates two staff members.
+        """
+        cache.clear()
+        self.waiter = User.objects.create_user(username='waiter', password='Super_Password123', role='Waiter')
+        self.chef = User.objects.create_user(username='chef', password='Super_Password123', role='Chef')
+
+    def roster(self):
+        """Loads the staff list page and returns its rows by username."""
+        response = self.client.get(reverse('staff_list'))
+        return {member['username']: member for member in response.context['staff_members']}
+
+
+    def test_steady_state_page_runs_no_queries(self):
+        """Tests that once the roster is cached the staff list runs no SQL."""
+        self.roster()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('staff_list'))
+        self.assertContains(response, 'waiter')
+
+
+    def test_clock_in_and_out_invalidate_roster(self):
+        """
+        Tests that clocking in and out, one by one or as a crew, shows up on
+        the next load.
+        """
+        self.assertFalse(self.roster()['waiter']['is_on_duty'])
+        self.client.get(reverse('clock_in', args=[self.waiter.id]))
+        self.assertTrue(self.roster()['waiter']['is_on_duty'])
+        self.client.get(reverse('clock_out', args=[self.waiter.id]))
+        self.assertFalse(self.roster()['waiter']['is_on_duty'])
+
+        self.client.post(reverse('bulk_clock'), {'action': 'clock_in', 'staff_ids': [self.waiter.id, self.chef.id]})
+        self.assertEqual(get_roster()['on_duty'], {self.waiter.id, self.chef.id})
+        self.client.post(reverse('bulk_clock'), {'action': 'clock_out', 'staff_ids': [self.chef.id]})
+        self.assertEqual(get_roster()['on_duty'], {self.waiter.id})
+
+
+    def test_staff_changes_invalidate_roster(self):
+        """Tests that editing, adding and removing staff shows up on the next load."""
+        self.roster()
+        self.client.post(reverse('edit_staff', args=[self.chef.id]), {
+            'first_name': 'Head', 'last_name': 'Chef', 'phone_number': '', 'role': 'Chef',
+        })
+        self.assertEqual(self.roster()['chef']['full_name'], 'Head Chef')
+
+        User.objects.create_user(username='host', password='Super_Password123')
+        self.assertIn('host', self.roster())
+        self.waiter.delete()
+        self.assertNotIn('waiter', self.roster())
+
+
+    def test_roster_dropped_again_on_commit(self):
+        """
+        Tests that a roster rebuilt while a clock-in was still uncommitted
+        is dropped once the clock-in commits.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            start_shift(self.waiter.id)
+            get_roster()
+            self.assertIsNotNone(cache.get(ROSTER_CACHE_KEY))
+        self.assertIsNone(cache.get(ROSTER_CACHE_KEY))
+
+
+class ScheduleTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates a table, a customer and a Monday, 2026-03-09, to book on.
+        """
+        self.table = Table.objects.create(tableNumber='A1', capacity=8)
+        self.customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        self.day = datetime.date(2026, 3, 9)
+
+    def book(self, day, time, guests, duration=90):
+        return Reservation.objects.create(
+            customer=self.customer, table=self.table, numberOfGuests=guests,
+            reservationDate=day, reservationTime=time, duration=duration,
+        )
+
+
+    def test_forecast_counts_guests_in_every_hour_of_their_stay(self):
+        """
+        Tests that covers count towards each hour a stay touches, including
+        after midnight, and that cancelled bookings are left out.
+        """
+        self.book(self.day, datetime.time(19, 30), 4)
+        self.book(self.day, datetime.time(23, 30), 2, duration=120)
+        cancelled = self.book(self.day, datetime.time(12, 0), 6)
+        Reservation.objects.filter(pk=cancelled.pk).update(status='Cancelled')
+
+        with self.assertNumQueries(1):
+            covers = forecast_covers(self.day, self.day + datetime.timedelta(days=1))
+        today, tomorrow = covers[self.day], covers[self.day + datetime.timedelta(days=1)]
+        self.assertEqual((today[18], today[19], today[20], today[21]), (0, 4, 4, 0))
+        self.assertEqual(today[12], 0)
+        self.assertEqual(today[23], 2)
+        self.assertEqual((tomorrow[0], tomorrow[1], tomorrow[2]), (2, 2, 0))
+
+
+    def test_plan_covers_demand_fairly_within_weekly_limits(self):
+        """
+        Tests that every short hour gets a shift, that nobody works twice a
+        day or past the weekly limit, and that the rest is a shortfall.
+        """
+        needed = {}
+        for offset in range(7):
+            hours = [0] * 24
+            hours[11:23] = [2] * 12  # two people from 11:00 to 23:00
+            needed[self.day + datetime.timedelta(days=offset)] = hours
+
+        shifts, shortfall = plan_shifts(needed, [1, 2, 3, 4, 5, 6], 8, 40)
+        self.assertEqual(shortfall, 0)
+        self.assertEqual(len(shifts), 7 * 4)
+        days_worked = {}
+        for staff_id, day, start in shifts:
+            self.assertIn(start, (11, 16))
+            days_worked.setdefault(staff_id, []).append(day)
+        for days in days_worked.values():
+            self.assertEqual(len(days), len(set(days)))
+            self.assertLessEqual(len(days) * 8, 40)
+        self.assertLessEqual(max(map(len, days_worked.values())) - min(map(len, days_worked.values())), 1)
+
+        # two people cover the mornings for five days, then hit the limit
+        shifts, shortfall = plan_shifts(needed, [1, 2], 8, 40)
+        self.assertEqual(len(shifts), 10)
+        self.assertEqual(shortfall, 5 * 4 * 2 + 2 * 12 * 2)
+
+
+    def test_month_for_a_hundred_staff_plans_quickly(self):
+        """Tests that a month of heavy demand for a hundred people plans in well under a second."""
+        needed = {}
+        for offset in range(31):
+            hours = [0] * 24
+            hours[10:24] = [12] * 14
+            needed[self.day + datetime.timedelta(days=offset)] = hours
+
+        started = time.perf_counter()
+        shifts, shortfall = plan_shifts(needed, list(range(100)), 8, 40)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(shortfall, 0)
+        self.assertEqual(len(shifts), 31 * 24)
+
+
+    def test_schedule_page_plans_and_compares_with_attendance(self):
+        """
+        Tests planning a schedule from the bookings and comparing it with
+        the hours worked.
+        """
+        waiter = User.objects.create_user(username='waiter', password='Super_Password123', role='Waiter')
+        User.objects.create_user(username='chef', password='Super_Password123', role='Chef')
+        User.objects.create_user(username='manager', password='Super_Password123', role='Manager')
+        self.book(self.day, datetime.time(19, 0), 8)
+        DailyHours.objects.create(staff_member=waiter, day=self.day, seconds=6 * 3600)
+
+        response = self.client.post(reverse('schedules'), {'start': self.day, 'end': self.day})
+        schedule = ShiftSchedule.objects.get()
+        self.assertRedirects(response, reverse('schedule_detail', args=[schedule.id]))
+        # shifts end by midnight, so the eight hours covering 19:00 start at 16:00
+        self.assertEqual(
+            sorted(schedule.shifts.values_list('role', 'start_time')),
+            [('Chef', datetime.time(16)), ('Manager', datetime.time(16)), ('Waiter', datetime.time(16))],
+        )
+        self.assertEqual(schedule.shortfall_hours, 0)
+
+        response = self.client.get(reverse('schedule_detail', args=[schedule.id]))
+        row = next(row for row in response.context['comparison'] if row['username'] == 'waiter')
+        self.assertEqual((row['scheduled_hours'], row['worked_hours'], row['difference']), (8, 6, -2))
+
+
+class LaborAnalyticsTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Empties the cache and, ten days ago, gives a waiter a shift from
+        9:00 to 17:00 and a chef one from 12:30 to 13:00, and books a party
+        of six at 12:00 and a party of two at 18:00.
+        """
+        cache.clear()
+        self.day = timezone.localdate() - datetime.timedelta(days=10)
+        self.waiter = User.objects.create_user(username='waiter', password='Super_Password123')
+        self.chef = User.objects.create_user(username='chef', password='Super_Password123', role='Chef')
+        self.shift = self.add_shift(self.waiter, datetime.time(9), datetime.time(17))
+        self.add_shift(self.chef, datetime.time(12, 30), datetime.time(13))
+        table = Table.objects.create(tableNumber='A1', capacity=8)
+        customer = Customer.objects.create(firstName='John', lastName='Doe', phoneNumber='5231211')
+        for time, guests in [(datetime.time(12), 6), (datetime.time(18), 2)]:
+            Reservation.objects.create(
+                customer=customer, table=table, numberOfGuests=guests,
+                reservationDate=self.day, reservationTime=time, duration=90,
+            )
+
+    def at(self, time):
+        return timezone.make_aware(datetime.datetime.combine(self.day, time))
+
+    def add_shift(self, staff_member, start, end):
+        shift = Attendance.objects.create(staff_member=staff_member)
+        Attendance.objects.filter(pk=shift.pk).update(clock_in_time=self.at(start), clock_out_time=self.at(end))
+        shift.refresh_from_db()
+        return shift
+
+    def hours(self):
+        return {row['hour'].hour: row for row in labor_vs_covers(self.day, self.day)}
+
+
+    def test_hourly_staff_covers_and_ratios(self):
+        """
+        Tests the average staff on the floor, the covers and the covers per
+        person of each hour.
+        """
+        hours = self.hours()
+        self.assertEqual(len(hours), 24)
+        self.assertEqual((hours[8]['staff'], hours[8]['covers']), (0, 0))
+        self.assertEqual((hours[12]['staff'], hours[12]['covers'], hours[12]['covers_per_staff']), (1.5, 6, 4))
+        self.assertEqual((hours[13]['staff'], hours[13]['covers']), (1, 6))
+        self.assertEqual((hours[18]['staff'], hours[18]['covers'], hours[18]['covers_per_staff']), (0, 2, None))
+
+
+    def test_closed_days_are_cached_until_a_shift_changes(self):
+        """
+        Tests that a past day is served from the cache with only the check
+        for open shifts, and that correcting one of its shifts recomputes it.
+        """
+        self.hours()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.hours()[16]['staff'], 1)
+
+        self.shift.clock_out_time = self.at(datetime.time(16))
+        self.shift.save()
+        self.assertEqual(self.hours()[16]['staff'], 0)
+
+
+    def test_open_shift_keeps_its_days_out_of_the_cache(self):
+        """Tests that days since a shift that is still open are not cached."""
+        open_shift = Attendance.objects.create(staff_member=self.chef)
+        Attendance.objects.filter(pk=open_shift.pk).update(clock_in_time=self.at(datetime.time(20)))
+        self.assertEqual(self.hours()[21]['staff'], 1)
+        self.assertIsNone(cache.get(f'staff:labor:{self.day.isoformat()}'))
+
+
+    def test_report_page(self):
+        """Tests that the report page lists the busy hours of the chosen range."""
+        response = self.client.get(reverse('labor_report'), {'start': self.day, 'end': self.day})
+        self.assertEqual(response.status_code, 200)
+        # 17:00 is quiet: the waiter has left and the evening party comes at 18:00
+        self.assertEqual([row['hour'].hour for row in response.context['rows']], [9, 10, 11, 12, 13, 14, 15, 16, 18, 19])
@@ -9,5 +9,11 @@ urlpatterns = [
     path('add/', views.add_staff, name='add_staff'),
     path('clock_in/<int:staff_id>/', views.clock_in, name='clock_in'),
     path('clock_out/<int:staff_id>/', views.clock_out, name='clock_out'),
-    path('log/', views.attendance_log, name='attendance_log')
+    path('clock/bulk/', views.bulk_clock, name='bulk_clock'),
+    path('log/', views.attendance_log, name='attendance_log'),
+    path('log/export/', views.export_attendance, name='export_attendance'),
+    path('payroll/', views.payroll_report, name='payroll_report'),
+    path('labor/', views.labor_report, name='labor_report'),
+    path('schedules/', views.schedules, name='schedules'),
+    path('schedules/<int:schedule_id>/', views.schedule_detail, name='schedule_detail'),
 ]
\ No newline at end of file
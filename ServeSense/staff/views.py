@@ -1,20 +1,58 @@
+import datetime
+import heapq
+import itertools
+import json
+
+from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect, render
-from .models import User, Attendance # Import our custom User model
-from .forms import EditStaffForm, AddStaffForm
+from django.views.decorators.http import require_POST
+from .models import User, Attendance, AttendanceArchive, ShiftSchedule # Import our custom User model
+from .analytics import labor_vs_covers
+from .archive import archive_needed, archived_until
+from .forms import (
+    EditStaffForm, AddStaffForm, AttendanceExportForm, AttendanceLogFilterForm, PayrollReportForm, BulkClockForm,
+    ScheduleForm, LaborReportForm,
+)
+from .payroll import hours_report, pay_period_start
+from .roster import get_roster
+from .scheduling import compare_schedule, create_schedule
+from .shifts import end_shift, end_shifts, start_shift, start_shifts
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, JsonResponse
 from django.utils import timezone
+from ServeSense.streaming import streaming_export
+
+ATTENDANCE_PER_PAGE = 50
+
+# columns of the attendance export, as (header, field) pairs
+ATTENDANCE_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('username', 'staff_member__username'),
+    ('first_name', 'staff_member__first_name'),
+    ('last_name', 'staff_member__last_name'),
+    ('role', 'staff_member__role'),
+    ('clock_in_time', 'clock_in_time'),
+    ('clock_out_time', 'clock_out_time'),
+)
+EXPORT_CHUNK_SIZE = 2000
 
 
 def staff_list(request):
     """
     This function is responsible for the main staff overview page. 
-    Its primary job is to fetch every user object from the database using User.objects.all(). 
-    It then packages this list of staff members into a context dictionary and passes it 
-    to the 'staff_list.html' template, which handles the actual display.
+    Its primary job is to fetch the staff roster, which is kept in the cache and
+    only rebuilt from the database after someone clocks in or out or a staff
+    member is added or edited, so the constantly refreshed floor screens run no
+    queries. It then packages this list of staff members into a context
+    dictionary and passes it to the 'staff_list.html' template, which handles
+    the actual display.
     """
-    all_staff = User.objects.all() # fetch all staff
-    
+    roster = get_roster() # cached staff list
+
     context = {
-        'staff_members': all_staff
+        'staff_members': roster['staff'],
+        'on_duty_count': len(roster['on_duty']),
     }
     return render(request, 'staff_list.html', context) # semd back context to ui 
 
@@ -80,53 +118,288 @@ def add_staff(request):
 def clock_in(request, staff_id):
     """
     This is a simple action-oriented view that handles when a staff member starts their shift.
-    It finds the specific user by their ID, sets their 'is_on_duty' status to True,
-    and saves the change. Critically, it also creates a new record in the Attendance table,
-    linking it to the staff member and automatically timestamping the clock-in time.
-    It does not render a template; it simply redirects back to the staff list.
+    It marks the staff member as on duty and opens a new Attendance record, timestamped with
+    the clock-in time, in one transaction (see staff.shifts.start_shift). Only the on-duty
+    column is written, and the database allows a single open shift per person, so tapping
+    the button twice does not start a second shift. It does not render a template; it simply
+    redirects back to the staff list.
     """
-    staff_member = get_object_or_404(User, id=staff_id)
-    staff_member.is_on_duty = True
-    staff_member.save()
-    
-    Attendance.objects.create(staff_member=staff_member)
+    try:
+        start_shift(staff_id)
+    except User.DoesNotExist:
+        raise Http404("No such staff member.")
     return redirect('staff_list')
 
 
 def clock_out(request, staff_id):
     """
-    This view handles the end of a staff member's shift. It finds the user and sets
-    their 'is_on_duty' status to False. It then attempts to find the most recent
-    'Attendance' record for that user that does not yet have a clock-out time. 
-    If it finds one, it updates the 'clock_out_time' to the current time, effectively
-    ending the shift log. The 'try...except' block safely handles cases where an open
-    shift might not be found, preventing the application from crashing.
+    This view handles the end of a staff member's shift. It marks the staff member as off
+    duty and closes their open Attendance record with a conditional update, adding the
+    shift's hours to the daily payroll rollup, all in one transaction (see
+    staff.shifts.end_shift). If no shift is open, for example because the button was
+    pressed twice, there is nothing to close and the view simply redirects as usual.
     """
-    staff_member = get_object_or_404(User, id=staff_id)
-    staff_member.is_on_duty = False
-    staff_member.save()
-
     try:
-        # Find the current, un-ended shift for this staff member
-        current_shift = Attendance.objects.get(staff_member=staff_member, clock_out_time__isnull=True) 
-        current_shift.clock_out_time = timezone.now() # Set the clock-out time
-        current_shift.save()
-    except Attendance.DoesNotExist:
-        # Handle cases where there might not be an open shift (e.g., data error)
-        pass 
+        end_shift(staff_id)
+    except User.DoesNotExist:
+        raise Http404("No such staff member.")
     return redirect('staff_list')
 
 
+BULK_CLOCK_MESSAGES = {
+    'clocked_in': "clocked in",
+    'already_on_duty': "was already on duty",
+    'clocked_out': "clocked out",
+    'not_on_duty': "was not on duty",
+    'not_found': "not found",
+}
+
+
+@require_POST
+def bulk_clock(request):
+    """
+    Clocks a whole crew in or out in one request, for shift changes. It takes
+    the action ('clock_in' or 'clock_out') and a list of staff ids, either as
+    a JSON body such as {"action": "clock_in", "staff_ids": [1, 2, 3]} or as
+    form fields from the staff list. Everyone is handled in one transaction
+    with one UPDATE for the on-duty flags and one bulk insert or UPDATE for
+    the shifts (see staff.shifts). JSON requests get a result per staff
+    member back, so people who were already on duty or do not exist are
+    visible; form posts are redirected to the staff list with a summary.
+    """
+    wants_json = request.content_type == 'application/json'
+    if wants_json:
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'errors': {'__all__': ["Invalid JSON."]}}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'errors': {'__all__': ["Expected a JSON object."]}}, status=400)
+    else:
+        data = {'action': request.POST.get('action'), 'staff_ids': request.POST.getlist('staff_ids')}
+
+    form = BulkClockForm(data)
+    if not form.is_valid():
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        messages.error(request, "Please choose the staff members to clock in or out.")
+        return redirect('staff_list')
+
+    action = form.cleaned_data['action']
+    staff_ids = list(dict.fromkeys(form.cleaned_data['staff_ids']))
+    outcomes = start_shifts(staff_ids) if action == 'clock_in' else end_shifts(staff_ids)
+    results = [{'staff_id': staff_id, 'result': outcomes[staff_id]} for staff_id in staff_ids]
+
+    if wants_json:
+        return JsonResponse({'action': action, 'results': results})
+    names = dict(User.objects.filter(pk__in=staff_ids).values_list('pk', 'username'))
+    for result in results:
+        name = names.get(result['staff_id'], f"Staff #{result['staff_id']}")
+        level = messages.SUCCESS if result['result'] in ('clocked_in', 'clocked_out') else messages.WARNING
+        messages.add_message(request, level, f"{name} {BULK_CLOCK_MESSAGES[result['result']]}.")
+    return redirect('staff_list')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _filter_shifts(shifts, filters):
+    """Applies the attendance log filters to Attendance or AttendanceArchive rows.
+
+    Days are turned into clock-in time bounds (from local midnight of the
+    first day up to local midnight after the last), so the filter compares
+    the column itself and can use its indexes.
+    """
+    if filters.get('start'):
+        shifts = shifts.filter(clock_in_time__gte=_day_start(filters['start']))
+    if filters.get('end'):
+        shifts = shifts.filter(clock_in_time__lt=_day_start(filters['end'] + datetime.timedelta(days=1)))
+    if filters.get('staff_member'):
+        shifts = shifts.filter(staff_member=filters['staff_member'])
+    return shifts
+
+
 def attendance_log(request):
     """
-    This function is built to display the complete history of all staff shifts.
-    It queries the Attendance model to get every single record. It orders the results
-    by 'clock_in_time' in descending order ('-clock_in_time') so that the most recent
-    shifts appear at the top of the list. It then passes this list of logs to the 
-    'attendance_log.html' template for display.
+    This function displays one page of the shift history, most recent shifts
+    first. The log can be narrowed to the shifts that started in a date range
+    and to one staff member. Pages are fetched with a seek cursor (the
+    clock-in time and id of the last row shown) instead of an offset, so
+    every page costs the same indexed query however long the history grows,
+    and the staff member is joined into that query so the template does not
+    look each one up separately. Old shifts live in the archive table; it is
+    only read, with the same query, when the page reaches back past the
+    newest archived shift, and its rows are merged in by time.
+    """
+    form = AttendanceLogFilterForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    def page_of(model):
+        shifts = _filter_shifts(
+            model.objects.select_related('staff_member').order_by('-clock_in_time', '-id'), filters,
+        )
+        if filters.get('after'):
+            clock_in_time, shift_id = filters['after']
+            shifts = shifts.filter(
+                Q(clock_in_time__lt=clock_in_time) | Q(clock_in_time=clock_in_time, id__lt=shift_id)
+            )
+        # fetch one extra row to find out whether there is another page
+        return list(shifts[:ATTENDANCE_PER_PAGE + 1])
+
+    page = page_of(Attendance)
+    newest_archived = archived_until()
+    reaches_archive = newest_archived is not None and (
+        not filters.get('start') or filters['start'] <= timezone.localtime(newest_archived).date()
+    )
+    if reaches_archive and not (len(page) > ATTENDANCE_PER_PAGE and page[-1].clock_in_time > newest_archived):
+        merged = heapq.merge(
+            page, page_of(AttendanceArchive),
+            key=lambda shift: (shift.clock_in_time, shift.id), reverse=True,
+        )
+        page = list(itertools.islice(merged, ATTENDANCE_PER_PAGE + 1))
+
+    query = request.GET.copy()
+    query.pop('after', None)
+    first_query = query.urlencode() if filters.get('after') else None
+    next_query = None
+    if len(page) > ATTENDANCE_PER_PAGE:
+        page = page[:ATTENDANCE_PER_PAGE]
+        last = page[-1]
+        query['after'] = f"{last.clock_in_time.isoformat()},{last.id}"
+        next_query = query.urlencode()
+
+    context = {
+        'logs': page,
+        'filter_form': form,
+        'first_query': first_query,
+        'next_query': next_query,
+    }
+    return render(request, 'attendance_log.html', context)
+
+
+def export_attendance(request):
+    """
+    Streams the shift history as a CSV or JSON Lines download. Shifts are
+    read from the database a chunk at a time with a lazy ``values_list``
+    iterator and written out as they arrive, so the whole log is never held
+    in memory. The download can be narrowed to the shifts that started in a
+    date range and to open or closed shifts, and the format is chosen with
+    ``?format=csv`` (the default) or ``?format=jsonl``. When the range
+    reaches back into the archive, archived shifts are read the same way
+    and merged in by time.
     """
-    all_logs = Attendance.objects.all().order_by('-clock_in_time')
+    form = AttendanceExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    filters = form.cleaned_data
+
+    fields = [field for _, field in ATTENDANCE_EXPORT_COLUMNS]
+    shifts = _filter_shifts(Attendance.objects.order_by('clock_in_time', 'id'), filters)
+    if filters['shift']:
+        shifts = shifts.filter(clock_out_time__isnull=filters['shift'] == 'open')
+    rows = shifts.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    # the archive only holds closed shifts
+    if filters['shift'] != 'open' and archive_needed(filters['start']):
+        archived = _filter_shifts(AttendanceArchive.objects.order_by('clock_in_time', 'id'), filters)
+        clock_in = fields.index('clock_in_time')
+        rows = heapq.merge(
+            rows, archived.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            key=lambda row: (row[clock_in], row[0]),
+        )
+    return streaming_export(
+        'attendance',
+        [header for header, _ in ATTENDANCE_EXPORT_COLUMNS],
+        rows,
+        filters['format'] or 'csv',
+    )
+
+
+def payroll_report(request):
+    """
+    Shows the hours each staff member worked per day, week or pay period
+    over a date range, the current pay period by default. The figures come
+    from the daily hours rollup, which is updated whenever a shift is
+    closed, so the report reads one row per person per day instead of
+    every shift. Shifts that are still open are not counted yet.
+    """
+    form = PayrollReportForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    start = filters.get('start') or pay_period_start(timezone.localdate())
+    end = filters.get('end') or start + datetime.timedelta(days=settings.PAYROLL_PERIOD_DAYS - 1)
+    rows = hours_report(start, end, filters.get('period') or 'day', filters.get('staff_member'))
+
+    context = {
+        'filter_form': form,
+        'rows': rows,
+        'start': start,
+        'end': end,
+        'total_hours': round(sum(row['hours'] for row in rows), 2),
+    }
+    return render(request, 'payroll_report.html', context)
+
+
+def labor_report(request):
+    """
+    Shows, hour by hour, how many staff were clocked in against how many
+    guests were booked, and the covers per person on the floor. Without
+    dates the report covers the last seven days. The figures are worked
+    out for the whole range at once (see :mod:`staff.analytics`), and days
+    that are over are served from the cache.
+    """
+    form = LaborReportForm(request.GET)
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    end = filters.get('end') or (filters['start'] + datetime.timedelta(days=6) if filters.get('start') else timezone.localdate())
+    start = filters.get('start') or end - datetime.timedelta(days=6)
+    rows = labor_vs_covers(start, end)
+
+    context = {
+        'filter_form': form,
+        # quiet hours with nobody booked or working are left out
+        'rows': [row for row in rows if row['staff'] or row['covers']],
+        'start': start,
+        'end': end,
+    }
+    return render(request, 'labor_report.html', context)
+
+
+def schedules(request):
+    """
+    Lists the planned schedules, newest first, and plans a new one. On a
+    POST request the chosen range is planned from the reservations booked
+    for it (see :mod:`staff.scheduling`) and the user is taken to the new
+    schedule.
+    """
+    if request.method == 'POST':
+        form = ScheduleForm(request.POST)
+        if form.is_valid():
+            schedule = create_schedule(form.cleaned_data['start'], form.cleaned_data['end'])
+            return redirect('schedule_detail', schedule_id=schedule.id)
+    else:
+        today = timezone.localdate()
+        form = ScheduleForm(initial={'start': today, 'end': today + datetime.timedelta(days=6)})
+
+    context = {
+        'form': form,
+        'schedules': ShiftSchedule.objects.order_by('-created_at')[:20],
+    }
+    return render(request, 'schedules.html', context)
+
+
+def schedule_detail(request, schedule_id):
+    """
+    Shows the shifts of a schedule, day by day, and how the hours each
+    person was scheduled for compare with the hours they actually worked.
+    """
+    schedule = get_object_or_404(ShiftSchedule, id=schedule_id)
+    shifts = schedule.shifts.select_related('staff_member').order_by('day', 'start_time', 'role', 'staff_member__username')
+
     context = {
-        'logs': all_logs
+        'schedule': schedule,
+        'shifts': shifts,
+        'comparison': compare_schedule(schedule),
     }
-    return render(request, 'attendance_log.html', context)
\ No newline at end of file
+    return render(request, 'schedule_detail.html', context)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class TablesConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "tables"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,143 @@
+"""
+Pushes changes of the tables to the floor screens that are watching them.
+
+:data:`broadcaster` is an in-process publish/subscribe channel. Saving,
+moving or deleting a table publishes a small event with the table's new
+state (see :mod:`tables.signals`), and every open stream of
+:func:`tables.views.table_stream` is subscribed to it. A subscriber is an
+``asyncio.Queue`` waited on by one coroutine, so an idle screen costs no
+thread and no database query; hundreds of them cost a few hundred queues.
+
+Events are numbered, and the last ``TABLE_STREAM_HISTORY`` are kept, so a
+screen that reconnects with the number of the last event it saw gets only
+what it missed. Publishing never waits: a subscriber whose queue is full is
+dropped, and its screen reconnects and starts over from a fresh snapshot.
+
+The channel lives in one process. With several server processes, each one
+only sees the changes made through itself.
+"""
+import asyncio
+import collections
+import itertools
+import threading
+
+from django.conf import settings
+
+
+class Subscription:
+    """One subscriber's queue of events.
+
+    Attributes:
+        queue (asyncio.Queue): The events published since it subscribed,
+            as ``(number, event)``.
+        dropped (bool): True once the broadcaster gave up on it because it
+            fell too far behind.
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.dropped = False
+
+    def _put(self, item):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # wake the reader so it can notice
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """Waits for the next event.
+
+        Returns:
+            tuple: ``(number, event)``, or None if the subscriber was
+            dropped for falling behind.
+        """
+        if self.dropped and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """An in-process channel that fans events out to async subscribers.
+
+    :meth:`publish` may be called from any thread, for example from a sync
+    view running in Django's thread pool; each event is handed to the event
+    loop of every subscriber.
+
+    Args:
+        history (int): How many recent events to keep for reconnecting
+            subscribers. Defaults to ``TABLE_STREAM_HISTORY``.
+        queue_size (int): How many events a subscriber may have unread
+            before it is dropped. Defaults to ``TABLE_STREAM_QUEUE_SIZE``.
+    """
+
+    def __init__(self, history=None, queue_size=None):
+        self.queue_size = queue_size or settings.TABLE_STREAM_QUEUE_SIZE
+        self._history = collections.deque(maxlen=history or settings.TABLE_STREAM_HISTORY)
+        self._numbers = itertools.count(1)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def last_number(self):
+        """The number of the newest event, or 0 before the first one."""
+        with self._lock:
+            return self._history[-1][0] if self._history else 0
+
+    def publish(self, event):
+        """Sends an event to every subscriber and returns its number."""
+        with self._lock:
+            item = (next(self._numbers), event)
+            self._history.append(item)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, item)
+            except RuntimeError:
+                # its loop has been closed without unsubscribing
+                self.unsubscribe(subscription)
+        return item[0]
+
+    def subscribe(self, last_number=None):
+        """Starts a subscription on the running event loop.
+
+        Args:
+            last_number (int): Optionally, the number of the last event the
+                subscriber saw; the events after it are queued straight away.
+
+        Returns:
+            tuple: The :class:`Subscription`, and whether the missed events
+            could be replayed. False means some were no longer kept, or the
+            number is from before a restart, and the subscriber needs a fresh
+            snapshot; nothing is replayed then.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_number is None:
+                return subscription, True
+            newest = self._history[-1][0] if self._history else 0
+            oldest = self._history[0][0] if self._history else newest + 1
+            if not oldest - 1 <= last_number <= newest:
+                return subscription, False
+            for item in self._history:
+                if item[0] > last_number:
+                    subscription._put(item)
+        return subscription, True
+
+    def unsubscribe(self, subscription):
+        """Stops sending events to a subscriber."""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+broadcaster = Broadcaster()
@@ -6,14 +6,17 @@ class TableForm(forms.ModelForm):
     Form for creating or updating Table records.
 
     This form provides fields to add or edit a restaurant table,
-    including its number, capacity, current status, and optional time left.
+    including its number, capacity, section, and usual turn length. The
+    status is not edited here; it changes through the reserve, seat and
+    release actions of the floor view.
 
     Fields:
-        number (int): Unique table number.
+        tableNumber (str): Unique table number.
         capacity (int): Maximum number of guests the table can accommodate.
-        status (str): Current status of the table. Choices: Free, Reserved, Occupied.
-        time_left (int): Optional; estimated minutes remaining for the table to be free.
+        section (str): Optional; the group of adjacent tables it belongs to.
+        turnMinutes (int): Optional; minutes guests usually keep the table. The
+            time left at an occupied table is counted down from it.
     """
     class Meta:
         model = Table
-        fields = ['number', 'capacity', 'status', 'time_left']
+        fields = ['tableNumber', 'capacity', 'section', 'turnMinutes']
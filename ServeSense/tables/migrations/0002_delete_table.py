@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tables", "0001_initial"),
+        # the floor tables are merged into reservations.Table first
+        ("reservations", "0010_table_status_timeleft_merge_floor_tables"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="Table",
+        ),
+    ]
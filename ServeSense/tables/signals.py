@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .broadcast import broadcaster
+from .models import Table
+
+TABLE_FIELDS = ('id', 'tableNumber', 'capacity', 'section', 'status', 'seatedAt', 'turnMinutes')
+
+
+def table_event(table):
+    """Returns the state of a table as the floor screens receive it,
+    with the minutes it has left."""
+    event = {field: getattr(table, field) for field in TABLE_FIELDS}
+    event['timeLeft'] = table.timeLeft
+    return event
+
+
+def _publish(event):
+    # screens only hear about changes that were committed
+    transaction.on_commit(lambda: broadcaster.publish(event))
+
+
+@receiver(post_save, sender=Table)
+def table_saved(sender, instance, **kwargs):
+    """Pushes a saved or moved table to the floor screens."""
+    _publish(table_event(instance))
+
+
+@receiver(post_delete, sender=Table)
+def table_deleted(sender, instance, **kwargs):
+    """Tells the floor screens that a table is gone."""
+    _publish({'id': instance.pk, 'deleted': True})
@@ -0,0 +1,179 @@
+from django.test import TestCase
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from reservations.models import Table
+from .broadcast import Broadcaster, broadcaster
+import asyncio
+import json
+import threading
+
+
+def parse(chunk):
+    """Returns the events of a Server-Sent Events chunk as dicts."""
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    events = []
+    for block in chunk.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if 'data' in fields:
+            fields['data'] = json.loads(fields['data'])
+            events.append(fields)
+    return events
+
+
+class BroadcasterTests(TestCase):
+
+    async def test_publish_reaches_every_subscriber(self):
+        """
+        Tests that an event published from another thread reaches every
+        subscriber, numbered in order, and that idle subscribers need no
+        threads.
+        """
+        channel = Broadcaster(history=10, queue_size=10)
+        threads = threading.active_count()
+        subscriptions = [channel.subscribe()[0] for _ in range(500)]
+        self.assertEqual(len(channel), 500)
+        self.assertEqual(threading.active_count(), threads)
+
+        publisher = threading.Thread(target=channel.publish, args=({'id': 1},))
+        publisher.start()
+        publisher.join()
+        channel.publish({'id': 2})
+        for subscription in subscriptions:
+            self.assertEqual(await subscription.get(), (1, {'id': 1}))
+            self.assertEqual(await subscription.get(), (2, {'id': 2}))
+
+        for subscription in subscriptions:
+            channel.unsubscribe(subscription)
+        self.assertEqual(len(channel), 0)
+
+
+    async def test_reconnect_replays_missed_events(self):
+        """
+        Tests that a subscriber coming back with the number of the last event
+        it saw gets the events after it, and is told to start over when they
+        are no longer kept.
+        """
+        channel = Broadcaster(history=3, queue_size=10)
+        for number in range(1, 5):
+            channel.publish({'id': number})
+
+        subscription, replayed = channel.subscribe(last_number=2)
+        self.assertTrue(replayed)
+        self.assertEqual(await subscription.get(), (3, {'id': 3}))
+        self.assertEqual(await subscription.get(), (4, {'id': 4}))
+
+        subscription, replayed = channel.subscribe(last_number=4)
+        self.assertTrue(replayed)
+        self.assertTrue(subscription.queue.empty())
+
+        self.assertFalse(channel.subscribe(last_number=0)[1])
+        self.assertFalse(channel.subscribe(last_number=99)[1])
+
+
+    async def test_slow_subscriber_is_dropped(self):
+        """
+        Tests that publishing never waits on a subscriber that stopped
+        reading; it is dropped instead.
+        """
+        channel = Broadcaster(history=10, queue_size=2)
+        slow, _ = channel.subscribe()
+        for number in range(5):
+            channel.publish({'id': number})
+        await asyncio.sleep(0)
+        self.assertTrue(slow.dropped)
+        self.assertIsNotNone(await slow.get())
+        self.assertIsNone(await slow.get())
+
+
+class TableStreamTests(TestCase):
+
+    def setUp(self):
+        """
+        Runs before every single test.
+
+        Creates two tables.
+        """
+        self.table = Table.objects.create(tableNumber='1', capacity=4)
+        Table.objects.create(tableNumber='2', capacity=2, section='Patio')
+
+
+    def test_changes_are_published_on_commit(self):
+        """
+        Tests that saving, moving and deleting a table publish its new state
+        once the change is committed.
+        """
+        start = broadcaster.last_number
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.table.seat()
+            self.assertEqual(broadcaster.last_number, start)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(broadcaster.last_number, start + 1)
+        self.assertEqual(broadcaster._history[-1][1]['status'], 'occupied')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.table.turnMinutes = 25
+            self.table.save()
+            table_id = self.table.pk
+            self.table.delete()
+        events = [event for _, event in list(broadcaster._history)[-2:]]
+        self.assertEqual(events[0]['timeLeft'], 25)
+        self.assertEqual(events[0]['turnMinutes'], 25)
+        self.assertEqual(events[1], {'id': table_id, 'deleted': True})
+
+
+    async def test_stream_sends_snapshot_then_changes(self):
+        """
+        Tests that the stream opens with every table, then pushes a table as
+        soon as it changes, and lets go of it when the screen disconnects.
+        """
+        response = await self.async_client.get(reverse('table_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        chunks = aiter(response.streaming_content)
+
+        snapshot, = parse(await anext(chunks))
+        self.assertEqual(snapshot['event'], 'snapshot')
+        self.assertEqual([table['tableNumber'] for table in snapshot['data']], ['1', '2'])
+        self.assertEqual(snapshot['data'][1]['section'], 'Patio')
+
+        await sync_to_async(broadcaster.publish)({'id': self.table.pk, 'status': 'occupied'})
+        change, = parse(await asyncio.wait_for(anext(chunks), timeout=5))
+        self.assertEqual(change['event'], 'table')
+        self.assertEqual(change['data'], {'id': self.table.pk, 'status': 'occupied'})
+        self.assertEqual(int(change['id']), broadcaster.last_number)
+
+        # the server cancels the stream when the screen disconnects
+        subscribers = len(broadcaster)
+        waiting = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(len(broadcaster), subscribers - 1)
+
+
+    async def test_reconnect_skips_the_snapshot(self):
+        """
+        Tests that a screen reconnecting with the last event it saw only gets
+        the changes it missed.
+        """
+        seen = await sync_to_async(broadcaster.publish)({'id': 0})
+        await sync_to_async(broadcaster.publish)({'id': self.table.pk, 'status': 'reserved'})
+        response = await self.async_client.get(reverse('table_stream'), headers={'Last-Event-ID': str(seen)})
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(parse(await anext(chunks)), [])
+        missed, = parse(await asyncio.wait_for(anext(chunks), timeout=5))
+        self.assertEqual(missed['data']['status'], 'reserved')
+
+
+    def test_wsgi_gets_the_snapshot_only(self):
+        """
+        Tests that without an ASGI server the stream sends the snapshot and
+        ends, leaving the browser to reconnect.
+        """
+        response = self.client.get(reverse('table_stream'))
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('retry: ', body)
+        snapshot, = parse(body)
+        self.assertEqual(len(snapshot['data']), 2)
@@ -10,9 +10,13 @@ Routes:
     '' (table_list): Displays all tables and handles adding a new table.
     'edit/<int:pk>/' (table_edit): Edit an existing table by its primary key.
     'delete/<int:pk>/' (table_delete): Delete a table by its primary key.
+    '<int:pk>/<str:action>/' (table_transition): Reserve, seat or release a table.
+    'stream/' (table_stream): Server-Sent Events with the live state of the tables.
 """
 urlpatterns = [
     path('', views.table_list, name='table_list'),
     path('edit/<int:pk>/', views.table_edit, name='table_edit'),
     path('delete/<int:pk>/', views.table_delete, name='table_delete'),
+    path('stream/', views.table_stream, name='table_stream'),
+    path('<int:pk>/<str:action>/', views.table_transition, name='table_transition'),
 ]
@@ -1,13 +1,37 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import require_GET, require_POST
+from reservations.turns import times_left, with_time_left
+from .broadcast import broadcaster
 from .models import Table
 from .forms import TableForm
+from .signals import TABLE_FIELDS
+
+# the transition each action of the floor view asks for
+TRANSITIONS = {
+    'reserve': Table.reserve,
+    'seat': Table.seat,
+    'release': Table.release,
+}
 
 def table_list(request):
     """
     Display all tables and handle adding a new table.
 
-    This view fetches all existing Table records and displays them in a list.
-    It also processes the form submission for adding a new table.
+    This view fetches all existing Table records and displays them in a list,
+    ordered by table number, with the number of tables in each status. A
+    ``?status=`` parameter shows only the tables in that status; both reads
+    use the status index. The minutes left at the occupied tables are worked
+    out for all of them at once when the page is drawn. It also processes
+    the form submission for adding a new table.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -15,7 +39,14 @@ def table_list(request):
     Returns:
         HttpResponse: Renders 'tables/table_list.html' with tables and add form.
     """
-    tables = Table.objects.all()
+    tables = Table.objects.order_by('tableNumber')
+    status = request.GET.get('status')
+    if status in Table.Status.values:
+        tables = tables.filter(status=status)
+    tables = list(tables)
+    rows = list(zip(tables, times_left(tables)))
+    counts = dict(Table.objects.values_list('status').annotate(count=Count('pk')).order_by())
+    status_counts = [(value, label, counts.get(value, 0)) for value, label in Table.Status.choices]
 
     # Handle add form submission
     if request.method == 'POST':
@@ -26,7 +57,14 @@ def table_list(request):
     else:
         form = TableForm()
 
-    return render(request, 'table_list.html', {'tables': tables, 'form': form})
+    return render(request, 'table_list.html', {
+        'tables': tables,
+        'rows': rows,
+        'form': form,
+        'status': status,
+        'status_counts': status_counts,
+        'status_labels': dict(Table.Status.choices),
+    })
 
 
 def table_edit(request, pk):
@@ -73,3 +111,111 @@ def table_delete(request, pk):
     table = get_object_or_404(Table, pk=pk)
     table.delete()
     return redirect('table_list')
+
+
+@require_POST
+def table_transition(request, pk, action):
+    """
+    Move a table to a new status.
+
+    ``action`` is ``'reserve'``, ``'seat'`` or ``'release'``. The move is
+    checked against the table's status in the database (see
+    :meth:`reservations.models.Table.move_to`), so a move the table's status
+    does not allow, for example seating a table someone else has just
+    seated, is refused with an error message.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        pk (int): Primary key of the Table to move.
+        action (str): The transition to make.
+
+    Returns:
+        HttpResponseRedirect: Redirects to the 'table_list' view.
+    """
+    table = get_object_or_404(Table, pk=pk)
+    transition = TRANSITIONS.get(action)
+    if transition is None:
+        messages.error(request, f"Unknown table action '{action}'.")
+    elif transition(table):
+        messages.success(request, f"Table {table.tableNumber} is now {table.get_status_display().lower()}.")
+    else:
+        table.refresh_from_db(fields=['status'])
+        messages.error(request, f"Table {table.tableNumber} is {table.get_status_display().lower()} and cannot {action} now.")
+    return redirect('table_list')
+
+
+def _sse(data, event, number=None):
+    lines = [f"event: {event}"]
+    if number is not None:
+        lines.append(f"id: {number}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _table_events(subscription, snapshot):
+    try:
+        if snapshot:
+            yield snapshot
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.get(), timeout=settings.TABLE_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # a comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                # fell too far behind; the screen reconnects and starts over
+                return
+            number, event = item
+            yield _sse(event, 'table', number)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@require_GET
+async def table_stream(request):
+    """
+    Stream the state of the tables to a floor screen as Server-Sent Events.
+
+    The stream opens with a ``snapshot`` event holding every table, then
+    sends a ``table`` event each time a table is added, edited, reserved,
+    seated or released, each with the minutes the table has left, and ``{"id": ..., "deleted": true}`` when one is
+    removed. The screen's ``EventSource`` reconnects by itself and sends the
+    number of the last event it saw; if the missed events are still kept,
+    only those are sent instead of a new snapshot. An idle stream waits on
+    its queue in :data:`tables.broadcast.broadcaster` without a thread or a
+    query, with a comment line every ``TABLE_STREAM_HEARTBEAT`` seconds.
+
+    The stream is only held open under an ASGI server. Under WSGI each
+    connection would hold a worker, so the snapshot is sent alone and the
+    screen reconnects after ``TABLE_STREAM_RETRY`` milliseconds, which
+    amounts to polling.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: A ``text/event-stream`` response.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_number = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_number = None
+    live = isinstance(request, ASGIRequest)
+
+    # subscribe before reading, so nothing published meanwhile is missed
+    subscription, replayed = broadcaster.subscribe(last_number if live else None)
+    snapshot = f"retry: {settings.TABLE_STREAM_RETRY}\n\n"
+    if not live or not replayed or last_number is None:
+        tables = with_time_left([table async for table in Table.objects.order_by('tableNumber').values(*TABLE_FIELDS)])
+        snapshot += _sse(tables, 'snapshot', broadcaster.last_number)
+    if not live:
+        broadcaster.unsubscribe(subscription)
+        response = StreamingHttpResponse([snapshot], content_type='text/event-stream')
+    else:
+        response = StreamingHttpResponse(_table_events(subscription, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response